@@ -0,0 +1,510 @@
+""" Drives CECP and UCI engines from an asyncio event loop.
+
+    Unlike the CECPEngine and UCIEngine players, the engines here need no GTK,
+    no GObject main loop and no threads, so a single event loop can run
+    hundreds of them, as headless analysis services do. The engine output is
+    parsed by the same parsers the players use.
+
+    The methods starting a task return asyncio futures, which can be awaited
+    or run with loop.run_until_complete:
+
+        engine = AsyncUCIEngine("stockfish")
+        loop.run_until_complete(engine.start())
+        analysis = loop.run_until_complete(engine.analyse(board, Limit(depth=20)))
+        move = loop.run_until_complete(engine.play(board, Clock(60, 60, 1)))
+        loop.run_until_complete(engine.quit())
+
+    This module needs Python 3. """
+
+from __future__ import absolute_import
+
+import os
+import codecs
+import asyncio
+import logging
+import subprocess
+from collections import namedtuple
+
+from pychess.Utils.const import *
+from pychess.Utils.logic import validate
+from pychess.Utils.Move import parseAny, listToMoves
+from pychess.Utils.lutils.lmove import ParsingError
+from .engineParsers import whitespaces, parseCECPMove, parseCECPAnalysis, \
+    parseCECPFeatures, parseCECPOption, parseUCIOption, parseUCIInfo, \
+    coalesceAnalysisLines
+
+# pychess.System.Log needs GLib, so this logs through the standard library.
+# The records still carry the "task" the pychess log handlers expect.
+log = logging.getLogger("pychess.AsyncEngine")
+
+# The seconds a CECPv2 engine may take to send done=1, and the seconds more
+# it gets from a done=0
+TIME_OUT_FIRST = 10
+TIME_OUT_SECOND = 15
+# The seconds an engine gets to quit, before it is killed
+QUIT_TIME_OUT = 1
+
+class EngineError (Exception): pass
+
+# When to stop analysing: at a depth, at a number of nodes or after movetime
+# seconds. Limits not given are None.
+Limit = namedtuple("Limit", "depth nodes movetime")
+Limit.__new__.__defaults__ = (None, None, None)
+
+# The seconds left for white and black, and the seconds added after each move
+Clock = namedtuple("Clock", "wtime btime increment")
+Clock.__new__.__defaults__ = (0,)
+
+class EngineProtocol (asyncio.SubprocessProtocol):
+    """ Splits what the engine writes into lines, and passes them on a list
+        at a time """
+
+    def __init__ (self, engine):
+        self.engine = engine
+        self.buffers = {1: "", 2: ""}
+        self.decoders = {1: codecs.getincrementaldecoder("utf-8")("replace"),
+                         2: codecs.getincrementaldecoder("utf-8")("replace")}
+
+    def pipe_data_received (self, fd, data):
+        lines = (self.buffers[fd] + self.decoders[fd].decode(data)).splitlines(True)
+        if lines and not lines[-1].endswith("\n"):
+            self.buffers[fd] = lines.pop()
+        else:
+            self.buffers[fd] = ""
+        if not lines:
+            return
+
+        if fd == 2:
+            for line in lines:
+                log.error(line, extra={"task":self.engine.defname})
+        else:
+            self.engine.parseLines(lines)
+
+    def process_exited (self):
+        self.engine._onExit()
+
+class AsyncEngine (object):
+    """ The engine process and the state shared by the protocols. Only one
+        analyse or play task can run at a time. """
+
+    def __init__ (self, path, args=(), cwd=None, loop=None):
+        self.path = path
+        self.args = list(args)
+        self.cwd = cwd
+        self.loop = loop or asyncio.get_event_loop()
+        self.defname = os.path.basename(path)
+        self.name = None
+        self.options = {}
+
+        self.transport = None
+        self.stdin = None
+        self.started = None
+        self.exited = self.loop.create_future()
+
+        # The running analyse or play task
+        self.future = None
+        self.board = None
+        self.analysis = None
+        self.callback = None
+
+    def __repr__ (self):
+        return self.name or self.defname
+
+    #===========================================================================
+    #    Starting and quitting
+    #===========================================================================
+
+    def start (self):
+        """ Spawns the engine. Returns a future which is done when the engine
+            is ready for analyse and play. """
+        if self.started is None:
+            self.started = self.loop.create_future()
+            spawn = self.loop.create_task(self.loop.subprocess_exec(
+                lambda: EngineProtocol(self), self.path, *self.args,
+                cwd=self.cwd, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE))
+            spawn.add_done_callback(self.__onSpawned)
+        return self.started
+
+    def __onSpawned (self, spawn):
+        try:
+            self.transport, protocol = spawn.result()
+        except (OSError, ValueError) as e:
+            self.started.set_exception(EngineError("Couldn't start %s: %s" % (self.path, e)))
+            return
+        self.stdin = self.transport.get_pipe_transport(0)
+        log.debug("%s started" % self.path, extra={"task":self.defname})
+        self._handshake()
+
+    def _ready (self):
+        if not self.started.done():
+            self.started.set_result(self)
+
+    def quit (self):
+        """ Asks the engine to quit, and kills it if it doesn't. Returns a
+            future with the exit code. """
+        if self.transport is not None and not self.exited.done():
+            self._quit()
+            self.loop.call_later(QUIT_TIME_OUT, self.__kill)
+        return self.exited
+
+    def __kill (self):
+        if not self.exited.done():
+            log.warning("Killing %s, which didn't quit" % self, extra={"task":self.defname})
+            self.transport.kill()
+
+    def _onExit (self):
+        code = self.transport.get_returncode()
+        log.debug("Exited with %s" % code, extra={"task":self.defname})
+        error = EngineError("%s exited with %s" % (self, code))
+        if self.started is not None and not self.started.done():
+            self.started.set_exception(error)
+        if self.future is not None and not self.future.done():
+            self.future.set_exception(error)
+        self.future = None
+        if not self.exited.done():
+            self.exited.set_result(code)
+        self.transport.close()
+
+    #===========================================================================
+    #    Talking to the engine
+    #===========================================================================
+
+    def write (self, line):
+        if self.stdin is None or self.exited.done():
+            raise EngineError("%s isn't running" % self)
+        log.info(line, extra={"task":self.defname})
+        self.stdin.write((line + "\n").encode("utf-8"))
+
+    def parseLines (self, lines):
+        for line in lines:
+            self._parseLine(line)
+
+    def _begin (self, board, callback):
+        """ Returns the future of a new analyse or play task """
+        if self.started is None or not self.started.done():
+            raise EngineError("%s hasn't been started" % self)
+        if self.future is not None:
+            raise EngineError("%s is busy" % self)
+        self.future = self.loop.create_future()
+        self.board = board
+        self.analysis = [None]
+        self.callback = callback
+        return self.future
+
+    def _end (self, result):
+        future = self.future
+        self.future = None
+        if not future.done():
+            future.set_result(result)
+
+    def _analysed (self, multipv, moves, score, depth):
+        if multipv <= len(self.analysis):
+            self.analysis[multipv-1] = (moves, score, depth)
+        if self.callback is not None:
+            self.callback(self.analysis)
+
+    def _moved (self, movestr):
+        """ Ends a play task with the move the engine made """
+        try:
+            move = parseAny(self.board, movestr)
+        except ParsingError as e:
+            move = None
+        future = self.future
+        if move is None or not validate(self.board, move):
+            self.future = None
+            future.set_exception(EngineError("%s made an illegal move: %s" % (self, movestr)))
+            return
+        self._end(move)
+
+    #===========================================================================
+    #    To be implemented by the protocols
+    #===========================================================================
+
+    def _handshake (self):
+        raise NotImplementedError
+
+    def _quit (self):
+        raise NotImplementedError
+
+    def _parseLine (self, line):
+        raise NotImplementedError
+
+    def setOption (self, key, value):
+        raise NotImplementedError
+
+    def analyse (self, board, limit, callback=None):
+        """ Analyses board until limit is reached. Returns a future with the
+            analysis, a list of (moves, score, depth) tuples like the ones of
+            the 'analyze' signal of the players. callback is called with the
+            analysis each time it changes. """
+        raise NotImplementedError
+
+    def play (self, board, clock):
+        """ Returns a future with the move the engine makes on board """
+        raise NotImplementedError
+
+    def stop (self):
+        """ Makes the engine end the running task now """
+        raise NotImplementedError
+
+class AsyncUCIEngine (AsyncEngine):
+
+    def __init__ (self, path, args=(), cwd=None, loop=None):
+        AsyncEngine.__init__(self, path, args, cwd, loop)
+        self.ids = {}
+
+    def _handshake (self):
+        self.write("uci")
+
+    def _quit (self):
+        self.write("quit")
+
+    def setOption (self, key, value):
+        if isinstance(value, bool):
+            value = str(value).lower()
+        self.write("setoption name %s value %s" % (key, value))
+
+    def parseLines (self, lines):
+        if self.future is not None and len(lines) > 1:
+            lines = coalesceAnalysisLines(lines)
+        AsyncEngine.parseLines(self, lines)
+
+    def _parseLine (self, line):
+        parts = line.split()
+        if not parts: return
+
+        if parts[0] == "id" and len(parts) > 1:
+            self.ids[parts[1]] = " ".join(parts[2:])
+            if parts[1] == "name":
+                self.name = self.ids["name"]
+        elif parts[0] == "option":
+            dic = parseUCIOption(parts)
+            self.options[dic["name"]] = dic
+        elif parts[0] == "uciok":
+            self.write("isready")
+        elif parts[0] == "readyok":
+            self._ready()
+        elif self.future is None:
+            return
+        elif parts[0] == "info" and self.analysis is not None:
+            try:
+                info = parseUCIInfo(parts)
+            except (ValueError, IndexError):
+                log.debug("Ignored a broken line: %s" % line.strip(), extra={"task":self.defname})
+                return
+            if info is None:
+                return
+            multipv, depth, score, movstrs = info
+            try:
+                moves = listToMoves(self.board, movstrs, AN, validate=True, ignoreErrors=False)
+            except ParsingError as e:
+                log.debug("Ignored (%s): ParsingError %s" % (' '.join(movstrs), e), extra={"task":self.defname})
+                return
+            self._analysed(multipv, moves, score, depth)
+        elif parts[0] == "bestmove":
+            if self.analysis is not None:
+                self._end(self.analysis)
+            else:
+                self._moved(parts[1])
+
+    def analyse (self, board, limit, callback=None, multipv=1):
+        future = self._begin(board, callback)
+        self.analysis = [None] * multipv
+        if "MultiPV" in self.options:
+            self.setOption("MultiPV", multipv)
+        go = ["go"]
+        if limit.depth is not None:
+            go.append("depth %d" % limit.depth)
+        if limit.nodes is not None:
+            go.append("nodes %d" % limit.nodes)
+        if limit.movetime is not None:
+            go.append("movetime %d" % (limit.movetime * 1000))
+        if len(go) == 1:
+            go.append("infinite")
+        self.write("position fen %s" % board.asFen())
+        self.write(" ".join(go))
+        return future
+
+    def play (self, board, clock):
+        future = self._begin(board, None)
+        self.analysis = None
+        self.write("position fen %s" % board.asFen())
+        self.write("go wtime %d btime %d winc %d binc %d" % \
+                   (clock.wtime*1000, clock.btime*1000, clock.increment*1000, clock.increment*1000))
+        return future
+
+    def stop (self):
+        # The engine answers with bestmove, which ends the task
+        if self.future is not None:
+            self.write("stop")
+
+class AsyncCECPEngine (AsyncEngine):
+
+    def __init__ (self, path, args=(), cwd=None, loop=None, protover=2):
+        AsyncEngine.__init__(self, path, args, cwd, loop)
+        self.protover = protover
+        self.features = {
+            "ping":      0,
+            "setboard":  0,
+            "san":       0,
+            "usermove":  0,
+            "time":      1,
+            "sigint":    0,
+            "analyze":   0,
+            "myname":    self.defname,
+            "variants":  None,
+            "colors":    1,
+            "done":      None,
+            "memory":    0,
+            "smp":       0,
+            "option":    '',
+        }
+        self.supported_features = [
+            "ping", "setboard", "san", "usermove", "time", "sigint",
+            "analyze", "myname", "variants", "colors", "done", "smp",
+            "memory", "option"
+        ]
+        self.timer = None
+        self.limit = None
+
+    def _handshake (self):
+        self.write("xboard")
+        if self.protover == 1:
+            self.__onReady()
+        else:
+            self.write("protover 2")
+            self.timer = self.loop.call_later(TIME_OUT_FIRST, self.__onReady)
+
+    def __onReady (self):
+        if self.timer is not None:
+            self.timer.cancel()
+            self.timer = None
+        if self.started.done():
+            return
+        self.write("new")
+        self.write("force")
+        self.write("post")
+        self._ready()
+
+    def _quit (self):
+        self.write("quit")
+
+    def setOption (self, key, value):
+        if key in ("cores", "memory"):
+            self.write("%s %s" % (key, value))
+        else:
+            if isinstance(value, bool):
+                value = int(value)
+            self.write("option %s=%s" % (key, value))
+
+    def _parseLine (self, line):
+        if line[0:1] == "#":
+            # Debug line which we shall ignore as specified in CECPv2 specs
+            return
+        parts = whitespaces.split(line.strip())
+        if not parts[0]:
+            return
+
+        if "feature" in parts:
+            done1 = False
+            for key, value in parseCECPFeatures(parts):
+                if not key in self.features:
+                    continue
+                if key in self.supported_features:
+                    self.write("accepted %s" % key)
+                else:
+                    self.write("rejected %s" % key)
+
+                if key == "done":
+                    if value == 1:
+                        done1 = True
+                    elif value == 0 and self.timer is not None:
+                        # This'll buy you some more time
+                        self.timer.cancel()
+                        self.timer = self.loop.call_later(TIME_OUT_SECOND, self.__onReady)
+                elif key == "option":
+                    option = parseCECPOption(value)
+                    if option is not None:
+                        self.options[option["name"]] = option
+                else:
+                    self.features[key] = value
+                    if key == "myname":
+                        self.name = value
+            if done1:
+                self.__onReady()
+            return
+
+        if self.future is None:
+            return
+
+        if self.analysis is None:
+            movestr = parseCECPMove(parts)
+            if movestr:
+                self.write("force")
+                self._moved(movestr)
+            return
+
+        analysis = parseCECPAnalysis(line)
+        if analysis:
+            depth, score, mvstrs = analysis
+            try:
+                moves = listToMoves(self.board, mvstrs, type=None, validate=True, ignoreErrors=False)
+            except Exception:
+                log.debug('Ignored an "old" line from analyzer: %s' % mvstrs, extra={"task":self.defname})
+                return
+            self._analysed(1, moves, score, depth)
+            reached = depth.rstrip(".+-")
+            if self.limit.depth is not None and reached.isdigit() and \
+                    int(reached) >= self.limit.depth:
+                self.stop()
+
+    def __begin (self, board, callback):
+        if not self.features["setboard"]:
+            raise EngineError("%s can't be given a position" % self)
+        future = self._begin(board, callback)
+        self.write("force")
+        self.write("setboard %s" % board.asFen(enable_bfen=False))
+        return future
+
+    def analyse (self, board, limit, callback=None):
+        """ CECP engines can't be told how deep to go, so the analysis is
+            stopped when a line with the depth of limit is seen, or after its
+            movetime. There is no stopping at a number of nodes. """
+        if not self.features["analyze"]:
+            raise EngineError("%s can't analyze" % self)
+        if limit.depth is None and limit.movetime is None:
+            raise ValueError("CECP analysis needs a depth or a movetime limit")
+        future = self.__begin(board, callback)
+        self.limit = limit
+        self.write("analyze")
+        if limit.movetime is not None:
+            self.timer = self.loop.call_later(limit.movetime, self.stop)
+        return future
+
+    def play (self, board, clock):
+        future = self.__begin(board, None)
+        self.analysis = None
+        if board.color == WHITE:
+            secs, opsecs = clock.wtime, clock.btime
+        else:
+            secs, opsecs = clock.btime, clock.wtime
+        self.write("level 0 %d:%02d %d" % (secs // 60, secs % 60, clock.increment))
+        if self.features["time"]:
+            self.write("time %d" % (secs*100))
+            self.write("otim %d" % (opsecs*100))
+        self.write("go")
+        return future
+
+    def stop (self):
+        if self.timer is not None:
+            self.timer.cancel()
+            self.timer = None
+        if self.future is None:
+            return
+        if self.analysis is not None:
+            self.write("exit")
+            self._end(self.analysis)
+        else:
+            # Move now
+            self.write("?")
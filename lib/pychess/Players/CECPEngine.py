@@ -1,12 +1,13 @@
 from __future__ import absolute_import
 from __future__ import print_function
-from threading import RLock, Timer, Thread
+from threading import RLock, Timer, Thread, current_thread
 import itertools
 import re
 import time
 
 from gi.repository import Gtk
 from gi.repository import GObject
+from gi.repository import GLib
 
 from pychess.compat import Queue, Empty
 from pychess.System import conf, fident
@@ -23,6 +24,8 @@ from pychess.Utils.lutils.lmove import ParsingError
 from pychess.Variants import variants
 from pychess.Players.Player import PlayerIsDead, TurnInterrupt
 from .ProtocolEngine import ProtocolEngine
+from .engineParsers import whitespaces, parseCECPMove, parseCECPAnalysis, \
+    parseCECPFeatures, parseCECPOption
 
 def isdigits (strings):
     for s in strings:
@@ -35,47 +38,6 @@ def isdigits (strings):
                 return False
     return True
 
-movere = re.compile(r"""
-    (                   # group start
-    (?:                 # non grouping parenthesis start
-    [PKQRBN]?            # piece
-    [a-h]?[1-8]?        # unambiguous column or line
-    x?                  # capture
-    @?                  # drop
-    [a-h][1-8]          # destination square
-    =?[QRBN]?           # promotion
-    |O\-O(?:\-O)?       # castling
-    |0\-0(?:\-0)?       # castling
-    )                   # non grouping parenthesis end
-    [+#]?               # check/mate
-    )                   # group end
-    \s*                 # any whitespace
-    """, re.VERBOSE)
-
-d_plus_dot_expr = re.compile(r"\d+\.")
-
-anare = re.compile("""
-    ^                        # beginning of string
-    (\s*                     #
-    \d+ [+\-\.]?             # The ply analyzed. Some engines end it with a dot, minus or plus
-    \s+)                     #
-    (-?Mat\s*\d+ | [+\-\d\.]+) # The score found in centipawns.
-                             #   Mat1 is used by gnuchess to specify mate in one.
-                             #   otherwise we should support a signed float
-    \s+                      #
-    [\d\.]+                  # The time used in seconds
-    \s+                      #
-    [\d\.]+                  # Number of nodes visited
-    \s+                      #
-    (.+)                     # The Principal-Variation. With or without move numbers
-    \s*                      #
-    $                        # end of string
-    """, re.VERBOSE)
-                   
-#anare = re.compile("\(d+)\.?\s+ (Mat\d+|[-\d\.]+) \s+ \d+\s+\d+\s+((?:%s\s*)+)" % mov)
-
-whitespaces = re.compile(r"\s+")
-
 def semisynced(f):
     """ All moveSynced methods will be queued up, and called in the right
         order after self.readyMoves is true """
@@ -169,6 +131,7 @@ class CECPEngine (ProtocolEngine):
         
         self.lastping = 0
         self.lastpong = 0
+        self.resetping = None
         self.timeout = None
         
         self.returnQueue = Queue()
@@ -209,6 +172,7 @@ class CECPEngine (ProtocolEngine):
             self.timeout = time.time() + TIME_OUT_FIRST
     
     def start (self):
+        self.gameThread = current_thread()
         if self.mode in (ANALYZING, INVERSE_ANALYZING):
             t = Thread(target=self.__startBlocking,
                        name=fident(self.__startBlocking))
@@ -274,21 +238,27 @@ class CECPEngine (ProtocolEngine):
     @semisynced
     def end (self, status, reason):
         if self.connected:
+            if self.pool is not None and self.pool.release(self, status):
+                return
+
             # We currently can't fillout the comment "field" as the repr strings
             # for reasons and statuses lies in Main.py
             # Creating Status and Reason class would solve this
-            if status == DRAW:
-                print("result 1/2-1/2 {?}", file=self.engine)
-            elif status == WHITEWON:
-                print("result 1-0 {?}", file=self.engine)
-            elif status == BLACKWON:
-                print("result 0-1 {?}", file=self.engine)
-            else:
-                print("result * {?}", file=self.engine)
-            
+            self.__printResult(status)
+
             # Make sure the engine exits and do some cleaning
             self.kill(reason)
-    
+
+    def __printResult (self, status):
+        if status == DRAW:
+            print("result 1/2-1/2 {?}", file=self.engine)
+        elif status == WHITEWON:
+            print("result 1-0 {?}", file=self.engine)
+        elif status == BLACKWON:
+            print("result 0-1 {?}", file=self.engine)
+        else:
+            print("result * {?}", file=self.engine)
+
     def kill (self, reason):
         """ Kills the engine, starting with the 'quit' command, then sigterm and
             eventually sigkill.
@@ -317,7 +287,75 @@ class CECPEngine (ProtocolEngine):
                 if self.analysis_timer is not None:
                     self.analysis_timer.cancel()
                     self.analysis_timer.join()
-    
+
+    #===========================================================================
+    #    Reusing the engine
+    #===========================================================================
+
+    def finish (self, status):
+        """ Tells the engine the result of the game, like end, but leaves it
+            running, so it can play another game after newGame. A game thread
+            waiting for a move from the engine is let go. """
+        if self.connected:
+            # The game paused the engine when it ended
+            self.engine.resume()
+            with self.boardLock:
+                if self.mode == NORMAL:
+                    self.__printResult(status)
+                elif self.engineIsAnalyzing:
+                    print("exit", file=self.engine)
+                    self.engineIsAnalyzing = False
+                self.__tellEngineToStopPlayingCurrentColor()
+            if self.analysis_timer is not None:
+                self.analysis_timer.cancel()
+            self.returnQueue.put("del")
+            self.emit("analyze", [])
+
+    def newGame (self, color):
+        """ Readies a finished engine for a new game as color, with the options
+            it was started with. The thread of the last game must have returned,
+            as it is sharing the state reset here. """
+        with self.boardLock:
+            self.color = color
+            self.board = Board(setup=True)
+            self.movenext = False
+            self.waitingForMove = False
+            self.readyForMoveNowCommand = False
+            self.undoQueue = []
+            self.readyMoves = False
+            self.returnQueue = Queue()
+            # The 'readyForOptions' handlers queue the options again
+            self.optionQueue = []
+
+            # 'new' resets the variant, the time control and the depth limit
+            print("new", file=self.engine)
+            # Keep the engine in force mode until its first move, so a late
+            # move from the last game is discarded
+            self.__tellEngineToStopPlayingCurrentColor()
+
+        if self.protover == 1:
+            # Like prestart, and start does the rest
+            self.emit("readyForOptions")
+            return
+        self.timeout = time.time() + TIME_OUT_SECOND
+        if self.features["ping"]:
+            # The lines before the pong are left from the last game
+            self.lastping += 1
+            self.resetping = self.lastping
+            print("ping %d" % self.lastping, file=self.engine)
+        else:
+            # Lets whoever is given the engine connect to it first, as they
+            # would have done for a new engine
+            GLib.idle_add(self.__onReset)
+
+    def __onReset (self):
+        """ Sets up the engine reused by newGame, like parseLine does when a
+            new engine is done sending its features """
+        self.emit("readyForOptions")
+        self.emit("readyForMoves")
+        self.returnQueue.put("ready")
+        return False
+
     #===========================================================================
     #    Send the player move updates
     #===========================================================================
@@ -734,6 +772,9 @@ class CECPEngine (ProtocolEngine):
         
         if parts[0] == "pong":
             self.lastpong = int(parts[1])
+            if self.lastpong == self.resetping:
+                self.resetping = None
+                self.__onReset()
             return
         
         # Illegal Move
@@ -746,14 +787,12 @@ class CECPEngine (ProtocolEngine):
         
         # A Move (Perhaps)
         if self.board:
-            if parts[0] == "move":
-                movestr = parts[1]
-            # Old Variation
-            elif d_plus_dot_expr.match(parts[0]) and parts[1] == "...":
-                movestr = parts[2]
-            else:
-                movestr = False
+            movestr = parseCECPMove(parts)
             
+            if movestr and self.resetping is not None:
+                log.info("__parseLine: Discarding move from the last game: %s" % movestr, extra={"task":self.defname})
+                return
+
             if movestr:
                 log.debug("__parseLine: acquiring self.boardLock", extra={"task":self.defname})
                 self.waitingForMove = False
@@ -794,19 +833,9 @@ class CECPEngine (ProtocolEngine):
                 print("book off", file=self.engine)
                 return
             
-            match = anare.match(line)
-            if match:
-                depth, score, moves = match.groups()
-
-                if "mat" in score.lower() or "#" in moves:
-                    # Will look either like -Mat 3 or Mat3
-                    scoreval = MATE_VALUE
-                    if score.startswith('-'):
-                        scoreval = -scoreval
-                else:
-                    scoreval = int(score)
-                
-                mvstrs = movere.findall(moves)
+            analysis = parseCECPAnalysis(line)
+            if analysis:
+                depth, scoreval, mvstrs = analysis
                 try:
                     moves = listToMoves (self.board, mvstrs, type=None, validate=True, ignoreErrors=False)
                 except:
@@ -818,7 +847,7 @@ class CECPEngine (ProtocolEngine):
                 # Don't emit if we weren't able to parse moves, or if we have a move
                 # to kill the opponent king - as it confuses many engines
                 if moves and not self.board.board.opIsChecked():
-                    self.emit("analyze", [(moves, scoreval, depth.strip())])
+                    self.emit("analyze", [(moves, scoreval, depth)])
                 
                 return
         
@@ -875,37 +904,9 @@ class CECPEngine (ProtocolEngine):
         if "feature" in parts:
             # Some engines send features after done=1, so we will iterate after done=1 too
             done1 = False
-            # We skip parts before 'feature', as some engines give us lines like
-            # White (1) : feature setboard=1 analyze...e="GNU Chess 5.07" done=1
-            parts = parts[parts.index("feature"):]
-            for i, pair in enumerate(parts[1:]):
-                
-                # As "parts" is split with no thoughs on quotes or double quotes
-                # we need to do some extra handling.
-                
-                if pair.find("=") < 0:
-                    continue
-                key, value = pair.split("=",1)
-                
+            for key, value in parseCECPFeatures(parts):
                 if not key in self.features:
                     continue
-                    
-                if value.startswith('"') and value.endswith('"'):
-                    value = value[1:-1]
-                
-                # If our pair was unfinished, like myname="GNU, we search the
-                # rest of the pairs for a quotating mark.
-                elif value[0] == '"':
-                    rest = value[1:] + " " + " ".join(parts[2+i:])
-                    j = rest.find('"')
-                    if j == -1:
-                        log.warning("Missing endquotation in %s feature", extra={"task":self.defname})
-                        value = rest
-                    else:
-                        value = rest[:j]
-                
-                elif value.isdigit():
-                    value = int(value)
                 
                 if key in self.supported_features:
                     print("accepted %s" % key, file=self.engine)
@@ -928,7 +929,7 @@ class CECPEngine (ProtocolEngine):
                 elif key == "memory" and value == 1:
                     self.options["memory"] = {"name": "memory", "type": "spin", "default": 32, "min": 1, "max": 4096}
                 elif key == "option" and key != "done":
-                    option = self.__parse_option(value)
+                    option = parseCECPOption(value)
                     self.options[option["name"]] = option
                 else:
                     self.features[key] = value
@@ -957,48 +958,6 @@ class CECPEngine (ProtocolEngine):
                 if not self.name:
                     self.setName(name)
 
-    def __parse_option(self, option):
-        if " -check " in option:
-            name, value = option.split(" -check ")
-            return {"type": "check", "name": name, "default": bool(int(value))}
-        elif " -spin " in option:
-            name, value = option.split(" -spin ")
-            defv, minv, maxv = value.split()
-            return {"type": "spin", "name": name, "default": int(defv), "min": int(minv), "max": int(maxv)}
-        elif " -slider " in option:
-            name, value = option.split(" -slider ")
-            defv, minv, maxv = value.split()
-            return {"type": "spin", "name": name, "default": int(defv), "min": int(minv), "max": int(maxv)}
-        elif " -string " in option:
-            name, value = option.split(" -string ")
-            return {"type": "text", "name": name, "default": value}
-        elif " -file " in option:
-            name, value = option.split(" -file ")
-            return {"type": "text", "name": name, "default": value}
-        elif " -path " in option:
-            name, value = option.split(" -path ")
-            return {"type": "text", "name": name, "default": value}
-        elif " -combo " in option:
-            name, value = option.split(" -combo ")
-            choices = list(map(str.strip, value.split("///")))
-            default = ""
-            for choice in choices:
-                if choice.startswith("*"):
-                    index = choices.index(choice)
-                    default = choice[1:]
-                    choices[index] = default
-                    break
-            return {"type": "combo", "name": name, "default": default, "choices": choices}
-        elif " -button" in option:
-            pos = option.find(" -button")
-            return {"type": "button", "name": option[:pos]}
-        elif " -save" in option:
-            pos = option.find(" -save")
-            return {"type": "button", "name": option[:pos]}
-        elif " -reset" in option:
-            pos = option.find(" -reset")
-            return {"type": "button", "name": option[:pos]}
-
     #===========================================================================
     #    Info
     #===========================================================================
@@ -0,0 +1,151 @@
+""" Keeps engines between games, so they don't have to be started again.
+
+    Starting an engine means spawning its process, the protocol handshake and
+    sending the options, and some engines load large evaluation networks or
+    tablebases on top of that. Ending a game therefore gives its engines back
+    to the pool, where they wait to be handed out to a new game wanting the
+    same engine with the same options. Engines idle for longer than the ttl
+    are killed, as are the least recently used ones when the idle engines
+    use more memory than the budget. """
+
+from __future__ import absolute_import
+
+import os
+import time
+from threading import RLock, current_thread
+
+from pychess.System import conf
+from pychess.System.Log import log
+from pychess.System.repeat import repeat_sleep
+from pychess.Utils.const import *
+
+DEFAULT_TTL = 300 # seconds
+EVICT_INTERVAL = 10 # seconds
+
+def getResidentMemory (pid):
+    """ The bytes of memory a process uses, or 0 if it isn't known """
+    try:
+        with open("/proc/%d/statm" % pid) as statm:
+            return int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (IOError, OSError, ValueError, IndexError, AttributeError):
+        return 0
+
+def getDefaultMemoryBudget ():
+    """ A quarter of the physical memory, or None if it isn't known """
+    try:
+        return os.sysconf('SC_PHYS_PAGES') * os.sysconf('SC_PAGE_SIZE') // 4
+    except (ValueError, OSError, AttributeError):
+        return None
+
+class EnginePool:
+    def __init__ (self, ttl=None, memoryBudget=None):
+        """ ttl is the seconds an engine is kept idle, and memoryBudget the
+            bytes the idle engines may use, where None is no limit. By default
+            they are taken from the preferences. A ttl of 0 turns the pool
+            off, which is the default for now, and arena.py turns it on. """
+        if ttl is None:
+            ttl = conf.get("engine_pool_ttl", 0)
+        if memoryBudget is None:
+            megabytes = conf.get("engine_pool_memory", 0)
+            memoryBudget = megabytes << 20 if megabytes else getDefaultMemoryBudget()
+        self.ttl = ttl
+        self.memoryBudget = memoryBudget
+
+        # A (key, engine, released) tuple for each idle engine, the least
+        # recently released first
+        self.idle = []
+        self.lock = RLock()
+        self.evicting = False
+        self.hits = 0
+        self.misses = 0
+
+    def register (self, engine, key):
+        """ Lets the engine be given back to the pool when its game ends. The
+            key tells what engine with what options it is. """
+        engine.pool = self
+        engine.poolKey = key
+
+    def acquire (self, key, color):
+        """ Returns an idle engine of key, ready for a new game as color, or
+            None if there isn't one. Engines still used by the thread of their
+            last game are left idle, unless it is the calling thread. """
+        dead = []
+        with self.lock:
+            for i in range(len(self.idle)-1, -1, -1):
+                if self.idle[i][0] != key:
+                    continue
+                engine = self.idle[i][1]
+                if not self._isAlive(engine):
+                    dead.append(self.idle.pop(i)[1])
+                    continue
+                # The engine mustn't be shared with another thread
+                thread = engine.gameThread
+                if thread is not None and thread is not current_thread() and \
+                        thread.is_alive():
+                    continue
+                del self.idle[i]
+                self.hits += 1
+                break
+            else:
+                engine = None
+                self.misses += 1
+
+        for engine_ in dead:
+            log.warning("EnginePool.acquire: Can't reuse %s" % engine_)
+            engine_.kill(UNKNOWN_REASON)
+        if engine is not None:
+            engine.newGame(color)
+        return engine
+
+    def release (self, engine, status):
+        """ Takes an engine back when its game has ended. Returns False if
+            the pool won't have it, and it should be killed instead. """
+        if self.ttl <= 0 or not self._isAlive(engine):
+            return False
+
+        engine.finish(status)
+        with self.lock:
+            self.idle.append((engine.poolKey, engine, time.time()))
+            evicted = self._evict()
+            if not self.evicting:
+                self.evicting = True
+                repeat_sleep(self._evictLater, EVICT_INTERVAL)
+        for engine_ in evicted:
+            engine_.kill(UNKNOWN_REASON)
+        return True
+
+    def close (self):
+        """ Kills the idle engines """
+        with self.lock:
+            idle, self.idle = self.idle, []
+        for key, engine, released in idle:
+            engine.kill(UNKNOWN_REASON)
+
+    def _isAlive (self, engine):
+        return engine.connected and engine.engine.subprocExitCode[0] is None
+
+    def _evict (self):
+        """ Removes the idle engines which should be killed, and returns them """
+        now = time.time()
+        evicted = [engine for key, engine, released in self.idle
+                   if now - released >= self.ttl or not self._isAlive(engine)]
+        self.idle = [entry for entry in self.idle if entry[1] not in evicted]
+
+        if self.memoryBudget is not None:
+            used = [getResidentMemory(engine.engine.pid) for key, engine, released in self.idle]
+            total = sum(used)
+            while total > self.memoryBudget:
+                evicted.append(self.idle.pop(0)[1])
+                total -= used.pop(0)
+
+        if evicted:
+            log.debug("EnginePool: Evicting %s" % evicted)
+        return evicted
+
+    def _evictLater (self):
+        with self.lock:
+            evicted = self._evict()
+            self.evicting = bool(self.idle)
+        for engine in evicted:
+            engine.kill(UNKNOWN_REASON)
+        return self.evicting
@@ -30,6 +30,13 @@ class ProtocolEngine (Engine):
         
         self.connected = True
         self.mode = NORMAL
+
+        # Set by the EnginePool handing out the engine, which it is given
+        # back to when the game ends
+        self.pool = None
+        self.poolKey = None
+        # The thread of the game which started the engine
+        self.gameThread = None
         
         log.debug(reprColor[color], extra={"task":self.defname})
         
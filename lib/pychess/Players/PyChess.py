@@ -22,7 +22,10 @@ from pychess.Utils.book import getOpenings
 from pychess.Utils.const import *
 from pychess.Utils.lutils import lsearch
 from pychess.Utils.lutils.ldata import MAXPLY
-from pychess.Utils.lutils.lsearch import alphaBeta
+from pychess.Utils.lutils.lsearch import aspirationSearch, getPv
+from pychess.Utils.lutils.TimeManager import TimeManager
+from pychess.Utils.lutils.TranspositionTable import TranspositionTable
+from pychess.Utils.lutils.leval import resizePawnTable, PAWN_HASH_PART
 from pychess.Utils.lutils.LBoard import LBoard
 from pychess.Utils.lutils.lmove import listToSan, toSAN
 
@@ -35,6 +38,12 @@ class PyChess (object):
     def __init__ (self):
         self.sd = MAXPLY
         self.skipPruneChance = 0
+        self.nullMove = True
+        self.lateMoveReductions = True
+        self.futilityPruning = True
+        self.twoFoldInSearch = True
+        self.evalCache = True
+        self.quiescencePruning = True
         
         self.clock = [0, 0]
         self.increment = [0, 0]
@@ -45,27 +54,50 @@ class PyChess (object):
         self.ponder = False # Currently unused
         self.post = False
         self.debug = True
+        self.cores = 1
+        self.smp = None # LazySMP helpers, when using more than one core
+        self.hashSize = lsearch.table.size // (1024 * 1024) # In megabytes
+        self.hashFile = None
+    
+    def setCores (self, cores):
+        """ Searches with cores-1 helper processes besides the main search """
+        self.cores = cores
+        self.__setupTable()
+    
+    def setHashSize (self, megabytes):
+        self.hashSize = megabytes
+        self.__setupTable()
+    
+    def setHashFile (self, filename):
+        """ Keeps the transposition table in a file, from where a later engine
+            process can pick it up, or in memory if filename is None """
+        self.hashFile = filename
+        self.__setupTable()
+    
+    def __setupTable (self):
+        if self.smp:
+            self.smp.quit()
+            self.smp = None
+        lsearch.table.close()
+        size = self.hashSize * 1024 * 1024
+        pawnSize = size // PAWN_HASH_PART
+        resizePawnTable(pawnSize)
+        lsearch.table = TranspositionTable(size - pawnSize, shared=self.cores > 1,
+                                           filename=self.hashFile)
+        if self.cores > 1:
+            from pychess.Utils.lutils.LazySMP import LazySMP
+            self.smp = LazySMP(self.cores)
+    
+    def __getNodes (self):
+        if self.smp:
+            self.smp.poll()
+            return lsearch.nodes + self.smp.getNodes()
+        return lsearch.nodes
     
     #===========================================================================
     # Play related
     #===========================================================================
     
-    def __remainingMovesA (self):
-        # Based on regression of a 180k games pgn
-        x = self.board.plyCount
-        return -1.71086e-12*x**6 \
-               +1.69103e-9*x**5 \
-               -6.00801e-7*x**4 \
-               +8.17741e-5*x**3 \
-               +2.91858e-4*x**2 \
-               -0.94497*x \
-               +78.8979
-    
-    def __remainingMovesB (self):
-        # We bet a game will be around 80 moves
-        x = self.board.plyCount
-        return max(80-x,4)
-    
     def __getBestOpening (self):
         totalWeight = 0
         choice = None
@@ -78,6 +110,10 @@ class PyChess (object):
                     choice = move
         return choice
     
+    def __setSearchOptions (self):
+        for name in lsearch.SEARCH_OPTIONS:
+            setattr(lsearch, name, getattr(self, name))
+    
     def __go (self, ondone=None):
         """ Finds and prints the best move from the current position """
         
@@ -87,61 +123,72 @@ class PyChess (object):
         
         if not mv:
                
-            lsearch.skipPruneChance = self.skipPruneChance
+            self.__setSearchOptions()
             lsearch.searching = True
             
-            timed = self.basetime > 0
-            
-            if self.searchtime > 0:
-                usetime = self.searchtime
-            else:
-                usetime = self.clock[self.playingAs] / self.__remainingMovesA()
-                if self.clock[self.playingAs] < 6*60+self.increment[self.playingAs]*40:
-                    # If game is blitz, we assume 40 moves rather than 80
-                    usetime *= 2
-                # The increment is a constant. We'll use this always
-                usetime += self.increment[self.playingAs]
-                if usetime < 0.5:
-                    # We don't wan't to search for e.g. 0 secs
-                    usetime = 0.5
-
-            prevtime = 0
-            starttime = time()
-            lsearch.endtime = starttime + usetime if timed else sys.maxsize
+            timed = self.basetime > 0 or self.searchtime > 0
+            manager = TimeManager(self.clock[self.playingAs],
+                                  self.increment[self.playingAs],
+                                  self.movestogo, self.board.plyCount,
+                                  self.searchtime)
+            starttime = manager.starttime
+            lsearch.endtime = manager.getEndtime() if timed else sys.maxsize
             if self.debug:
                 if timed:
-                    print("# Time left: %3.2f s; Planing to think for %3.2f s" % (self.clock[self.playingAs], usetime))
+                    print("# Time left: %3.2f s; Planing to think for %3.2f s, at most %3.2f s" % \
+                          (self.clock[self.playingAs], manager.optimum, manager.maximum))
                 else:
                     print("# Searching to depth %d without timelimit" % self.sd)
 
+            if self.smp:
+                self.smp.start(self.board, self.sd, lsearch.endtime)
+            completed = 0
             for depth in range(1, self.sd+1):
-                # Heuristic time saving
-                # Don't waste time, if the estimated isn't enough to complete next depth
-                if timed and usetime <= prevtime*4 and usetime > 1:
+                if timed and depth > 1 and not manager.nextIteration():
                     break
+                iterstart = time()
+                iternodes = lsearch.nodes
                 lsearch.timecheck_counter = lsearch.TIMECHECK_FREQ
-                search_result = alphaBeta(self.board, depth)
+                guess = self.scr if completed else None
+                search_result = aspirationSearch(self.board, depth, guess)
                 if lsearch.searching:
-                    mvs, self.scr = search_result
-                    if time() > lsearch.endtime:
-                        break
+                    mvs, self.scr = getPv(), search_result
+                    completed = depth
+                    if mvs:
+                        manager.iterationDone(mvs[0], self.scr,
+                                              lsearch.nodes - iternodes,
+                                              time() - iterstart)
                     if self.post:
                         pv = " ".join(listToSan(self.board, mvs))
                         time_cs = int(100 * (time()-starttime))
-                        print(depth, self.scr, time_cs, lsearch.nodes, pv)
+                        print(depth, self.scr, time_cs, self.__getNodes(), pv)
                 else:
                     # We were interrupted
                     if depth == 1:
-                        mvs, self.scr = search_result
+                        mvs, self.scr = getPv(), search_result
                     break
-                prevtime = time()-starttime - prevtime
-                
+            
+            if timed:
                 self.clock[self.playingAs] -= time() - starttime - self.increment[self.playingAs]
             
+            if self.smp:
+                # Use the deepest search completed by any of the processes
+                best = self.smp.stop()
+                if best and best[0] > completed and best[2]:
+                    completed, self.scr, mvs = best
+            
+            if self.debug:
+                print("# Hash full: %d permille" % lsearch.table.hashfull())
+                print("# Nodes: %d, of which quiescence: %d" % (lsearch.nodes, lsearch.qnodes))
+                if lsearch.egtb:
+                    print("# Tablebase probes: %d, hits: %d" % (lsearch.tbprobes, lsearch.tbhits))
+            
             if not mvs:
                 if not lsearch.searching:
                     # We were interupted
                     lsearch.nodes = 0
+                    lsearch.qnodes = 0
+                    lsearch.tbprobes = lsearch.tbhits = 0
                     return
                 
                 # This should only happen in terminal mode
@@ -159,6 +206,8 @@ class PyChess (object):
                 return
             
             lsearch.nodes = 0
+            lsearch.qnodes = 0
+            lsearch.tbprobes = lsearch.tbhits = 0
             lsearch.searching = False
         
         move = mvs[0]
@@ -171,21 +220,32 @@ class PyChess (object):
             protocol """
         
         start = time()
+        self.__setSearchOptions()
         lsearch.endtime = sys.maxsize
         lsearch.searching = True
         
+        if self.smp:
+            self.smp.start(self.board, self.sd-1, lsearch.endtime)
+        
+        scr = None
         for depth in range (1, self.sd):
             if not lsearch.searching:
                 break
             t = time()
             board = self.board.clone()
-            mvs, scr = alphaBeta (board, depth)
+            scr = aspirationSearch(board, depth, scr)
+            mvs = getPv()
             
             pv = " ".join(listToSan(board, mvs))
             time_cs = int(100 * (time() - start))
-            print("%s %s %s %s %s" % (depth, scr, time_cs, lsearch.nodes, pv))
+            print("%s %s %s %s %s" % (depth, scr, time_cs, self.__getNodes(), pv))
             
             lsearch.nodes = 0
+            lsearch.qnodes = 0
+            lsearch.tbprobes = lsearch.tbhits = 0
+        
+        if self.smp:
+            self.smp.stop()
     
 ################################################################################
 # main                                                                         #
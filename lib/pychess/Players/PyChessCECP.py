@@ -3,13 +3,16 @@ from __future__ import print_function
 from pychess.compat import raw_input
 from pychess.Players.PyChess import PyChess
 from pychess.System import conf, fident
+from pychess.System.prefix import addUserCachePrefix
 from pychess.Utils.book import getOpenings
 from pychess.Utils.const import *
-from pychess.Utils.lutils.Benchmark import benchmark
+from pychess.Utils.lutils.Benchmark import benchmark, benchmarkTable, benchmarkDepth, \
+    benchmarkMovegen, benchmarkBitboard, benchmarkEvalCache, benchmarkQuiescence
 from pychess.Utils.lutils.LBoard import LBoard
 from pychess.Utils.lutils.ldata import MAXPLY
 from pychess.Utils.lutils import lsearch, leval
-from pychess.Utils.lutils.lmove import parseSAN, parseAny, toSAN, ParsingError
+from pychess.Utils.lutils.lmove import parseSAN, parseAny, toSAN, toAN, ParsingError
+from pychess.Utils.lutils.perft import divide, perftSuite
 from pychess.Utils.lutils import lsearch
 from pychess.Utils.lutils.validator import validateMove
 import pychess
@@ -31,6 +34,17 @@ class PyChessCECP(PyChess):
 
         self.basetime = 0
         
+        # The variants the "variant" command can switch to
+        self.variants = {
+            "fischerandom": FISCHERRANDOMCHESS,
+            "crazyhouse": CRAZYHOUSECHESS,
+            "wildcastle": WILDCASTLESHUFFLECHESS,
+            "losers": LOSERSCHESS,
+            "suicide": SUICIDECHESS,
+            "atomic": ATOMICCHESS,
+            "king-of-the-hill": KINGOFTHEHILLCHESS,
+        }
+        
         self.features = {
             "ping": 1,
             "setboard": 1,
@@ -51,10 +65,17 @@ class PyChessCECP(PyChess):
             "pause": 0, # Unimplemented
             "nps": 0, # Unimplemented
             "debug": 1,
-            "memory": 0, # Unimplemented
-            "smp": 0, # Unimplemented
+            "memory": 1,
+            "smp": 1,
             "egt": "gaviota",
-            "option": "skipPruneChance -slider 0 0 100"
+            "option": ["skipPruneChance -slider 0 0 100",
+                       "persistentHash -check 0",
+                       "nullMove -check 1",
+                       "lateMoveReductions -check 1",
+                       "futilityPruning -check 1",
+                       "twoFoldInSearch -check 1",
+                       "evalCache -check 1",
+                       "quiescencePruning -check 1"]
         }
     
     def handle_sigterm(self, *args):
@@ -84,8 +105,10 @@ class PyChessCECP(PyChess):
                     pass
      
                 elif lines[0] == "protover":
-                    stringPairs = ["=".join([k, '"%s"' % v if isinstance(v, str) else str(v)]) for k,v in self.features.items()]
+                    stringPairs = ["=".join([k, '"%s"' % v if isinstance(v, str) else str(v)]) for k,v in self.features.items() if k != "option"]
                     print("feature %s" % " ".join(stringPairs))
+                    for option in self.features["option"]:
+                        print('feature option="%s"' % option)
                     print("feature done=1")
                 
                 elif lines[0] in ("accepted", "rejected"):
@@ -95,6 +118,8 @@ class PyChessCECP(PyChess):
      
                 elif lines[0] == "new":
                     self.__stopSearching()
+                    if self.board.variant != NORMALCHESS:
+                        lsearch.evalTable.clear()
                     self.board = LBoard(NORMALCHESS)
                     self.board.applyFen(FEN_START)
                     self.forced = False
@@ -106,23 +131,16 @@ class PyChessCECP(PyChess):
                         self.__analyze()
                 
                 elif lines[0] == "variant":
-                    if len(lines) > 1:
-                        if lines[1] == "fischerandom":
-                            self.board.variant = FISCHERRANDOMCHESS
-                        elif lines[1] == "crazyhouse":
-                            self.board.variant = CRAZYHOUSECHESS
-                            self.board.iniHouse()
-                        elif lines[1] == "wildcastle":
-                            self.board.variant = WILDCASTLESHUFFLECHESS
-                        elif lines[1] == "losers":
-                            self.board.variant = LOSERSCHESS
-                        elif lines[1] == "suicide":
-                            self.board.variant = SUICIDECHESS
-                        elif lines[1] == "atomic":
-                            self.board.variant = ATOMICCHESS
-                            self.board.iniAtomic()
-                        elif lines[1] == "king-of-the-hill":
-                            self.board.variant = KINGOFTHEHILLCHESS
+                    if len(lines) > 1 and lines[1] in self.variants:
+                        variant = self.variants[lines[1]]
+                        if variant != self.board.variant:
+                            # Evaluations differ by variant
+                            lsearch.evalTable.clear()
+                        # The board keeps material by the piece values of its
+                        # variant, so it has to be set up anew
+                        fen = self.board.asFen()
+                        self.board = LBoard(variant)
+                        self.board.applyFen(fen)
                 
                 elif lines[0] == "quit":
                     self.forced = True
@@ -276,12 +294,17 @@ class PyChessCECP(PyChess):
                         if limit < 1:
                             print("Error (limit too low):", line)
                         else:
-                            pass
-                            # TODO implement
-                            #lsearch.setHashSize(limit)
+                            self.setHashSize(limit)
      
                 elif lines[0] == "cores":
-                    pass # We aren't SMP-capable.
+                    if lsearch.searching:
+                        print("Error (already searching):", line)
+                    else:
+                        cores = int(lines[1])
+                        if cores < 1:
+                            print("Error (cores too low):", line)
+                        else:
+                            self.setCores(cores)
      
                 elif lines[0] == "egtpath":
                     if len(lines) >= 3 and lines[1] == "gaviota":
@@ -297,6 +320,16 @@ class PyChessCECP(PyChess):
                             self.skipPruneChance = value / 100.0
                         else:
                             print("Error (argument must be an integer 0..100):", line)
+                    elif name in ("nullMove", "lateMoveReductions", "futilityPruning",
+                                  "twoFoldInSearch", "evalCache", "quiescencePruning"):
+                        setattr(self, name, bool(value))
+                    elif name == "persistentHash":
+                        if lsearch.searching:
+                            print("Error (already searching):", line)
+                        elif value:
+                            self.setHashFile(addUserCachePrefix("engine_hash.bin"))
+                        else:
+                            self.setHashFile(None)
      
                 ########## CECP analyze mode commands ##########
                 # See http://www.gnu.org/software/xboard/engine-intf.html#11
@@ -311,7 +344,29 @@ class PyChessCECP(PyChess):
                 ########## Custom commands ##########
      
                 elif lines[0] == "benchmark":
-                    benchmark()
+                    if len(lines) > 1 and lines[1] == "table":
+                        benchmarkTable()
+                    elif len(lines) > 1 and lines[1] == "movegen":
+                        benchmarkMovegen()
+                    elif len(lines) > 1 and lines[1] == "bitboard":
+                        benchmarkBitboard()
+                    elif len(lines) > 1 and lines[1] == "eval":
+                        benchmarkEvalCache()
+                    elif len(lines) > 1 and lines[1] == "quiescence":
+                        benchmarkQuiescence()
+                    elif len(lines) > 1 and lines[1] in ("depth", "nodes"):
+                        # benchmark depth [seconds] or benchmark nodes [count]
+                        try:
+                            limit = int(lines[2]) if len(lines) > 2 else None
+                        except ValueError:
+                            print("Error (argument must be an integer):", line)
+                        else:
+                            if lines[1] == "depth":
+                                benchmarkDepth(movetime=limit)
+                            else:
+                                benchmarkDepth(nodecount=limit or 100000)
+                    else:
+                        benchmark()
                 
                 elif lines[0] == "profile":
                     if len(lines) > 1:
@@ -320,6 +375,31 @@ class PyChessCECP(PyChess):
                     else:
                         print("Usage: profile outputfilename")
                 
+                elif lines[0] == "pawnhash":
+                    # pawnhash [reset]
+                    if len(lines) > 1 and lines[1] == "reset":
+                        leval.resetPawnStats()
+                    else:
+                        size, hits, misses, collisions, full = leval.getPawnStats()
+                        probes = hits + misses
+                        print("# Pawn hash: %d kB, %d permille full" % (size // 1024, full))
+                        print("# Probes: %d, hits: %d (%.1f%%), misses: %d, collisions: %d" % \
+                              (probes, hits, hits * 100.0 / max(probes, 1), misses, collisions))
+
+                elif lines[0] == "perft":
+                    if len(lines) > 1:
+                        try:
+                            depth = int(lines[1])
+                        except ValueError:
+                            print("Usage: perft [depth]")
+                            continue
+                        moves = divide(self.board, depth)
+                        for move, nodes in moves:
+                            print(toAN(self.board, move), nodes)
+                        print("Nodes:", sum(nodes for move, nodes in moves))
+                    else:
+                        perftSuite()
+                
                 elif len(lines) == 1:
                     # A GUI without usermove support might try to send a move.
                     try:
@@ -3,7 +3,7 @@ from __future__ import print_function
 
 import collections
 from copy import copy
-from threading import RLock, Thread
+from threading import RLock, Thread, current_thread
 
 from pychess.compat import Queue
 from pychess.Utils.Move import *
@@ -21,11 +21,9 @@ from pychess.System.SubProcess import TimeOutError, SubProcessError
 from pychess.Variants.fischerandom import FischerRandomChess
 
 from .ProtocolEngine import ProtocolEngine
+from .engineParsers import parseUCIOption, parseUCIInfo, coalesceAnalysisLines
 from pychess.Players.Player import Player, PlayerIsDead, TurnInterrupt
 
-TYPEDIC = {"check":lambda x:x=="true", "spin":int}
-OPTKEYS = ("name", "type", "min", "max", "default", "var")
-
 class UCIEngine (ProtocolEngine):
     
     def __init__ (self, subprocess, color, protover, md5):
@@ -58,6 +56,8 @@ class UCIEngine (ProtocolEngine):
         self.uciPosition = "startpos"
         self.uciPositionListsMoves = False
         self.analysis = [ None ]
+        # Set by newGame until the engine has answered its 'isready'
+        self.resetting = False
         
         self.returnQueue = Queue()
         self.engine.connect("line", self.parseLines)
@@ -78,6 +78,7 @@ class UCIEngine (ProtocolEngine):
         print("uci", file=self.engine)
     
     def start (self):
+        self.gameThread = current_thread()
         if self.mode in (ANALYZING, INVERSE_ANALYZING):
             t = Thread(target=self.__startBlocking,
                        name=fident(self.__startBlocking))
@@ -127,6 +128,8 @@ class UCIEngine (ProtocolEngine):
     #===========================================================================
     
     def end (self, status, reason):
+        if self.connected and self.pool is not None and self.pool.release(self, status):
+            return
         # UCI doens't care about reason, so we just kill
         self.kill(reason)
     
@@ -155,7 +158,49 @@ class UCIEngine (ProtocolEngine):
             finally:
                 # Clear the analyzed data, if any
                 self.emit("analyze", [])
-    
+
+    #===========================================================================
+    #    Reusing the engine
+    #===========================================================================
+
+    def finish (self, status):
+        """ Stops the engine, like end, but leaves it running, so it can play
+            another game after newGame. A game thread waiting for a move from
+            the engine is let go. """
+        if self.connected:
+            # The game paused the engine when it ended
+            self.engine.resume()
+            print("stop", file=self.engine)
+            self.returnQueue.put("del")
+            self.emit("analyze", [])
+
+    def newGame (self, color):
+        """ Readies a finished engine for a new game as color. The options sent
+            to the engine are kept. The thread of the last game must have
+            returned, as it is sharing the state reset here. """
+        with self.moveLock:
+            self.color = color
+            self.pondermove = None
+            self.ignoreNext = False
+            self.waitingForMove = False
+            self.needBestmove = False
+            self.readyForStop = False
+            self.commands.clear()
+            self.gameBoard = Board(setup=True)
+            self.board = Board(setup=True)
+            self.uciPosition = "startpos"
+            self.uciPositionListsMoves = False
+            self.analysis = [ None ]
+            self.readyMoves = False
+            self.resetting = True
+            self.returnQueue = Queue()
+
+        # The answer comes after the bestmove of any search still running. It
+        # emits 'readyForOptions' again, so whoever is given the engine can
+        # set it up like a new one, and the 'readyok' to the options sent then
+        # makes __onReadyForMoves send 'ucinewgame' and let start return
+        print("isready", file=self.engine)
+
     #===========================================================================
     #    Send the player move updates
     #===========================================================================
@@ -480,6 +525,8 @@ class UCIEngine (ProtocolEngine):
     #===========================================================================
     
     def parseLines (self, engine, lines):
+        if self.mode != NORMAL and len(lines) > 1:
+            lines = coalesceAnalysisLines(lines)
         for line in lines:
             self.__parseLine(line)
     
@@ -500,32 +547,16 @@ class UCIEngine (ProtocolEngine):
             return
         
         if parts[0] == "readyok":
-            self.emit("readyForMoves")
+            if self.resetting:
+                self.resetting = False
+                self.emit("readyForOptions")
+            else:
+                self.emit("readyForMoves")
             return
         
         #------------------------------------------------------- Options parsing
         if parts[0] == "option":
-            dic = {}
-            last = 1
-            varlist = []
-            for i in range (2, len(parts)+1):
-                if i == len(parts) or parts[i] in OPTKEYS:
-                    key = parts[last]
-                    value = " ".join(parts[last+1:i])
-                    if "type" in dic and dic["type"] in TYPEDIC:
-                        value = TYPEDIC[dic["type"]](value)
-                        
-                    if key == "var":
-                        varlist.append(value)
-                    elif key == "type" and value == "string":
-                        dic[key] = "text"
-                    else:
-                        dic[key] = value
-                        
-                    last = i
-            if varlist:
-                dic["choices"] = varlist
-            
+            dic = parseUCIOption(parts)
             self.options[dic["name"]] = dic
             return
         
@@ -591,21 +622,7 @@ class UCIEngine (ProtocolEngine):
         
         #----------------------------------------------------------- An Analysis
         if self.mode != NORMAL and parts[0] == "info" and "pv" in parts:
-            multipv = 1
-            if "multipv" in parts:
-                multipv = int(parts[parts.index("multipv")+1])
-            scoretype = parts[parts.index("score")+1]
-            if scoretype in ('lowerbound', 'upperbound'):
-                score = None
-            else:
-                score = int(parts[parts.index("score")+2])
-                if scoretype == 'mate':
-#                    print >> self.engine, "stop"
-                    if score != 0:
-                        sign = score/abs(score)
-                        score = sign*MATE_VALUE
-            
-            movstrs = parts[parts.index("pv")+1:]
+            multipv, depth, score, movstrs = parseUCIInfo(parts)
             try:
                 moves = listToMoves (self.board, movstrs, AN, validate=True, ignoreErrors=False)
             except ParsingError as e:
@@ -615,11 +632,6 @@ class UCIEngine (ProtocolEngine):
                     (' '.join(movstrs),e), extra={"task":self.defname})
                 return
 
-            if "depth" in parts:
-                depth = parts[parts.index("depth")+1]
-            else:
-                depth = ""
-                
             if multipv <= len(self.analysis):
                 self.analysis[multipv - 1] = (moves, score, depth)
 
@@ -3,9 +3,11 @@ from __future__ import print_function
 import os
 import sys
 import json
+import time
 from functools import partial
 from hashlib import md5
-from threading import Thread
+from threading import Thread, Timer, RLock
+from multiprocessing import cpu_count
 from os.path import join, dirname, abspath
 from copy import deepcopy
 
@@ -18,8 +20,10 @@ from pychess.System.SubProcess import SubProcess, searchPath, SubProcessError
 from pychess.System.prefix import addUserConfigPrefix, getEngineDataPrefix
 from pychess.Players.Player import PlayerIsDead
 from pychess.Utils.const import *
+from pychess.compat import Queue, Empty
 from .CECPEngine import CECPEngine
 from .UCIEngine import UCIEngine
+from .EnginePool import EnginePool
 from pychess.Variants import variants
 
 attrToProtocol = {"uci": UCIEngine, "xboard": CECPEngine}
@@ -56,13 +60,29 @@ backup = [
 ]
 
 
+# The seconds an engine may take to tell its features when discovered
+DISCOVERY_TIME_OUT = 60
+
+def getDiscoveryConcurrency():
+    """ The most engines to discover at once """
+    try:
+        return conf.get("discovery_concurrency", 0) or cpu_count()
+    except NotImplementedError:
+        return 2
+
 def md5_sum(filename):
     with open(filename, mode='rb') as f:
         d = md5()
-        for buf in iter(partial(f.read, 4096), b''):
+        for buf in iter(partial(f.read, 65536), b''):
             d.update(buf)
     return d.hexdigest()
 
+def file_stat(filename):
+    """ The size, modification time and inode of a file, which will be the
+        same as long as the file hasn't been changed """
+    st = os.stat(filename)
+    return [st.st_size, st.st_mtime, st.st_ino]
+
 
 class EngineDiscoverer (GObject.GObject):
     
@@ -167,20 +187,37 @@ class EngineDiscoverer (GObject.GObject):
         
         return engine
     
-    def __discoverE (self, engine):       
-        subproc = self.initEngine (engine, BLACK)       
-        try:                
-            subproc.connect('readyForOptions', self.__discoverE2, engine)            
-            subproc.prestart() # Sends the 'start line'         
-            subproc.start()           
+    def __discoverE (self, engine):
+        """ Starts the engine to learn its features and options. Returns when
+            the engine has been discovered or has failed """
+        try:
+            subproc = self.initEngine (engine, BLACK)
+        except SubProcessError as e:
+            log.warning("Engine %s failed discovery: %s" % (engine["name"],e))
+            self.__report(engine, False)
+            return
+        # A hanging engine mustn't hold up the rest of the discovery
+        timer = Timer(DISCOVERY_TIME_OUT, self.__discoverTimeOut, (subproc, engine))
+        timer.daemon = True
+        try:
+            subproc.connect('readyForOptions', self.__discoverE2, engine)
+            timer.start()
+            subproc.prestart() # Sends the 'start line'
+            subproc.start()
         except SubProcessError as e:
             log.warning("Engine %s failed discovery: %s" % (engine["name"],e))
-            self.emit("engine_failed", engine["name"], engine)
+            self.__report(engine, False)
         except PlayerIsDead as e:
             # Check if the player died after engine_discovered by our own hands
             if not self.toBeRechecked[engine["name"]][1]:
                 log.warning("Engine %s failed discovery: %s" % (engine["name"],e))
-                self.emit("engine_failed", engine["name"], engine)
+                self.__report(engine, False)
+        finally:
+            timer.cancel()
+        # The engine has been reported by now, unless it misbehaved
+        if not self.toBeRechecked[engine["name"]][1]:
+            subproc.kill(UNKNOWN_REASON)
+            self.__report(engine, False)
     
     def __discoverE2 (self, subproc, engine):
         if engine.get("protocol") == "uci":
@@ -192,12 +229,30 @@ class EngineDiscoverer (GObject.GObject):
         exitcode = subproc.kill(UNKNOWN_REASON)
         if exitcode:
             log.debug("Engine failed %s" % engine["name"])
-            self.emit("engine_failed", engine['name'], engine)
+            self.__report(engine, False)
             return
         
         engine['recheck'] = False
         log.debug("Engine finished %s" % engine["name"])
-        self.emit ("engine_discovered", engine['name'], engine)
+        self.__report(engine, True)
+    
+    def __discoverTimeOut (self, subproc, engine):
+        if not self.toBeRechecked[engine["name"]][1]:
+            log.warning("Engine %s failed discovery: No answer in %d seconds" % \
+                        (engine["name"], DISCOVERY_TIME_OUT))
+            self.__report(engine, False)
+        subproc.kill(UNKNOWN_REASON)
+    
+    def __report (self, engine, wentwell):
+        """ Emits engine_discovered or engine_failed, only once for an engine """
+        with self.reportLock:
+            if self.toBeRechecked[engine["name"]][1]:
+                return
+            self.toBeRechecked[engine["name"]][1] = True
+        if wentwell:
+            self.emit("engine_discovered", engine['name'], engine)
+        else:
+            self.emit("engine_failed", engine['name'], engine)
     
     
     ############################################################################
@@ -206,7 +261,9 @@ class EngineDiscoverer (GObject.GObject):
     
     def __needClean(self, rundata, engine):
         """ Check if the filename or md5sum of the engine has changed.
-            In that case we need to clean the engine """
+            In that case we need to clean the engine. The md5sum is only
+            computed if the size, modification time or inode of the file
+            have changed since the last time. """
         
         vmpath, path = rundata
         
@@ -221,10 +278,17 @@ class EngineDiscoverer (GObject.GObject):
         if engine.get("md5") is None:
             return True
         
+        stat = file_stat(path)
+        if engine.get("stat") == stat:
+            return False
+        
         md5sum = md5_sum(path)
         if engine.get("md5") != md5sum:
             return True
         
+        # The file was touched or copied, but it is the same engine
+        engine['stat'] = stat
+        self.changed = True
         return False
     
     def __clean(self, rundata, engine):
@@ -234,6 +298,7 @@ class EngineDiscoverer (GObject.GObject):
         
         vmpath, path = rundata
         
+        stat = file_stat(path)
         md5sum = md5_sum(path)
         
         ######
@@ -252,12 +317,14 @@ class EngineDiscoverer (GObject.GObject):
         ######
         engine['command'] = path
         engine['md5'] = md5sum
+        engine['stat'] = stat
         if vmpath is not None:
             engine['vm_command'] = vmpath
         if "variants" in engine:
             del engine["variants"]
         if "options" in engine:
             del engine["options"]
+        self.changed = True
         
     ######
     # Save the xml
@@ -283,8 +350,10 @@ class EngineDiscoverer (GObject.GObject):
         d = Discoverer(self)
         d.start()
         
-    def do_discover(self):       
+    def do_discover(self):
+        started = time.time()
         self.engines = []
+        self.changed = False
         # List available engines
         for engine in self._engines:
             # Find the known and installed engines on the system
@@ -295,31 +364,47 @@ class EngineDiscoverer (GObject.GObject):
                 # Engine is not available on the system
                 continue
             
-            if self.__needClean(rundata, engine):
-                self.__clean(rundata, engine)
-                engine['recheck'] = True
+            try:
+                if self.__needClean(rundata, engine):
+                    self.__clean(rundata, engine)
+                    engine['recheck'] = True
+            except (IOError, OSError) as e:
+                log.warning("engineNest: Couldn't read %s: %s" % (rundata[1], e))
+                continue
             
             self.engines.append(engine)       
         ######
         # Runs all the engines in toBeRechecked, in order to gather information
         ######
-        self.toBeRechecked = dict((c["name"],[c,False]) for c in self._engines if c.get('recheck'))
-        
-        def count(self_, name, engine, wentwell):
-            if wentwell:
-                self.toBeRechecked[name][1] = True
-            if all([elem[1] for elem in self.toBeRechecked.values()]):
-                self.engines.sort(key=lambda x: x["name"])
-                self.emit("all_engines_discovered")
-        self.connect("engine_discovered", count, True)
-        self.connect("engine_failed", count, False)       
-        if self.toBeRechecked:          
+        self.toBeRechecked = dict((c["name"],[c,False]) for c in self.engines if c.get('recheck'))
+        self.reportLock = RLock()
+        if self.toBeRechecked:
             self.emit("discovering_started", self.toBeRechecked.keys())
-            self.connect("all_engines_discovered", self.save)
-            for engine, need in self.toBeRechecked.values():              
-                self.__discoverE(engine)               
-        else:          
-            self.emit("all_engines_discovered")       
+            
+            queue = Queue()
+            for engine, reported in self.toBeRechecked.values():
+                queue.put(engine)
+            def work():
+                while True:
+                    try:
+                        engine = queue.get_nowait()
+                    except Empty:
+                        return
+                    self.__discoverE(engine)
+            workers = [Thread(target=work, name=fident(work))
+                       for i in range(min(getDiscoveryConcurrency(), len(self.toBeRechecked)))]
+            for worker in workers:
+                worker.daemon = True
+                worker.start()
+            for worker in workers:
+                worker.join()
+        
+        self.engines.sort(key=lambda x: x["name"])
+        log.info("engineNest: Found %d engines in %.2f seconds, %d of them were started" % \
+                 (len(self.engines), time.time()-started, len(self.toBeRechecked)))
+        self.emit("all_engines_discovered")
+        if self.changed or self.toBeRechecked:
+            self.save()
 
     ############################################################################
     # Interaction                                                              #
@@ -421,25 +506,43 @@ class EngineDiscoverer (GObject.GObject):
         
         return engine_proc
     
+    def getPoolKey (self, engine, *options):
+        """ Engines are only reused for games wanting the same engine, with
+            the same user options and the same options passed here """
+        return (engine["name"], engine.get("md5"),
+                json.dumps(engine.get("options"), sort_keys=True)) + options
+
     def initPlayerEngine (self, engine, color, diffi, variant, secs=0, incr=0, forcePonderOff=False):
-        engine = self.initEngine (engine, color)
+        key = self.getPoolKey(engine, NORMAL, diffi, variant, secs, incr, forcePonderOff)
+        engine_proc = pool.acquire(key, color)
+        if engine_proc is not None:
+            return engine_proc
+
+        engine_proc = self.initEngine (engine, color)
         def optionsCallback (engine):
             engine.setOptionStrength(diffi, forcePonderOff)
             engine.setOptionVariant(variant)
             if secs > 0:
                 engine.setOptionTime(secs, incr)
-        engine.connect("readyForOptions", optionsCallback)
-        engine.prestart()
-        return engine
+        engine_proc.connect("readyForOptions", optionsCallback)
+        engine_proc.prestart()
+        pool.register(engine_proc, key)
+        return engine_proc
     
     def initAnalyzerEngine (self, engine, mode, variant):
-        engine = self.initEngine (engine, WHITE)
+        key = self.getPoolKey(engine, mode, variant)
+        engine_proc = pool.acquire(key, WHITE)
+        if engine_proc is not None:
+            return engine_proc
+
+        engine_proc = self.initEngine (engine, WHITE)
         def optionsCallback (engine):
             engine.setOptionAnalyzing(mode)
             engine.setOptionVariant(variant)
-        engine.connect("readyForOptions", optionsCallback)
-        engine.prestart()
-        return engine
+        engine_proc.connect("readyForOptions", optionsCallback)
+        engine_proc.prestart()
+        pool.register(engine_proc, key)
+        return engine_proc
 
     def addEngine(self, name, new_engine, protocol):
         engine = {"name": name,
@@ -458,6 +561,7 @@ class EngineDiscoverer (GObject.GObject):
         del self._engines[index]
 
 discoverer = EngineDiscoverer()
+pool = EnginePool()
 
 def init_engine (analyzer_type, gamemodel, force=False):
     """
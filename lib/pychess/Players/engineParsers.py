@@ -0,0 +1,238 @@
+""" Parsers for the lines CECP and UCI engines write. They only deal with
+    text, and don't need GTK, so they are shared by the GTK engine players and
+    the asyncio engine driver. """
+
+from __future__ import absolute_import
+
+import re
+
+from pychess.Utils.lutils.ldata import MATE_VALUE
+
+#===============================================================================
+#    CECP
+#===============================================================================
+
+movere = re.compile(r"""
+    (                   # group start
+    (?:                 # non grouping parenthesis start
+    [PKQRBN]?            # piece
+    [a-h]?[1-8]?        # unambiguous column or line
+    x?                  # capture
+    @?                  # drop
+    [a-h][1-8]          # destination square
+    =?[QRBN]?           # promotion
+    |O\-O(?:\-O)?       # castling
+    |0\-0(?:\-0)?       # castling
+    )                   # non grouping parenthesis end
+    [+#]?               # check/mate
+    )                   # group end
+    \s*                 # any whitespace
+    """, re.VERBOSE)
+
+d_plus_dot_expr = re.compile(r"\d+\.")
+
+anare = re.compile("""
+    ^                        # beginning of string
+    (\s*                     #
+    \d+ [+\-\.]?             # The ply analyzed. Some engines end it with a dot, minus or plus
+    \s+)                     #
+    (-?Mat\s*\d+ | [+\-\d\.]+) # The score found in centipawns.
+                             #   Mat1 is used by gnuchess to specify mate in one.
+                             #   otherwise we should support a signed float
+    \s+                      #
+    [\d\.]+                  # The time used in seconds
+    \s+                      #
+    [\d\.]+                  # Number of nodes visited
+    \s+                      #
+    (.+)                     # The Principal-Variation. With or without move numbers
+    \s*                      #
+    $                        # end of string
+    """, re.VERBOSE)
+
+#anare = re.compile("\(d+)\.?\s+ (Mat\d+|[-\d\.]+) \s+ \d+\s+\d+\s+((?:%s\s*)+)" % mov)
+
+whitespaces = re.compile(r"\s+")
+
+def parseCECPMove (parts):
+    """ The move in a line split into parts, or None if it isn't a move """
+    if parts[0] == "move":
+        return parts[1]
+    # Old Variation
+    if d_plus_dot_expr.match(parts[0]) and parts[1:2] == ["..."]:
+        return parts[2]
+    return None
+
+def parseCECPAnalysis (line):
+    """ Returns (depth, score, movestrings) for a line of thinking output, or
+        None if the line isn't one """
+    match = anare.match(line)
+    if not match:
+        return None
+    depth, score, moves = match.groups()
+
+    if "mat" in score.lower() or "#" in moves:
+        # Will look either like -Mat 3 or Mat3
+        scoreval = MATE_VALUE
+        if score.startswith('-'):
+            scoreval = -scoreval
+    else:
+        scoreval = int(score)
+
+    return depth.strip(), scoreval, movere.findall(moves)
+
+def parseCECPFeatures (parts):
+    """ Yields the (key, value) pairs of a feature line split into parts.
+        Quoted values are unquoted, and numbers are made ints. """
+    # We skip parts before 'feature', as some engines give us lines like
+    # White (1) : feature setboard=1 analyze...e="GNU Chess 5.07" done=1
+    parts = parts[parts.index("feature"):]
+    for i, pair in enumerate(parts[1:]):
+
+        # As "parts" is split with no thoughs on quotes or double quotes
+        # we need to do some extra handling.
+
+        if pair.find("=") < 0:
+            continue
+        key, value = pair.split("=",1)
+
+        if value.startswith('"') and value.endswith('"'):
+            value = value[1:-1]
+
+        # If our pair was unfinished, like myname="GNU, we search the
+        # rest of the pairs for a quotating mark.
+        elif value[0:1] == '"':
+            rest = value[1:] + " " + " ".join(parts[2+i:])
+            j = rest.find('"')
+            if j == -1:
+                value = rest
+            else:
+                value = rest[:j]
+
+        elif value.isdigit():
+            value = int(value)
+
+        yield key, value
+
+def parseCECPOption (option):
+    """ The option dict of the value of an option feature """
+    if " -check " in option:
+        name, value = option.split(" -check ")
+        return {"type": "check", "name": name, "default": bool(int(value))}
+    elif " -spin " in option:
+        name, value = option.split(" -spin ")
+        defv, minv, maxv = value.split()
+        return {"type": "spin", "name": name, "default": int(defv), "min": int(minv), "max": int(maxv)}
+    elif " -slider " in option:
+        name, value = option.split(" -slider ")
+        defv, minv, maxv = value.split()
+        return {"type": "spin", "name": name, "default": int(defv), "min": int(minv), "max": int(maxv)}
+    elif " -string " in option:
+        name, value = option.split(" -string ")
+        return {"type": "text", "name": name, "default": value}
+    elif " -file " in option:
+        name, value = option.split(" -file ")
+        return {"type": "text", "name": name, "default": value}
+    elif " -path " in option:
+        name, value = option.split(" -path ")
+        return {"type": "text", "name": name, "default": value}
+    elif " -combo " in option:
+        name, value = option.split(" -combo ")
+        choices = list(map(str.strip, value.split("///")))
+        default = ""
+        for choice in choices:
+            if choice.startswith("*"):
+                index = choices.index(choice)
+                default = choice[1:]
+                choices[index] = default
+                break
+        return {"type": "combo", "name": name, "default": default, "choices": choices}
+    elif " -button" in option:
+        pos = option.find(" -button")
+        return {"type": "button", "name": option[:pos]}
+    elif " -save" in option:
+        pos = option.find(" -save")
+        return {"type": "button", "name": option[:pos]}
+    elif " -reset" in option:
+        pos = option.find(" -reset")
+        return {"type": "button", "name": option[:pos]}
+
+#===============================================================================
+#    UCI
+#===============================================================================
+
+TYPEDIC = {"check":lambda x:x=="true", "spin":int}
+OPTKEYS = ("name", "type", "min", "max", "default", "var")
+
+def parseUCIOption (parts):
+    """ The option dict of an 'option name ...' line split into parts """
+    dic = {}
+    last = 1
+    varlist = []
+    for i in range (2, len(parts)+1):
+        if i == len(parts) or parts[i] in OPTKEYS:
+            key = parts[last]
+            value = " ".join(parts[last+1:i])
+            if "type" in dic and dic["type"] in TYPEDIC:
+                value = TYPEDIC[dic["type"]](value)
+
+            if key == "var":
+                varlist.append(value)
+            elif key == "type" and value == "string":
+                dic[key] = "text"
+            else:
+                dic[key] = value
+
+            last = i
+    if varlist:
+        dic["choices"] = varlist
+    return dic
+
+def parseUCIInfo (parts):
+    """ Returns (multipv, depth, score, movestrings) for an 'info ... pv' line
+        split into parts, or None if the line has no pv. The score is None
+        when it is only a bound. """
+    if parts[:1] != ["info"] or "pv" not in parts:
+        return None
+    multipv = 1
+    if "multipv" in parts:
+        multipv = int(parts[parts.index("multipv")+1])
+    scoretype = parts[parts.index("score")+1]
+    if scoretype in ('lowerbound', 'upperbound'):
+        score = None
+    else:
+        score = int(parts[parts.index("score")+2])
+        if scoretype == 'mate':
+            if score != 0:
+                sign = score/abs(score)
+                score = sign*MATE_VALUE
+
+    if "depth" in parts:
+        depth = parts[parts.index("depth")+1]
+    else:
+        depth = ""
+
+    return multipv, depth, score, parts[parts.index("pv")+1:]
+
+def coalesceAnalysisLines (lines):
+    """ Leaves out the 'info ... pv' lines which are followed by a newer one
+        for the same multipv, with nothing but info lines in between. Strong
+        engines print far more of them than can be parsed and shown. """
+    kept = []
+    latest = {} # multipv -> index in kept
+    for line in lines:
+        parts = line.split()
+        if parts[:1] == ["info"]:
+            if "pv" in parts:
+                try:
+                    multipv = parts[parts.index("multipv")+1] if "multipv" in parts else "1"
+                except IndexError:
+                    multipv = None
+                if multipv is not None:
+                    if multipv in latest:
+                        kept[latest[multipv]] = None
+                    latest[multipv] = len(kept)
+        else:
+            # Anything else may change what the info lines are about
+            latest = {}
+        kept.append(line)
+    return [line for line in kept if line is not None]
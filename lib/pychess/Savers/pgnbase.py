@@ -254,8 +254,10 @@ class PgnBase(ChessFile):
 
 tagre = re.compile(r"\[([a-zA-Z]+)[ \t]+['\"](.*?)['\"]\]")
 
-def pgn_load(file, klass=PgnBase):
-    files = []
+def pgn_iter(file):
+    """ Yields the [tags, movetext] of each game in file. Use this rather than
+        pgn_load to read big files without keeping all their games in memory. """
+    game = None
     inTags = False
 
     for line in file:
@@ -266,23 +268,31 @@ def pgn_load(file, klass=PgnBase):
         if line.startswith("["):
             if tagre.match(line) is not None:
                 if not inTags:
-                    files.append(["",""])
+                    if game is not None:
+                        yield game
+                    game = ["",""]
                     inTags = True
-                files[-1][0] += line
+                game[0] += line
             else:
                 if not inTags:
-                    files[-1][1] += line
+                    if game is None:
+                        game = ["",""]
+                    game[1] += line
                 else:
                     print("Warning: ignored invalid tag pair %s" % line)
         else:
             inTags = False
-            if not files:
+            if game is None:
                 # In rare cases there might not be any tags at all. It's not
                 # legal, but we support it anyways.
-                files.append(["",""])
-            files[-1][1] += line
-                
-    return klass(files)
+                game = ["",""]
+            game[1] += line
+
+    if game is not None:
+        yield game
+
+def pgn_load(file, klass=PgnBase):
+    return klass(list(pgn_iter(file)))
 
 
 nag2symbolDict = {
@@ -18,9 +18,11 @@ class Publisher (Thread):
         and you want to process these results in gtk as soon as possible.
         While waiting for gdk access, results will be stored, and depending on
         the send policy, either the entire list, or only the last item will be
-        sent as an argument to the function specified in the __init__ """
+        sent as an argument to the function specified in the __init__.
+        With SEND_JOINED the results are lists, which are sent joined into one
+        list. """
     
-    SEND_LIST, SEND_LAST = range(2)
+    SEND_LIST, SEND_LAST, SEND_JOINED = range(3)
     
     def __init__ (self, func, thread_namer, sendPolicy):
         Thread.__init__(self, name=get_threadname(thread_namer))      
@@ -52,6 +54,8 @@ class Publisher (Thread):
                     self.func(l)
                 elif self.sendPolicy == self.SEND_LAST:
                     self.func(l[-1])
+                elif self.sendPolicy == self.SEND_JOINED:
+                    self.func([item for items in l for item in items])
             finally:
                 glock.release()
 
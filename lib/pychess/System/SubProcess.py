@@ -7,12 +7,15 @@ import sys
 import signal
 import errno
 import time
+import codecs
+import logging
 import threading
 from threading import Thread
 
 from pychess.Utils.const import *
 from pychess.System.GtkWorker import EmitPublisher
 from pychess.System import fident
+from pychess.compat import PY3
 from .Log import log
 from .which import which
 
@@ -20,6 +23,9 @@ import traceback
 class SubProcessError (Exception): pass
 class TimeOutError (Exception): pass
 
+# The most bytes read from the engine at a time
+READ_SIZE = 65536
+
 def searchPath (file, access=os.R_OK, altpath=None):
     if altpath and os.path.isfile(altpath):
         if not os.access (altpath, access):
@@ -54,10 +60,14 @@ class SubProcess (GObject.GObject):
         self.args = args
         self.warnwords = warnwords
         self.env = env or os.environ
-        self.buffer = ""
+        # The unfinished last line read from stdout and stderr
+        self.buffers = {False: "", True: ""}
+        if PY3:
+            self.decoders = {False: codecs.getincrementaldecoder("utf-8")("replace"),
+                             True: codecs.getincrementaldecoder("utf-8")("replace")}
         
         self.linePublisher = EmitPublisher(self, "line",
-            'SubProcess.linePublisher', EmitPublisher.SEND_LIST)        
+            'SubProcess.linePublisher', EmitPublisher.SEND_JOINED)
        
         self.linePublisher.start()        
        
@@ -114,6 +124,8 @@ class SubProcess (GObject.GObject):
 
         for tag in self.__channelTags:
             GObject.source_remove(tag)
+        for isstderr in (False, True):
+            self.__flush(isstderr)
         for channel in (self.inChannel, self.outChannel, self.errChannel):
             try:
                 channel.close()
@@ -136,25 +148,66 @@ class SubProcess (GObject.GObject):
             self.gentleKill()
     
     def __io_cb (self, channel, condition, isstderr):
-        while True:
-            try:
-                line = channel.next()#readline()
-            except StopIteration:
-                # fix for pygi
-                #return False
-                return True
-            if not line:
-                return True
-            if isstderr:
-                log.error(line, extra={"task":self.defname})
+        """ Reads what the engine has written in one go, and passes on the
+            finished lines as a single list """
+        try:
+            if sys.platform == "win32":
+                # There are no unix file descriptors behind win32 channels
+                data = channel.read(READ_SIZE)
             else:
-                for word in self.warnwords:
-                    if word in line:
-                        log.warning(line, extra={"task":self.defname})
-                        break
-                else: log.debug(line.rstrip(), extra={"task":self.defname})
-            
-            self.linePublisher.put(line)
+                data = os.read(channel.unix_get_fd(), READ_SIZE)
+        except OSError as e:
+            if e.errno not in (errno.EAGAIN, errno.EINTR):
+                log.error("SubProcess.__io_cb: %s" % e, extra={"task":self.defname})
+            return True
+        except GObject.GError as e:
+            log.error("SubProcess.__io_cb: %s" % e, extra={"task":self.defname})
+            return True
+        if not data:
+            # The engine has closed its end, so the last line is finished
+            self.__flush(isstderr)
+            return True
+        if PY3:
+            data = self.decoders[isstderr].decode(data)
+        
+        lines = (self.buffers[isstderr] + data).splitlines(True)
+        if lines and not lines[-1].endswith("\n"):
+            self.buffers[isstderr] = lines.pop()
+        else:
+            self.buffers[isstderr] = ""
+        self.__passOn(lines, isstderr)
+        return True
+    
+    def __flush (self, isstderr):
+        """ Passes on what is left of an unfinished last line """
+        rest = self.buffers[isstderr]
+        if PY3:
+            rest += self.decoders[isstderr].decode(b"", True)
+        self.buffers[isstderr] = ""
+        if rest:
+            self.__passOn([rest], isstderr)
+    
+    def __passOn (self, lines, isstderr):
+        if not lines:
+            return
+        
+        if isstderr:
+            for line in lines:
+                log.error(line, extra={"task":self.defname})
+        else:
+            # Scanning and logging line by line only when it is needed
+            chunk = "".join(lines)
+            if any(word in chunk for word in self.warnwords):
+                for line in lines:
+                    for word in self.warnwords:
+                        if word in line:
+                            log.warning(line, extra={"task":self.defname})
+                            break
+                    else: log.debug(line.rstrip(), extra={"task":self.defname})
+            elif log.isEnabledFor(logging.DEBUG):
+                log.debug(chunk.rstrip(), extra={"task":self.defname})
+        
+        self.linePublisher.put(lines)
 
     def write (self, data):
         if self.channelsClosed:
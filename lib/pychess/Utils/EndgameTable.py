@@ -1,9 +1,10 @@
 from __future__ import absolute_import
-from gi.repository import GObject
+from gi.repository import GObject, GLib
 
 from .Move import Move
 from .lutils.egtb_k4it import egtb_k4it
 from .lutils.egtb_gaviota import egtb_gaviota
+from .lutils.bitboard import popcount
 
 providers = []
 
@@ -24,7 +25,7 @@ class EndgameTable(GObject.GObject):
         self.providers = providers
     
     def _pieceCounts (self, board):
-        return sorted([ bin(board.friends[i]).count("1") for i in range(2) ])
+        return sorted([ popcount(board.friends[i]) for i in range(2) ])
     
     def scoreGame (self, lBoard, omitDepth=False, probeSoft=False):
         """ Return result and depth to mate. (Intended for engine use.)
@@ -40,7 +41,7 @@ class EndgameTable(GObject.GObject):
         pc = self._pieceCounts(lBoard)
         for provider in self.providers:
             if provider.supports(pc):
-                result, depth = provider.scoreGame(lBoard, needDepth, probeSoft)
+                result, depth = provider.scoreGame(lBoard, omitDepth, probeSoft)
                 if result is not None:
                     return result, depth
         return None, None
@@ -53,16 +54,40 @@ class EndgameTable(GObject.GObject):
             move: A high-level move structure
             game_result: Either WHITEWON, DRAW, BLACKWON
             depth: Depth to mate
+            
+            The online tablebase is probed in the background. Until its
+            answer arrives, an empty list is returned. The "scored" signal is
+            emitted whenever results are found.
         """
         
         pc = self._pieceCounts(lBoard)
         for provider in self.providers:
             if provider.supports(pc):
-                results = provider.scoreAllMoves(lBoard)
+                if isinstance(provider, egtb_k4it):
+                    # The caller's board may have changed when the results
+                    # arrive, so they are told which position they are for
+                    board = lBoard.clone()
+                    def callback (results):
+                        # This is called from the thread fetching the
+                        # results, so the signal is left to the main loop
+                        if results:
+                            GLib.idle_add(self._emitScored, board, self._toMoves(results))
+                    results = provider.scoreAllMoves(lBoard, callback=callback)
+                else:
+                    results = provider.scoreAllMoves(lBoard)
                 if results:
-                    ret = []
-                    for lMove, result, depth in results:
-                        ret.append( (Move(lMove), result, depth) )
-                    self.emit("scored", (lBoard, ret))
-                    return ret
+                    return self._scored(lBoard, results)
         return []
+    
+    def _toMoves (self, results):
+        return [(Move(lMove), result, depth) for lMove, result, depth in results]
+    
+    def _emitScored (self, lBoard, ret):
+        self.emit("scored", (lBoard, ret))
+        # Called as an idle callback, which mustn't be repeated
+        return False
+    
+    def _scored (self, lBoard, results):
+        ret = self._toMoves(results)
+        self._emitScored(lBoard, ret)
+        return ret
@@ -225,7 +225,8 @@ class GameModel (GObject.GObject, Thread):
         self.spectators[analyzer_type] = analyzer
         self.emit("analyzer_added", analyzer, analyzer_type)
         if analyzer_type == HINT:
-            analyzer.connect("analyze", self.on_analyze)
+            self.connections[analyzer].append(
+                analyzer.connect("analyze", self.on_analyze))
         return analyzer
     
     def remove_analyzer (self, analyzer_type):
@@ -234,6 +235,7 @@ class GameModel (GObject.GObject, Thread):
         except KeyError:
             return
         
+        self.__disconnect(analyzer)
         analyzer.end(KILLED, UNKNOWN_REASON)
         self.emit("analyzer_removed", analyzer, analyzer_type)
         del self.spectators[analyzer_type]
@@ -750,8 +752,19 @@ class GameModel (GObject.GObject, Thread):
                 self.timemodel.end()
                 log.debug("GameModel.terminate: <- timemodel.end() %s" % repr(self.timemodel))
         
+        for player in self.players + list(self.spectators.values()):
+            self.__disconnect(player)
+        
         self.emit("game_terminated")
     
+    def __disconnect (self, obj):
+        """ Engines outlive their games in the engine pool, so they mustn't
+            keep calling us """
+        if self.connections is None: return
+        for handler_id in self.connections.pop(obj, []):
+            if obj.handler_is_connected(handler_id):
+                obj.disconnect(handler_id)
+    
     ############################################################################
     # Other stuff                                                              #
     ############################################################################
@@ -1,6 +1,8 @@
 import os
+from mmap import mmap, ACCESS_READ
 from struct import Struct
-from collections import namedtuple
+from threading import RLock
+from collections import namedtuple, OrderedDict
 
 from pychess.Utils.const import *
 from pychess.System import conf
@@ -20,6 +22,122 @@ BookEntry = namedtuple('BookEntry', 'key move weight games score')
 
 entrystruct = Struct(">QHHHH")
 entrysize = entrystruct.size
+keystruct = Struct(">Q")
+
+def getDefaultPath ():
+    """ The book chosen in the preferences, or the one shipped with pychess """
+    return conf.get("opening_file_entry", addDataPrefix("pychess_book.bin"))
+
+class PolyglotBook:
+    """ Reads opening moves from a stack of Polyglot books. The moves of a
+        position are taken from the first book, in priority order, which has
+        the position.
+
+        The books are memory mapped when first probed, and the entries of the
+        most recently probed positions are kept in a LRU cache. A book is only
+        reopened when its path or the modification time of its file changes.
+
+        paths is a list of book files, or a function returning one. By default
+        the book chosen in the preferences is used. """
+
+    def __init__ (self, paths=None, cacheSize=256):
+        self.paths = paths
+        self.cacheSize = cacheSize
+        self.cache = OrderedDict()
+        self.books = [] # A (path, mtime, mmap, buffer) tuple for each book
+        self.lock = RLock()
+        self.hits = 0
+        self.misses = 0
+
+    def getPaths (self):
+        if self.paths is None:
+            return [getDefaultPath()]
+        if callable(self.paths):
+            return list(self.paths())
+        return list(self.paths)
+
+    def close (self):
+        with self.lock:
+            for path, mtime, bookMap, buf in self.books:
+                if buf is not bookMap:
+                    buf.release()
+                bookMap.close()
+            self.books = []
+            self.cache.clear()
+
+    def _reload (self):
+        """ Reopens the books if any of them has been changed or replaced """
+        state = []
+        for path in self.getPaths():
+            try:
+                if os.path.isfile(path):
+                    state.append((path, os.stat(path).st_mtime))
+            except OSError:
+                pass
+        if state == [book[:2] for book in self.books]:
+            return
+
+        self.close()
+        for path, mtime in state:
+            try:
+                with open(path, "rb") as bookFile:
+                    bookMap = mmap(bookFile.fileno(), 0, access=ACCESS_READ)
+            except (IOError, OSError, ValueError):
+                # Empty files can't be mapped
+                continue
+            try:
+                buf = memoryview(bookMap)
+            except TypeError:
+                # Python 2 can't make memory views of maps, but can unpack
+                # directly from them
+                buf = bookMap
+            self.books.append((path, mtime, bookMap, buf))
+
+    def _probe (self, key):
+        """ Returns the (move, weight, games, score) entries of the position
+            with the hash key, from the first book having it """
+        for path, mtime, bookMap, buf in self.books:
+            count = len(bookMap) // entrysize
+            # Find the first entry whose key is >= the position's hash
+            lo, hi = 0, count
+            while lo < hi:
+                mid = (lo + hi) // 2
+                if keystruct.unpack_from(buf, mid * entrysize)[0] < key:
+                    lo = mid + 1
+                else:
+                    hi = mid
+
+            entries = []
+            while lo < count:
+                entry = entrystruct.unpack_from(buf, lo * entrysize)
+                if entry[0] != key:
+                    break
+                entries.append(entry[1:])
+                lo += 1
+            if entries:
+                return tuple(entries)
+        return ()
+
+    def getOpenings (self, board):
+        """ Return a tuple (move, weight, games, score) for each opening move
+            in the given position. See the getOpenings function. """
+        key = board.hash
+        with self.lock:
+            self._reload()
+            entries = self.cache.pop(key, None)
+            if entries is None:
+                self.misses += 1
+                entries = self._probe(key)
+                if len(self.cache) >= self.cacheSize:
+                    self.cache.popitem(last=False)
+            else:
+                self.hits += 1
+            self.cache[key] = entries
+
+        return [(parsePolyglot(board, move), weight, games, score)
+                for move, weight, games, score in entries]
+
+defaultBook = PolyglotBook()
 
 def getOpenings (board):
     """ Return a tuple (move, weight, games, score) for each opening move
@@ -29,40 +147,4 @@ def getOpenings (board):
         scored (with 2 per victory and 1 per draw). However, opening books
         aren't required to keep this information. """
 
-    default_path = os.path.join(addDataPrefix("pychess_book.bin"))
-    path = conf.get("opening_file_entry", default_path) 
-
-    openings = []
-    if not os.path.isfile(path):
-        return openings
-
-    with open(path, "rb") as bookFile:
-        key = board.hash
-        # Find the first entry whose key is >= the position's hash
-        bookFile.seek(0, os.SEEK_END)
-        lo, hi = 0, bookFile.tell() // 16 - 1
-        if hi < 0:
-            return openings
-        while lo < hi:
-            mid = (lo + hi) // 2
-            bookFile.seek(mid * 16)
-            entry = bookFile.read(entrysize)
-            if len(entry) != entrysize:
-                return openings
-            entry = BookEntry._make(entrystruct.unpack(entry))
-            if entry.key < key:
-                lo = mid + 1
-            else:
-                hi = mid
-
-        bookFile.seek(lo * 16)
-        while True:
-            entry = bookFile.read(entrysize)
-            if len(entry) != entrysize:
-                return openings
-            entry = BookEntry._make(entrystruct.unpack(entry))
-            if entry.key != key:
-                break
-            mv = parsePolyglot(board, entry.move)
-            openings.append( ( mv, entry.weight, entry.games, entry.score ) )
-    return openings
+    return defaultBook.getOpenings(board)
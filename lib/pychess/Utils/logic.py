@@ -20,10 +20,9 @@ from pychess.Variants.kingofthehill import testKingInCenter
 
 def getDestinationCords (board, cord):
     tcords = []
-    for move in lmovegen.genAllMoves (board.board):
+    for move in lmovegen.genLegalMoves (board.board):
         if FCORD(move) == cord.cord:
-            if not board.board.willLeaveInCheck(move):
-                tcords.append(Cord(TCORD(move)))
+            tcords.append(Cord(TCORD(move)))
     return tcords
 
 def isClaimableDraw (board):
@@ -74,19 +73,8 @@ def getStatus (board):
             return DRAW, DRAW_INSUFFICIENT
     
     hasMove = False
-    for move in lmovegen.genAllMoves (lboard):
-        if board.variant == ATOMICCHESS:
-            if kingExplode(lboard, move, 1-board.color) and not kingExplode(lboard, move, board.color):
-                hasMove = True
-                break
-            elif kingExplode(lboard, move, board.color):
-                continue
-        lboard.applyMove(move)
-        if lboard.opIsChecked():
-            lboard.popMove()
-            continue
+    for move in lmovegen.genLegalMoves (lboard):
         hasMove = True
-        lboard.popMove()
         break
 
     if not hasMove:
@@ -200,7 +188,6 @@ def genCastles (board):
 
 def legalMoveCount (board):
     moves = 0
-    for move in lmovegen.genAllMoves (board.board):
-        if not board.board.willLeaveInCheck(move):
-            moves += 1
+    for move in lmovegen.genLegalMoves (board.board):
+        moves += 1
     return moves
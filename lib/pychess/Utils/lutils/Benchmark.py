@@ -3,7 +3,10 @@ from pychess.Utils.lutils.LBoard import LBoard
 from pychess.Utils.lutils.leval import clearPawnTable
 from pychess.Utils.lutils.lmove import listToSan
 from pychess.Utils.lutils import lsearch
+from pychess.Utils.lutils.TranspositionTable import TranspositionTable
+from pychess.Utils.lutils.ldata import MATE_VALUE, MAXPLY
 from pychess.Utils.const import *
+import random
 import sys
 from time import time
 
@@ -42,7 +45,8 @@ def benchmark ():
         pos_start_time = time()
         pos_start_nodes = lsearch.nodes
         for depth in range (1, 6):
-            mvs, scr = lsearch.alphaBeta (board, depth)
+            scr = lsearch.alphaBeta (board, depth)
+            mvs = lsearch.getPv()
             pos_time = time() - pos_start_time
             pos_nodes = lsearch.nodes - pos_start_nodes
             pv = " ".join(listToSan(board, mvs))
@@ -53,3 +57,214 @@ def benchmark ():
     suite_nodes = lsearch.nodes - suite_nodes
     print("Total:", suite_nodes, "nodes in", suite_time, "s: ", suite_nodes / suite_time, "n/s")
     lsearch.nodes = 0
+
+def benchmarkDepth (movetime=None, nodecount=None):
+    """ Searches each position for movetime seconds or nodecount nodes, with
+        the selective search (null move, late move reductions and futility
+        pruning) switched off and on, and compares the depths completed. """
+    
+    if movetime is None and nodecount is None:
+        movetime = 5
+    selective = ("nullMove", "lateMoveReductions", "futilityPruning")
+    saved = [getattr(lsearch, name) for name in selective]
+    
+    for enabled in (False, True):
+        for name in selective:
+            setattr(lsearch, name, enabled)
+        suite_depth = 0
+        suite_nodes = 0
+        for i, fen in enumerate(benchmarkPositions):
+            lsearch.table.clear()
+            clearPawnTable()
+            board = LBoard(NORMALCHESS)
+            board.applyFen(fen)
+            pos_start_nodes = lsearch.nodes
+            lsearch.searching = True
+            lsearch.endtime = time() + movetime if movetime else sys.maxsize
+            lsearch.nodelimit = lsearch.nodes + nodecount if nodecount else sys.maxsize
+            depth = 0
+            while depth < MAXPLY:
+                lsearch.timecheck_counter = lsearch.TIMECHECK_FREQ
+                lsearch.alphaBeta(board, depth+1)
+                if not lsearch.searching:
+                    break
+                depth += 1
+            pos_nodes = lsearch.nodes - pos_start_nodes
+            suite_depth += depth
+            suite_nodes += pos_nodes
+            print("Position", i, "reached depth", depth, "in", pos_nodes, "nodes")
+        print("Selective search", "on:" if enabled else "off:",
+              "average depth", suite_depth / float(len(benchmarkPositions)),
+              "in", suite_nodes, "nodes")
+    
+    for name, value in zip(selective, saved):
+        setattr(lsearch, name, value)
+    lsearch.nodelimit = sys.maxsize
+    lsearch.searching = False
+    lsearch.nodes = 0
+
+class _Position:
+    """ All the transposition table needs to know of a board """
+    def __init__ (self, hash):
+        self.hash = hash
+
+def benchmarkTable (count=200000, size=1024 * 1024):
+    """ Times record and probe of the transposition table on its own, with
+        count random positions. The table is small, so most buckets fill up
+        and records have to pick an entry to replace. """
+    
+    rand = random.Random(0)
+    positions = [_Position(rand.getrandbits(64)) for i in range(count)]
+    table = TranspositionTable(size)
+    
+    start = time()
+    for i, position in enumerate(positions):
+        table.record(position, i & 0xfff, i & 0x3ff, hashfEXACT, i & 0xf)
+    spent = time() - start
+    print("Recorded", count, "entries in", spent, "s: ", count / spent, "records/s")
+    
+    hits = 0
+    start = time()
+    for position in positions:
+        if table.probe(position, 0, -MATE_VALUE, MATE_VALUE):
+            hits += 1
+    spent = time() - start
+    print("Probed", count, "entries in", spent, "s: ", count / spent, "probes/s,", hits, "hits")
+
+def benchmarkMovegen (rounds=200):
+    """ Times the move generators and attack tests on the benchmark positions,
+        which mostly come down to the slider attack tables """
+    
+    from pychess.Utils.lutils.lmovegen import genAllMoves, genCaptures
+    from pychess.Utils.lutils.attack import isAttacked, getAttacks
+    
+    boards = []
+    for fen in benchmarkPositions:
+        board = LBoard(NORMALCHESS)
+        board.applyFen(fen)
+        boards.append(board)
+    
+    def allMoves (board):
+        return len(list(genAllMoves(board)))
+    def captures (board):
+        return len(list(genCaptures(board)))
+    def attacked (board):
+        return sum(1 for cord in range(64) if isAttacked(board, cord, board.color))
+    def attackers (board):
+        return sum(1 for cord in range(64) if getAttacks(board, cord, board.color))
+    
+    for name, func, count in (("genAllMoves", allMoves, "moves"),
+                              ("genCaptures", captures, "moves"),
+                              ("isAttacked", attacked, "cords"),
+                              ("getAttacks", attackers, "cords")):
+        start = time()
+        for i in range(rounds):
+            for board in boards:
+                func(board)
+        spent = time() - start
+        if count == "moves":
+            total = rounds * sum(func(board) for board in boards)
+        else:
+            total = rounds * 64 * len(boards)
+        print(name, ":", total, count, "in", spent, "s: ", total / spent, count + "/s")
+
+def benchmarkBitboard (rounds=200):
+    """ Times the bit scans and population count on the bitboards of the
+        benchmark positions """
+    
+    from pychess.Utils.lutils.bitboard import firstBit, lastBit, popcount, iterBits
+    
+    bitboards = []
+    for fen in benchmarkPositions:
+        board = LBoard(NORMALCHESS)
+        board.applyFen(fen)
+        bitboards += [board.blocker, board.friends[WHITE], board.friends[BLACK]]
+        bitboards += [bits for bits in board.boards[WHITE] + board.boards[BLACK] if bits]
+    
+    def scan (func):
+        for bits in bitboards:
+            func(bits)
+    def iterate (func):
+        for bits in bitboards:
+            for cord in func(bits):
+                pass
+    
+    for name, func, loop in (("firstBit", firstBit, scan),
+                             ("lastBit", lastBit, scan),
+                             ("popcount", popcount, scan),
+                             ("iterBits", iterBits, iterate)):
+        start = time()
+        for i in range(rounds):
+            loop(func)
+        spent = time() - start
+        total = rounds * len(bitboards)
+        print(name, ":", total, "bitboards in", spent, "s: ", total / spent, "bitboards/s")
+
+def benchmarkEvalCache (depth=5):
+    """ Searches the benchmark positions to depth with the eval cache off and
+        on, and compares the static evaluations made per searched node """
+    
+    saved = lsearch.evalCache
+    
+    for enabled in (False, True):
+        lsearch.evalCache = enabled
+        lsearch.evalTable.clear()
+        suite_time = time()
+        suite_nodes = lsearch.nodes
+        suite_evals = lsearch.evals
+        lsearch.endtime = sys.maxsize
+        lsearch.searching = True
+        for fen in benchmarkPositions:
+            lsearch.table.clear()
+            clearPawnTable()
+            board = LBoard(NORMALCHESS)
+            board.applyFen(fen)
+            for d in range(1, depth+1):
+                lsearch.alphaBeta(board, d)
+        suite_time = time() - suite_time
+        suite_nodes = lsearch.nodes - suite_nodes
+        suite_evals = lsearch.evals - suite_evals
+        print("Eval cache", "on:" if enabled else "off:",
+              suite_evals, "evaluations in", suite_nodes, "nodes,",
+              suite_evals / float(suite_nodes), "per node,",
+              suite_nodes / suite_time, "n/s")
+    if lsearch.evalTable.hits + lsearch.evalTable.misses:
+        print("Eval cache hits:", lsearch.evalTable.hits * 100.0 /
+              (lsearch.evalTable.hits + lsearch.evalTable.misses), "%")
+    
+    lsearch.evalCache = saved
+    lsearch.searching = False
+    lsearch.nodes = 0
+
+def benchmarkQuiescence (depth=5):
+    """ Searches the benchmark positions to depth with the pruning of the
+        quiescence search off and on, and compares the nodes searched """
+    
+    saved = lsearch.quiescencePruning
+    
+    for enabled in (False, True):
+        lsearch.quiescencePruning = enabled
+        suite_time = time()
+        suite_nodes = lsearch.nodes
+        suite_qnodes = lsearch.qnodes
+        lsearch.endtime = sys.maxsize
+        lsearch.searching = True
+        for fen in benchmarkPositions:
+            lsearch.table.clear()
+            lsearch.evalTable.clear()
+            clearPawnTable()
+            board = LBoard(NORMALCHESS)
+            board.applyFen(fen)
+            for d in range(1, depth+1):
+                lsearch.alphaBeta(board, d)
+        suite_time = time() - suite_time
+        suite_nodes = lsearch.nodes - suite_nodes
+        suite_qnodes = lsearch.qnodes - suite_qnodes
+        print("Quiescence pruning", "on:" if enabled else "off:",
+              suite_nodes, "nodes, of which quiescence", suite_qnodes,
+              "in", suite_time, "s: ", suite_nodes / suite_time, "n/s")
+    
+    lsearch.quiescencePruning = saved
+    lsearch.searching = False
+    lsearch.nodes = 0
+    lsearch.qnodes = 0
@@ -0,0 +1,76 @@
+import sqlite3
+from struct import Struct
+from threading import Lock
+
+from pychess.compat import memoryview
+
+# The egtb cache keeps the results of online tablebase probes on disk, so a
+# position is only ever requested once. Each entry holds the moves of a
+# position, packed as:
+# move        the move
+# state       WHITEWON, BLACKWON or DRAW
+# steps       the depth to mate
+# When the cache is full, the least recently used positions are evicted.
+moveType = Struct('>H B H')
+
+DEFAULT_MAX_ENTRIES = 100000
+
+class EgtbCache:
+    def __init__ (self, path, maxEntries=DEFAULT_MAX_ENTRIES):
+        # The cache is probed by the gui and written by the egtb worker
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.lock = Lock()
+        self.maxEntries = maxEntries
+        with self.lock:
+            # Losing the last few probes in a crash is fine
+            self.conn.execute("pragma synchronous = off")
+            self.conn.execute("create table if not exists probes (fen text, "
+                              "color integer, moves blob, used integer, "
+                              "primary key (fen, color))")
+            self.conn.execute("create index if not exists probes_used on probes (used)")
+            self.tick, self.entries = self.conn.execute(
+                "select max(used), count(*) from probes").fetchone()
+            self.tick = self.tick or 0
+        self.hits = 0
+        self.misses = 0
+
+    def close (self):
+        with self.lock:
+            self.conn.close()
+
+    def get (self, fen, color):
+        """ Returns the (move, state, steps) list stored for the position, or
+            None """
+        with self.lock:
+            row = self.conn.execute("select moves from probes where fen = ? and color = ?",
+                                    (fen, color)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.tick += 1
+            self.conn.execute("update probes set used = ? where fen = ? and color = ?",
+                              (self.tick, fen, color))
+            self.conn.commit()
+
+        data = row[0]
+        return [moveType.unpack_from(data, offset)
+                for offset in range(0, len(data), moveType.size)]
+
+    def put (self, fen, color, moves):
+        data = memoryview(b"".join(moveType.pack(*move) for move in moves))
+        with self.lock:
+            self.tick += 1
+            try:
+                self.conn.execute("insert into probes values (?, ?, ?, ?)",
+                                  (fen, color, data, self.tick))
+                self.entries += 1
+            except sqlite3.IntegrityError:
+                self.conn.execute("update probes set moves = ?, used = ? where fen = ? and color = ?",
+                                  (data, self.tick, fen, color))
+            if self.entries > self.maxEntries:
+                self.conn.execute("delete from probes where rowid in (select rowid "
+                                  "from probes order by used limit ?)",
+                                  (self.entries - self.maxEntries,))
+                self.entries = self.maxEntries
+            self.conn.commit()
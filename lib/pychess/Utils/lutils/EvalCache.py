@@ -0,0 +1,39 @@
+from ctypes import create_string_buffer, memset
+from struct import Struct
+
+# The eval cache remembers the static evaluation of positions, which the
+# search meets again and again in the quiescence search, and in every
+# iteration of the iterative deepening. An entry is:
+# key         the hash of the board, which has the side to move in it
+# score       the evaluation for the side to move
+# Entries are always replaced.
+entryType = Struct('=Q h')
+MIN_SCORE = -0x8000
+MAX_SCORE = 0x7fff
+
+class EvalCache:
+    def __init__ (self, maxSize):
+        assert maxSize > 0
+        self.entries = max(1, maxSize // entryType.size)
+        self.size = self.entries * entryType.size
+        self.data = create_string_buffer(self.size)
+        self.hits = 0
+        self.misses = 0
+
+    def clear (self):
+        memset(self.data, 0, self.size)
+        self.hits = 0
+        self.misses = 0
+
+    def probe (self, board):
+        """ Returns the score stored for board, or None """
+        key, score = entryType.unpack_from(self.data, (board.hash % self.entries) * entryType.size)
+        if key == board.hash:
+            self.hits += 1
+            return score
+        self.misses += 1
+
+    def record (self, board, score):
+        score = max(MIN_SCORE, min(MAX_SCORE, int(score)))
+        entryType.pack_into(self.data, (board.hash % self.entries) * entryType.size,
+                            board.hash, score)
@@ -33,6 +33,8 @@ class LBoard:
 
     def __init__ (self, variant=NORMALCHESS):
         self.variant = variant
+        self.materialValues = VARIANT_MATERIAL.get(variant, NORMAL_MATERIAL)
+        self.psqTables = VARIANT_PSQ.get(variant, (psqMg, psqEg))
 
         self.nags = []
         # children can contain comments and variations
@@ -56,12 +58,23 @@ class LBoard:
         return self.hist_move[-1] if self.fen_was_applied and len(self.hist_move) > 0 else None
 
     def repetitionCount (self, drawThreshold=3):
-        rc = 1
-        for ply in range(4, 1+min(len(self.hist_hash), self.fifty), 2):
-            if self.hist_hash[-ply] == self.hash:
-                rc += 1
-                if rc >= drawThreshold: break
-        return rc
+        """ The number of times the position has occurred since the last
+            irreversible move, counting the position itself. The count stops
+            at drawThreshold. """
+        # Positions reached by changing the side to move aren't counted
+        return min(self.repetitions.get(self.hash, 1), drawThreshold)
+
+    def repeatedSince (self, ply):
+        """ Tests if the position occurred before, since the last irreversible
+            or null move and after the first ply moves in hist_move were
+            made """
+        hist_hash = self.hist_hash
+        for i in range(len(hist_hash)-1, max(ply, len(hist_hash)-self.fifty)-1, -1):
+            if self.hist_move[i] >> 12 == NULL_MOVE:
+                return False
+            if hist_hash[i] == self.hash:
+                return True
+        return False
 
     def iniAtomic(self):
         self.hist_exploding_around = []
@@ -113,10 +126,17 @@ class LBoard:
         self.hist_fifty = []
         self.hist_checked = []
         self.hist_opchecked = []
+        self.hist_repetitions = []
 
         # piece counts
         self.pieceCount = [[0]*7, [0]*7]
         
+        # Evaluation terms which only depend on the pieces and their cords.
+        # They are updated as pieces are added and removed.
+        self.material = [0, 0]  # The material on the board, by color
+        self.psqMg = 0          # Piece square table sums, from white's point of
+        self.psqEg = 0          # view, for the middlegame and the endgame
+        
         # initial cords of rooks and kings for castling in Chess960
         if self.variant == FISCHERRANDOMCHESS:
             self.ini_kings = [None, None]
@@ -309,6 +329,12 @@ class LBoard:
         else:
             self.plyCount = 1
 
+        # Counts of the positions since the last irreversible move, by hash.
+        # Positions from before an irreversible move can't come back, so we
+        # start counting anew after one. We do the same after null moves, as
+        # repeating a position by passing doesn't make it a draw.
+        self.repetitions = {self.hash: 1}
+
         self.fen_was_applied = True
 
     def isChecked (self):
@@ -341,10 +367,11 @@ class LBoard:
         return board_clone.opIsChecked()
         
     def _addPiece (self, cord, piece, color):
-        _setBit = setBit
-        self.boards[color][piece] = _setBit(self.boards[color][piece], cord)
-        self.friends[color] = _setBit(self.friends[color], cord)
-        self.blocker = _setBit(self.blocker, cord)
+        # setBit inlined
+        bit = bitPosArray[cord]
+        self.boards[color][piece] |= bit
+        self.friends[color] |= bit
+        self.blocker |= bit
         
         if piece == PAWN:
             self.pawnhash ^= pieceHashes[color][PAWN][cord]
@@ -352,18 +379,29 @@ class LBoard:
             self.kings[color] = cord
         self.hash ^= pieceHashes[color][piece][cord]
         self.arBoard[cord] = piece
+        
+        self.material[color] += self.materialValues[piece]
+        mgTables, egTables = self.psqTables
+        self.psqMg += mgTables[color][piece][cord]
+        self.psqEg += egTables[color][piece][cord]
     
     def _removePiece (self, cord, piece, color):
-        _clearBit = clearBit
-        self.boards[color][piece] = _clearBit(self.boards[color][piece], cord)
-        self.friends[color] = _clearBit(self.friends[color], cord)
-        self.blocker = _clearBit(self.blocker, cord)
+        # clearBit inlined
+        mask = notBitPosArray[cord]
+        self.boards[color][piece] &= mask
+        self.friends[color] &= mask
+        self.blocker &= mask
         
         if piece == PAWN:
             self.pawnhash ^= pieceHashes[color][PAWN][cord]
         
         self.hash ^= pieceHashes[color][piece][cord]
         self.arBoard[cord] = EMPTY
+        
+        self.material[color] -= self.materialValues[piece]
+        mgTables, egTables = self.psqTables
+        self.psqMg -= mgTables[color][piece][cord]
+        self.psqEg -= egTables[color][piece][cord]
     
     def setColor (self, color):
         if color == self.color: return
@@ -432,7 +470,13 @@ class LBoard:
         self.checked = None
 
         if flag == NULL_MOVE:
+            # Passing the move still gives up the right to capture enpassant
+            self.hist_tpiece.append(EMPTY)
+            self.setEnpassant(None)
             self.setColor(opcolor)
+            self.plyCount += 1
+            self.hist_repetitions.append(self.repetitions)
+            self.repetitions = {self.hash: 1}
             return move
 
         # Castling moves can be represented strangely, so normalize them.
@@ -564,6 +608,12 @@ class LBoard:
         self.setColor(opcolor)
         self.plyCount += 1
 
+        if self.fifty == 0:
+            self.hist_repetitions.append(self.repetitions)
+            self.repetitions = {self.hash: 1}
+        else:
+            self.repetitions[self.hash] = self.repetitions.get(self.hash, 0) + 1
+
     def popMove (self):
         # Note that we remove the last made move, which was not made by boards
         # current color, but by its opponent
@@ -576,9 +626,24 @@ class LBoard:
         flag = move >> 12
         
         if flag == NULL_MOVE:
-            self.setColor(color)
+            self.repetitions = self.hist_repetitions.pop()
+            if self.variant in (BUGHOUSECHESS, CRAZYHOUSECHESS):
+                self.capture_promoting = self.hist_capture_promoting.pop()
+            self.color = color
+            self.checked = self.hist_checked.pop()
+            self.opchecked = self.hist_opchecked.pop()
+            self.enpassant = self.hist_enpassant.pop()
+            self.castling = self.hist_castling.pop()
+            self.hash = self.hist_hash.pop()
+            self.fifty = self.hist_fifty.pop()
+            self.plyCount -= 1
             return
             
+        if self.fifty == 0:
+            self.repetitions = self.hist_repetitions.pop()
+        else:
+            self._uncountPosition()
+
         fcord = (move >> 6) & 63
         tcord = move & 63
         tpiece = self.arBoard[tcord]
@@ -666,6 +731,13 @@ class LBoard:
         self.fifty = self.hist_fifty.pop()
         self.plyCount -= 1
         
+    def _uncountPosition (self):
+        count = self.repetitions.get(self.hash, 1) - 1
+        if count:
+            self.repetitions[self.hash] = count
+        else:
+            self.repetitions.pop(self.hash, None)
+
     def __hash__ (self):
         return self.hash
     
@@ -790,6 +862,9 @@ class LBoard:
         copy.boards = [self.boards[WHITE][:], self.boards[BLACK][:]]
         copy.arBoard = self.arBoard[:]
         copy.pieceCount = [self.pieceCount[WHITE][:], self.pieceCount[BLACK][:]]
+        copy.material = self.material[:]
+        copy.psqMg = self.psqMg
+        copy.psqEg = self.psqEg
         
         copy.color = self.color
         copy.plyCount = self.plyCount
@@ -811,6 +886,9 @@ class LBoard:
         copy.hist_fifty = self.hist_fifty[:]
         copy.hist_checked = self.hist_checked[:]
         copy.hist_opchecked = self.hist_opchecked[:]
+        # The dicts on the stack are changed again once they're popped
+        copy.repetitions = self.repetitions.copy()
+        copy.hist_repetitions = [r.copy() for r in self.hist_repetitions]
         
         if self.variant == FISCHERRANDOMCHESS:
             copy.ini_kings = self.ini_kings[:]
@@ -0,0 +1,121 @@
+from __future__ import absolute_import
+
+import signal
+from multiprocessing import Process, Queue, RawValue
+try:
+    from queue import Empty
+except ImportError:
+    from Queue import Empty
+
+from . import lsearch
+from . import leval
+from .TranspositionTable import TranspositionTable
+
+################################################################################
+#   Lazy SMP: helper processes run iterative deepening on the same root as    #
+#   the main search, sharing nothing but the transposition table. The entries #
+#   one process stores are probed by the others, so the main search gets to   #
+#   its depths sooner. Half the helpers start a ply deeper to spread the work. #
+#   Processes rather than threads are used, to get around the GIL.            #
+################################################################################
+
+class LazySMP:
+    def __init__ (self, cores):
+        """ Starts cores-1 helper processes, sharing lsearch.table, which must
+            be a shared or file backed TranspositionTable """
+        table = lsearch.table
+        pawnSize = leval.pawnBuckets * leval.PAWN_BUCKET_SIZE
+        if table.filename is not None:
+            # The helpers map the file themselves
+            spec = (table.size, table.filename, None, pawnSize)
+        else:
+            spec = (table.size, None, table.data, pawnSize)
+
+        self.stopflag = RawValue('b', 0)
+        self.results = Queue()
+        self.helpers = []
+        for ident in range(1, cores):
+            jobs = Queue()
+            process = Process(target=_helper,
+                              args=(ident, spec, jobs, self.results, self.stopflag))
+            process.daemon = True
+            process.start()
+            self.helpers.append((process, jobs))
+
+        self.running = 0
+        self.best = None
+        self.helperNodes = {}
+
+    def start (self, board, sd, endtime):
+        """ Lets the helpers search board up to depth sd or the time endtime """
+        self.stopflag.value = 0
+        self.best = None
+        self.helperNodes = {}
+        for process, jobs in self.helpers:
+            # The board is pickled later by the queue, so it gets a copy
+            options = dict((name, getattr(lsearch, name))
+                           for name in lsearch.SEARCH_OPTIONS)
+            useEgtb = lsearch.egtb is not None
+            jobs.put((board.clone(), sd, endtime, options, useEgtb))
+        self.running = len(self.helpers)
+
+    def poll (self, block=False):
+        """ Takes in the results the helpers have posted so far """
+        while self.running:
+            try:
+                ident, depth, score, pv, nodes = self.results.get(block)
+            except Empty:
+                return
+            self.helperNodes[ident] = nodes
+            if depth is None:
+                self.running -= 1
+            elif self.best is None or depth > self.best[0]:
+                self.best = (depth, score, pv)
+
+    def stop (self):
+        """ Stops the helpers and returns the (depth, score, pv) of the deepest
+            search they completed, or None """
+        self.stopflag.value = 1
+        self.poll(block=True)
+        return self.best
+
+    def getNodes (self):
+        return sum(self.helperNodes.values())
+
+    def quit (self):
+        for process, jobs in self.helpers:
+            jobs.put(None)
+        for process, jobs in self.helpers:
+            process.join()
+        self.helpers = []
+
+def _helper (ident, spec, jobs, results, stopflag):
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    size, filename, data, pawnSize = spec
+    lsearch.table = TranspositionTable(size, filename=filename, data=data)
+    # Each process keeps a pawn hash of its own
+    leval.resizePawnTable(pawnSize)
+    lsearch.stopflag = stopflag
+
+    while True:
+        job = jobs.get()
+        if job is None:
+            break
+        board, sd, endtime, options, useEgtb = job
+        for name, value in options.items():
+            setattr(lsearch, name, value)
+        # The endgame table can't be pickled, so each helper opens its own
+        if useEgtb and lsearch.egtb is None:
+            lsearch.enableEGTB()
+
+        lsearch.searching = True
+        lsearch.endtime = endtime
+        lsearch.nodes = 0
+        score = None
+        for depth in range(1 + ident % 2, sd+1):
+            lsearch.timecheck_counter = lsearch.TIMECHECK_FREQ
+            score = lsearch.aspirationSearch(board, depth, score)
+            if not lsearch.searching:
+                break
+            results.put((ident, depth, score, lsearch.getPv(), lsearch.nodes))
+        results.put((ident, None, None, None, lsearch.nodes))
@@ -0,0 +1,139 @@
+from __future__ import absolute_import
+
+from pychess.Utils.const import *
+from .bitboard import iterBits
+from .ldata import PIECE_VALUES, PAWN_VALUE, rankBits
+from .lmovegen import genAllMoves, genCaptures, newMove, getPinned, isLegal
+from .lsort import getMoveValue
+from .attack import staticExchangeEvaluate
+from .validator import validateMove
+
+################################################################################
+#   The move picker hands out the moves of a position in stages, so a node     #
+#   which cuts off early never pays for generating and sorting the rest:       #
+#   1.  The move from the hash table                                           #
+#   2.  Winning and equal captures (and promotions) by MVV/LVA                 #
+#   3.  Killers                                                                #
+#   4.  Losing captures                                                        #
+#   5.  Quiet moves by history                                                 #
+#   The picker yields legal moves only. It should not be used when the side    #
+#   to move is in check, or in variants without the normal rules of check.     #
+################################################################################
+
+HASH, GOOD_CAPTURES, KILLERS, BAD_CAPTURES, QUIETS = range(5)
+
+class MovePicker:
+    def __init__ (self, board, table, depth, hashmove=None):
+        self.board = board
+        self.table = table
+        self.depth = depth
+        self.hashmove = hashmove
+        self.stage = HASH
+
+    def __iter__ (self):
+        board = self.board
+        arBoard = board.arBoard
+        hashmove = self.hashmove
+        pinned = getPinned(board, board.color)
+
+        # Hash move
+        if hashmove and validateMove(board, hashmove) and \
+                isLegal(board, hashmove, pinned):
+            yield hashmove
+        else:
+            hashmove = None
+
+        # Captures and promotions, best first
+        self.stage = GOOD_CAPTURES
+        moves = []
+        scores = []
+        badCaptures = []
+        for move in genCaptures(board):
+            if move == hashmove or not isLegal(board, move, pinned):
+                continue
+            flag = move >> 12
+            if flag == ENPASSANT:
+                score = 0
+            elif flag in PROMOTIONS:
+                score = PIECE_VALUES[arBoard[move & 63]] + \
+                        PIECE_VALUES[flag-2] - PAWN_VALUE
+            else:
+                victim = PIECE_VALUES[arBoard[move & 63]]
+                attacker = PIECE_VALUES[arBoard[(move >> 6) & 63]]
+                score = victim - attacker
+                if score < 0 and staticExchangeEvaluate(board, move) < 0:
+                    badCaptures.append((score, move))
+                    continue
+                # Most valuable victim first, least valuable attacker second
+                score = victim * 8 - attacker
+            moves.append(move)
+            scores.append(score)
+        for move in genPromotions(board):
+            if move != hashmove and isLegal(board, move, pinned):
+                moves.append(move)
+                scores.append(PIECE_VALUES[(move >> 12)-2] - PAWN_VALUE)
+
+        while moves:
+            i = scores.index(max(scores))
+            del scores[i]
+            yield moves.pop(i)
+
+        # Killers
+        self.stage = KILLERS
+        killers = []
+        for killer in (self.table.killer1[self.depth], self.table.killer2[self.depth]):
+            if killer == -1 or killer == hashmove or killer in killers:
+                continue
+            flag = killer >> 12
+            if flag == ENPASSANT or flag == DROP or flag in PROMOTIONS:
+                continue
+            if arBoard[killer & 63] != EMPTY and \
+                    flag != KING_CASTLE and flag != QUEEN_CASTLE:
+                continue
+            if validateMove(board, killer) and isLegal(board, killer, pinned):
+                killers.append(killer)
+                yield killer
+
+        # Losing captures
+        self.stage = BAD_CAPTURES
+        badCaptures.sort(reverse=True)
+        for score, move in badCaptures:
+            yield move
+
+        # Quiet moves
+        self.stage = QUIETS
+        table = self.table
+        depth = self.depth
+        quiets = []
+        for move in genAllMoves(board):
+            flag = move >> 12
+            if flag == ENPASSANT or flag in PROMOTIONS:
+                continue
+            # In Chess960 the king may castle onto its own rook
+            if arBoard[move & 63] != EMPTY and \
+                    flag != KING_CASTLE and flag != QUEEN_CASTLE:
+                continue
+            if move == hashmove or move in killers or \
+                    not isLegal(board, move, pinned):
+                continue
+            quiets.append((-getMoveValue(board, table, depth, move), move))
+        quiets.sort()
+        for value, move in quiets:
+            yield move
+
+def genPromotions (board):
+    """ Generates the non capturing pawn promotions, which genCaptures leaves
+        out """
+
+    pawns = board.boards[board.color][PAWN]
+    notblocker = ~board.blocker
+    if board.color == WHITE:
+        for cord in iterBits((pawns >> 8) & notblocker & rankBits[7]):
+            for p in PROMOTIONS:
+                if board.variant == SUICIDECHESS or p != KING_PROMOTION:
+                    yield newMove(cord-8, cord, p)
+    else:
+        for cord in iterBits((pawns << 8) & notblocker & rankBits[0]):
+            for p in PROMOTIONS:
+                if board.variant == SUICIDECHESS or p != KING_PROMOTION:
+                    yield newMove(cord+8, cord, p)
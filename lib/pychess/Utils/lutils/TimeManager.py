@@ -0,0 +1,150 @@
+from __future__ import absolute_import
+
+from time import time
+
+################################################################################
+#   The time manager decides how long the engine thinks on a move. It plans   #
+#   an optimum time from the clock, and a maximum the search is never allowed #
+#   past. After every iteration of the iterative deepening the optimum is     #
+#   stretched or shrunk:                                                      #
+#   -   A best move which keeps changing needs more time, a stable one less   #
+#   -   A score which drops from the last iteration needs more time           #
+#   The effective branching factor predicts how long the next iteration will  #
+#   take, and iterations which can't complete in time are not started.        #
+################################################################################
+
+# Seconds kept back on every move for the communication with the interface
+MOVE_OVERHEAD = 0.1
+# The maximum time is this many times the optimum time...
+MAX_FACTOR = 4
+# ...but never more than this part of the remaining clock
+MAX_CLOCK_PART = 0.25
+
+# Iterations a move must stay best before we consider it stable
+STABLE_ITERATIONS = 3
+STABLE_FACTOR = 0.7
+# Time added for every change of the best move, decaying with every iteration
+CHANGE_FACTOR = 0.6
+# Score drops in centipawns, and the time factors for them
+SWING_SMALL, SWING_SMALL_FACTOR = 30, 1.3
+SWING_LARGE, SWING_LARGE_FACTOR = 100, 1.8
+
+def remainingMoves (plyCount, blitz=False):
+    """ The number of moves we expect to still have to play """
+    # Based on regression of a 180k games pgn
+    x = plyCount
+    moves = -1.71086e-12*x**6 \
+            +1.69103e-9*x**5 \
+            -6.00801e-7*x**4 \
+            +8.17741e-5*x**3 \
+            +2.91858e-4*x**2 \
+            -0.94497*x \
+            +78.8979
+    if blitz:
+        # If game is blitz, we assume 40 moves rather than 80
+        moves /= 2
+    return max(moves, 10)
+
+class TimeManager:
+    def __init__ (self, clock, increment=0, movestogo=0, plyCount=0,
+                  searchtime=0):
+        """ Plans the time of a move. clock is the time left on our clock in
+            seconds, movestogo the number of moves to the next time control
+            or 0, and searchtime a fixed time per move which overrides the
+            others. """
+
+        self.starttime = time()
+
+        if searchtime > 0:
+            self.optimum = self.maximum = searchtime
+            self.fixed = True
+        else:
+            self.fixed = False
+            if movestogo > 0:
+                moves = movestogo - (plyCount // 2) % movestogo
+            else:
+                moves = remainingMoves(plyCount, clock < 6*60+increment*40)
+            # The increment is a constant. We'll use this always
+            self.optimum = clock / float(moves) + increment
+
+            # Never plan for more than we have. In a sudden death game with a
+            # nearly empty clock, move at once.
+            available = max(clock - MOVE_OVERHEAD, 0)
+            self.maximum = min(self.optimum * MAX_FACTOR,
+                               available * MAX_CLOCK_PART + increment,
+                               available)
+            self.optimum = max(min(self.optimum, self.maximum), 0.01)
+            self.maximum = max(self.maximum, self.optimum)
+
+        self.bestmove = None
+        self.stableIterations = 0
+        self.changes = 0
+        self.score = None
+        self.swing = 0
+        self.iterationTime = 0
+        self.iterationNodes = 0
+        self.branching = None
+
+    def getEndtime (self):
+        """ The time the search must be stopped at, whatever happens """
+        return self.starttime + self.maximum
+
+    def elapsed (self):
+        return time() - self.starttime
+
+    def iterationDone (self, move, score, nodes, iterationTime):
+        """ Tells the time manager the result of a completed iteration. nodes
+            and iterationTime are what the iteration alone used. """
+
+        # Changes of the best move count less, the deeper they lie behind us
+        self.changes /= 2.
+        if move == self.bestmove:
+            self.stableIterations += 1
+        else:
+            if self.bestmove is not None:
+                self.changes += 1
+            self.stableIterations = 0
+            self.bestmove = move
+
+        if self.score is not None:
+            self.swing = self.score - score
+        self.score = score
+
+        if self.iterationNodes > 0 and nodes > 0:
+            branching = nodes / float(self.iterationNodes)
+            if self.branching is None:
+                self.branching = branching
+            else:
+                # Odd and even iterations differ a lot, so average the two
+                self.branching = (self.branching + branching) / 2
+        self.iterationNodes = nodes
+        self.iterationTime = iterationTime
+
+    def getFactor (self):
+        """ How much the optimum time is stretched by the search so far """
+        factor = 1 + self.changes * CHANGE_FACTOR
+        if self.stableIterations >= STABLE_ITERATIONS:
+            factor *= STABLE_FACTOR
+        if self.swing >= SWING_LARGE:
+            factor *= SWING_LARGE_FACTOR
+        elif self.swing >= SWING_SMALL:
+            factor *= SWING_SMALL_FACTOR
+        return factor
+
+    def nextIteration (self):
+        """ Returns False if the search should stop rather than start another
+            iteration """
+
+        elapsed = self.elapsed()
+        if elapsed >= self.maximum:
+            return False
+        if not self.fixed and elapsed >= self.optimum * self.getFactor():
+            return False
+
+        # Don't waste time on an iteration which can't complete. An
+        # unfinished iteration is thrown away.
+        if self.branching is not None:
+            predicted = self.iterationTime * self.branching
+            if elapsed + predicted > self.maximum:
+                return False
+        return True
@@ -1,22 +1,68 @@
+import os
+from ctypes import c_char, create_string_buffer, memset
+from mmap import mmap
+from multiprocessing import RawArray
+from struct import Struct
+
 from pychess.Utils.const import hashfALPHA, hashfBETA, hashfEXACT, hashfBAD
 from pychess.Utils.lutils.ldata import MATE_VALUE, MAXPLY
-from ctypes import create_string_buffer, memset
-from struct import Struct, pack_into, unpack_from
 
-# Store hash entries in buckets of 4. An entry consists of:
+# Store hash entries in buckets of 4. An entry consists of four 32 bit words:
 # key         32 bits derived from the board hash
-# search_id   counter used to determine entry's age
-# hashf       bound type (one of the hashf* constants)
-# depth       search depth
-# score       search score
-# move        best move (or cutoff move)
-entryType = Struct('=I B B H h H')
+# check       the key xor'ed with the two words below
+# data        search_id | hashf << 8 | depth << 16
+#               search_id   counter used to determine entry's age
+#               hashf       bound type (one of the hashf* constants)
+#               depth       search depth
+# result      score & 0xffff | move << 16
+#               score       search score
+#               move        best move (or cutoff move)
+#
+# An entry torn by processes writing it at the same time fails the check, so
+# several processes can share the table without locking.
+#
+# A bucket stores its words column by column: the 4 keys, the 4 checks, the
+# 4 data words and the 4 result words, making it 64 bytes, a cache line. It
+# is unpacked at once, and finding an entry is a single search of the key
+# column, rather than a loop over the entries.
+bucketType = Struct('<16I')
+wordType = Struct('<I')
+CHECK = 4 * wordType.size
+DATA = 8 * wordType.size
+RESULT = 12 * wordType.size
 
 class TranspositionTable:
-    def __init__ (self, maxSize):
+    def __init__ (self, maxSize, shared=False, filename=None, data=None):
+        """ The entries are kept in a private buffer, unless
+            shared        puts them in anonymous shared memory, which processes
+                          started later get a handle to through self.data
+            filename      maps the file into memory, so the table survives the
+                          process, and other processes mapping it share it
+            data          is the self.data of a shared table of maxSize """
         assert maxSize > 0
-        self.buckets = maxSize // (4 * entryType.size)
-        self.data = create_string_buffer(self.buckets * 4 * entryType.size)
+        self.buckets = maxSize // bucketType.size
+        self.size = size = self.buckets * bucketType.size
+        self.filename = filename
+        self.map = None
+        
+        if data is not None:
+            self.data = data
+        elif filename is not None:
+            fd = os.open(filename, os.O_RDWR | os.O_CREAT, 0o644)
+            try:
+                if os.fstat(fd).st_size != size:
+                    # The entries of a table of another size are at other indexes
+                    os.ftruncate(fd, 0)
+                    os.ftruncate(fd, size)
+                self.map = mmap(fd, size)
+            finally:
+                os.close(fd)
+            self.data = (c_char * size).from_buffer(self.map)
+        elif shared:
+            self.data = RawArray(c_char, size)
+        else:
+            self.data = create_string_buffer(size)
+        
         self.search_id = 0
         
         self.killer1 = [-1]*80
@@ -25,8 +71,16 @@ class TranspositionTable:
         
         self.butterfly = [0]*(64*64)
     
+    def close (self):
+        """ Writes a file backed table to disk, and releases it """
+        if self.map is not None:
+            self.data = None
+            self.map.flush()
+            self.map.close()
+            self.map = None
+    
     def clear (self):
-        memset(self.data, 0, self.buckets * 4 * entryType.size)
+        memset(self.data, 0, self.size)
         self.killer1 = [-1]*80
         self.killer2 = [-1]*80
         self.hashmove = [-1]*80
@@ -36,41 +90,66 @@ class TranspositionTable:
         self.search_id = (self.search_id + 1) & 0xff
         #TODO: consider clearing butterfly table
     
+    def hashfull (self):
+        """ Returns the permille of entries in use, from a sample of the table """
+        sample = min(self.buckets, 250)
+        used = 0
+        for i in range(sample):
+            words = bucketType.unpack_from(self.data, i * bucketType.size)
+            used += 4 - words[0:4].count(0)
+        return used * 1000 // (sample * 4)
+    
     def probe (self, board, depth, alpha, beta):
-        baseIndex = (board.hash % self.buckets) * 4
+        words = bucketType.unpack_from(self.data, (board.hash % self.buckets) * bucketType.size)
         key = (board.hash // self.buckets) & 0xffffffff
-        for i in range(baseIndex, baseIndex + 4):
-            tkey, search_id, hashf, tdepth, score, move = entryType.unpack_from(self.data, i * entryType.size)
-            if tkey == key:
-                # Mate score bounds are guaranteed to be accurate at any depth.
-                if tdepth < depth and abs(score) < MATE_VALUE-MAXPLY:
-                    return move, score, hashfBAD
-                if hashf == hashfEXACT:
-                    return move, score, hashf
-                if hashf == hashfALPHA and score <= alpha:
-                    return move, alpha, hashf
-                if hashf == hashfBETA and score >= beta:
-                    return move, beta, hashf
+        if key not in words[0:4]:
+            return
+        i = words.index(key, 0, 4)
+        data = words[8+i]
+        result = words[12+i]
+        if words[4+i] != key ^ data ^ result:
+            return
+        hashf = (data >> 8) & 0xff
+        tdepth = data >> 16
+        score = result & 0xffff
+        if score >= 0x8000:
+            score -= 0x10000
+        move = result >> 16
+        # Mate score bounds are guaranteed to be accurate at any depth.
+        if tdepth < depth and abs(score) < MATE_VALUE-MAXPLY:
+            return move, score, hashfBAD
+        if hashf == hashfEXACT:
+            return move, score, hashf
+        if hashf == hashfALPHA and score <= alpha:
+            return move, alpha, hashf
+        if hashf == hashfBETA and score >= beta:
+            return move, beta, hashf
     
     def record (self, board, move, score, hashf, depth):
-        baseIndex = (board.hash % self.buckets) * 4
+        offset = (board.hash % self.buckets) * bucketType.size
         key = (board.hash // self.buckets) & 0xffffffff
-        # We always overwrite *something*: an empty slot, this position's last entry, or else the least relevant.
-        staleIndex = baseIndex
-        staleRelevance = 0xffff
-        for i in range(baseIndex, baseIndex + 4):
-            tkey, search_id, thashf, tdepth, tscore, tmove = entryType.unpack_from(self.data, i * entryType.size)
-            if tkey == 0 or tkey == key:
-                staleIndex = i
-                break
-            relevance = (0x8000 if search_id != self.search_id and thashf == hashfEXACT else 0) + \
-                        (0x4000 if ((self.search_id - search_id) & 0xff) > 1 else 0) + \
-                        tdepth
-            if relevance < staleRelevance:
-                staleIndex = i
-                staleRelevance = relevance
-        entryType.pack_into(self.data, staleIndex * entryType.size, key, self.search_id, hashf, depth, score, move)
-
+        words = bucketType.unpack_from(self.data, offset)
+        keys = words[0:4]
+        # We always overwrite *something*: this position's last entry, an empty slot, or else the least relevant.
+        if key in keys:
+            i = keys.index(key)
+        elif 0 in keys:
+            i = keys.index(0)
+        else:
+            search_id = self.search_id
+            relevance = [(0x8000 if data & 0xff != search_id and (data >> 8) & 0xff == hashfEXACT else 0) + \
+                         (0x4000 if ((search_id - data) & 0xff) > 1 else 0) + \
+                         (data >> 16) for data in words[8:12]]
+            i = relevance.index(min(relevance))
+        data = self.search_id | hashf << 8 | depth << 16
+        result = (score & 0xffff) | move << 16
+        # Only the entry's own words are written, as other processes sharing
+        # the table may have stored the others since they were unpacked
+        offset += i * wordType.size
+        wordType.pack_into(self.data, offset, key)
+        wordType.pack_into(self.data, offset + CHECK, key ^ data ^ result)
+        wordType.pack_into(self.data, offset + DATA, data)
+        wordType.pack_into(self.data, offset + RESULT, result)
     
     def addKiller (self, ply, move):
         if self.killer1[ply] == -1:
@@ -1,6 +1,7 @@
 from __future__ import absolute_import
 from .bitboard import *
 from .ldata import *
+from .sliders import rookMask, rookTable, bishopMask, bishopTable
 from pychess.Utils.const import *
 
 #
@@ -19,34 +20,17 @@ def isAttacked (board, cord, color, ischecked=False):
     if pboards[KNIGHT] & _moveArray[KNIGHT][cord]:
         return True
     
-    rayto = fromToRay[cord]
     blocker = board.blocker
     
-    # Bishops & Queens
+    # Bishops & Queens, which a bishop on cord would see
     bitboard = (pboards[BISHOP] | pboards[QUEEN]) & _moveArray[BISHOP][cord]
-    if bitboard:
-        others = ~bitboard & blocker
-        # inlined iterBits()
-        while bitboard:
-            bit = bitboard & -bitboard
-            ray = rayto[lsb[bit]]
-            # If there is a path and no other piece stand in our way
-            if ray and not ray & others:
-                return True
-            bitboard -= bit
+    if bitboard and bitboard & bishopTable[cord][bishopMask[cord] & blocker]:
+        return True
 
     # Rooks & Queens
     bitboard = (pboards[ROOK] | pboards[QUEEN]) & _moveArray[ROOK][cord]
-    if bitboard:
-        others = ~bitboard & blocker
-        # inlined iterBits()
-        while bitboard:
-            bit = bitboard & -bitboard
-            ray = rayto[lsb[bit]]
-            # If there is a path and no other piece stand in our way
-            if ray and not ray & others:
-                return True
-            bitboard -= bit
+    if bitboard and bitboard & rookTable[cord][rookMask[cord] & blocker]:
+        return True
             
     # Pawns
     # Would a pawn of the opposite color, standing at out kings cord, be able
@@ -79,30 +63,17 @@ def getAttacks (board, cord, color):
     # Pawns
     bits |= pieces[PAWN] & _moveArray[color == WHITE and BPAWN or PAWN][cord]
     
-    rayto = fromToRay[cord]
     blocker = board.blocker
     
     # Bishops and Queens
     bitboard = (pieces[BISHOP] | pieces[QUEEN]) & _moveArray[BISHOP][cord]
-    # inlined iterBits()
-    while bitboard:
-        bit = bitboard & -bitboard
-        c = lsb[bit]
-        ray = rayto[c]
-        if ray and not clearBit(ray & blocker, c):
-            bits |= bitPosArray[c]
-        bitboard -= bit
+    if bitboard:
+        bits |= bitboard & bishopTable[cord][bishopMask[cord] & blocker]
     
     # Rooks and queens
     bitboard = (pieces[ROOK] | pieces[QUEEN]) & _moveArray[ROOK][cord]
-    # inlined iterBits()
-    while bitboard:
-        bit = bitboard & -bitboard
-        c = lsb[bit]
-        ray = rayto[c]
-        if ray and not clearBit(ray & blocker, c):
-            bits |= bitPosArray[c]
-        bitboard -= bit
+    if bitboard:
+        bits |= bitboard & rookTable[cord][rookMask[cord] & blocker]
     
     return bits
 
@@ -117,17 +88,15 @@ def getPieceMoves (board, cord, color, piece):
     if piece == KNIGHT or piece == KING:
         return pieces[piece] & _moveArray[piece][cord]
     
-    rayto = fromToRay[cord]
     blocker = board.blocker
     
     if sliders[piece]:
-        cords = pieces[piece] & _moveArray[piece][cord]
         bits = 0
-        for c in iterBits(cords):
-            ray = rayto[c]
-            if ray and not clearBit(ray & blocker, c):
-                bits |= bitPosArray[c]
-        return bits
+        if piece != ROOK:
+            bits |= bishopTable[cord][bishopMask[cord] & blocker]
+        if piece != BISHOP:
+            bits |= rookTable[cord][rookMask[cord] & blocker]
+        return pieces[piece] & bits
     
     if piece == PAWN:
         pawns = pieces[PAWN]
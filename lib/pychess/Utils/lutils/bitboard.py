@@ -1,5 +1,3 @@
-from array import array
-
 #===============================================================================
 # setBit returns a bitboard with the ith bit set
 #===============================================================================
@@ -17,46 +15,75 @@ def clearBit (bitboard, i):
 notBitPosArray = [~2**(63-i) for i in range(64)]
 
 #===============================================================================
-# firstBit returns the bit closest to 0 (A4) that is set in the board
+# The bit scans and population count below use int.bit_length() (Python 2.7)
+# and int.bit_count() (Python 3.10), which do the work in C. Interpreters
+# without them fall back to small tables.
 #===============================================================================
-def firstBit (bitboard):
-    """ Returns the index of the first non-zero bit from left """
-    if (bitboard >> 48): return lzArray[bitboard >> 48]
-    if (bitboard >> 32): return lzArray[bitboard >> 32] + 16
-    if (bitboard >> 16): return lzArray[bitboard >> 16] + 32
-    return lzArray[bitboard] + 48
 
-# The bitCount array returns the leading non-zero bit in the 16 bit
-# input argument.
+hasBitLength = hasattr(int, "bit_length")
+hasBitCount = hasattr(int, "bit_count")
+
+# The leading non-zero bit of 8 bit numbers
+lzArray = [0]*256
+for i in range(1, 256):
+    lzArray[i] = 8 - len(bin(i)) + 2
 
-lzArray = array('B',[0]*65536)
+# The cords of single bit bitboards
+lsb = {}
+for i in range(64):
+    lsb[2**i] = 63-i
 
-s = n = 1
-for i in range(16):
-    for j in range (s, s + n):
-        lzArray[j] = 16 - 1 - i
-    s += n
-    n += n
+#===============================================================================
+# firstBit returns the bit closest to 0 (A1) that is set in the board
+#===============================================================================
+if hasBitLength:
+    def firstBit (bitboard):
+        """ Returns the index of the first non-zero bit from left """
+        return 64 - bitboard.bit_length()
+else:
+    def firstBit (bitboard):
+        """ Returns the index of the first non-zero bit from left """
+        for shift in range(56, -8, -8):
+            byte = (bitboard >> shift) & 0xff
+            if byte:
+                return lzArray[byte] + 56 - shift
+        return 64
 
 #===============================================================================
 # lastBit returns the bit closest to 63 (H8) that is set in the board
 #===============================================================================
-def lastBit (bitboard):
-    return lsb [bitboard & -bitboard]
+if hasBitLength:
+    def lastBit (bitboard):
+        return 64 - (bitboard & -bitboard).bit_length()
+else:
+    def lastBit (bitboard):
+        return lsb[bitboard & -bitboard]
 
-lsb = {}
-for i in range(64):
-    lsb[2**i] = 63-i
+#===============================================================================
+# popcount returns the number of set bits in a bitboard
+#===============================================================================
+if hasBitCount:
+    popcount = int.bit_count
+else:
+    def popcount (bitboard):
+        return bin(bitboard).count("1")
 
 #===============================================================================
-# iterBits yields, or returns a list of, the positions of all set bits in a
-# bitboard. There is no guarantee of the order.
+# iterBits yields the positions of all set bits in a bitboard, from A1 towards
+# H8. Time critical code inlines this.
 #===============================================================================
-def iterBits (bitboard):
-    while bitboard:
-        bit = bitboard & -bitboard
-        yield lsb[bit]
-        bitboard -= bit
+if hasBitLength:
+    def iterBits (bitboard):
+        while bitboard:
+            length = bitboard.bit_length()
+            yield 64 - length
+            bitboard ^= 1 << (length - 1)
+else:
+    def iterBits (bitboard):
+        while bitboard:
+            cord = firstBit(bitboard)
+            yield cord
+            bitboard ^= bitPosArray[cord]
 
 #===============================================================================
 # toString returns a representation of the bitboard for debugging
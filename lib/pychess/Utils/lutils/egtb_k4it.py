@@ -1,12 +1,15 @@
 import re
+from threading import Lock, Thread
 
-from pychess.compat import urlopen
+from pychess.compat import urlopen, Queue
 from pychess.Utils.lutils.lmovegen import newMove
 from pychess.Utils.lutils.lmove import FILE, RANK
 from pychess.Utils.const import *
 from pychess.Utils.repr import reprColor
 from pychess.System.Log import log
-from pychess.System import conf
+from pychess.System import conf, fident
+from pychess.System.prefix import addUserCachePrefix
+from pychess.Utils.lutils.EgtbCache import EgtbCache
 
 URL = "http://www.k4it.de/egtb/fetch.php?action=egtb&fen="
 expression = re.compile("(\d+)-(\d+)-?(\d+)?: (Win in \d+|Draw|Lose in \d+)")
@@ -18,30 +21,87 @@ PROMOTION_FLAGS = {
 }
 
 class egtb_k4it:
-    
-    def __init__ (self):
-        self.table = {}
+    """ Probes the online tablebase at k4it.de. Positions which aren't in the
+        cache are requested by a worker thread, so probing never blocks. """
+
+    def __init__ (self, cachePath=None, url=URL):
+        if cachePath is None:
+            cachePath = addUserCachePrefix("egtb_k4it.sqlite")
+        self.cache = EgtbCache(cachePath)
+        self.url = url
+        self.requests = Queue()
+        # Maps the fen of each requested position to its board, and the
+        # (color, callback) pairs waiting for it
+        self.pending = {}
+        self.lock = Lock()
+        self.worker = None
     
     def supports (self, size):
         return size[0] < 5 and size[1] < 5 and sum(size) < 7
     
-    def scoreAllMoves (self, board, probeSoft=False):
-        global URL, expression, PROMOTION_FLAGS
+    def scoreAllMoves (self, board, probeSoft=False, callback=None):
+        """ Returns the (move, state, steps) of each move, if the position
+            is in the cache. Otherwise [] is returned, and unless probeSoft is
+            set the position is requested, and callback called with its moves
+            when they arrive. """
         fen = board.asFen().split()[0] + " w - - 0 1"
-        if (fen,board.color) in self.table:
-            return self.table[(fen,board.color)]
+        moves = self.cache.get(fen, board.color)
+        if moves is not None:
+            return moves
         
         if probeSoft or not conf.get("online_egtb_check", True):
             return []
         
+        with self.lock:
+            if fen in self.pending:
+                self.pending[fen][1].append((board.color, callback))
+            else:
+                self.pending[fen] = (board.clone(), [(board.color, callback)])
+                self.requests.put(fen)
+            if self.worker is None:
+                self.worker = Thread(target=self._run, name=fident(self._run))
+                self.worker.daemon = True
+                self.worker.start()
+        return []
+    
+    def join (self):
+        """ Waits for the requested positions to arrive """
+        self.requests.join()
+    
+    def _run (self):
+        while True:
+            fen = self.requests.get()
+            with self.lock:
+                board, waiting = self.pending[fen]
+            try:
+                self._fetch(fen, board)
+            except Exception:
+                log.exception("Fetching %s from the endgame tablebase failed" % fen)
+            try:
+                with self.lock:
+                    board, waiting = self.pending.pop(fen)
+                for color, callback in waiting:
+                    if callback is None:
+                        continue
+                    # One broken callback mustn't keep the others waiting
+                    try:
+                        callback(self.cache.get(fen, color) or [])
+                    except Exception:
+                        log.exception("Endgame tablebase callback for %s failed" % fen)
+            finally:
+                self.requests.task_done()
+    
+    def _fetch (self, fen, board):
+        global expression, PROMOTION_FLAGS
+        
         # Request the page
-        url = (URL + fen).replace(" ", "%20")
+        url = (self.url + fen).replace(" ", "%20")
         try:
             f = urlopen(url)
+            data = f.read().decode("latin_1")
         except IOError as e:
             log.warning("Unable to read endgame tablebase from the Internet: %s" % repr(e))
-            return []
-        data = f.read()
+            return
         
         # Parse
         for color, move_data in enumerate(data.split("\nNEXTCOLOR\n")):
@@ -79,7 +139,7 @@ class egtb_k4it:
                     moves.append( (move,state,steps) )
                 
                 if moves:
-                    self.table[(fen,color)] = moves
+                    self.cache.put(fen, color, moves)
                 elif color == board.color and board.opIsChecked():
                     log.warning("Asked endgametable for a won position: %s" % fen)
                 elif color == board.color:
@@ -88,11 +148,7 @@ class egtb_k4it:
             except (KeyError, ValueError):
                 log.warning("Couldn't parse %s data for position %s.\nData was: %s" %
                          (reprColor[color], fen, repr(data)))
-                self.table[(fen, color)] = [] # Don't try again.
-        
-        if (fen,board.color) in self.table:
-            return self.table[(fen,board.color)]
-        return []
+                self.cache.put(fen, color, []) # Don't try again.
     
     def scoreGame(self, board, omitDepth, probeSoft):
         scores = self.scoreAllMoves(board, probeSoft)
@@ -1,7 +1,5 @@
 from __future__ import absolute_import
 
-from functools import reduce
-from operator import or_
 from pychess.Utils.const import *
 #from pychess.Utils.lutils.lmove import RANK, FILE
 from .bitboard import *
@@ -200,6 +198,41 @@ endingKing = (
    0,  6, 12, 18, 18, 12,  6,  0
 )
 
+###############################################################################
+# Incremental evaluation, kept up to date by LBoard as pieces come and go
+###############################################################################
+
+# The material values LBoard sums up, by variant. Kings only count in the
+# variants where they can be lost like any other piece.
+NORMAL_MATERIAL = tuple(PIECE_VALUES[:KING]) + (0,)
+VARIANT_MATERIAL = {
+    CRAZYHOUSECHESS: CRAZY_PIECE_VALUES[:KING] + (0,),
+    LOSERSCHESS: (0, 1, 1, 1, 1, 1, 0),
+    SUICIDECHESS: (0, 1, 1, 1, 1, 1, 1),
+    ATOMICCHESS: ATOMIC_PIECE_VALUES,
+}
+
+# Piece square tables, by color, piece and cord. The scores are from white's
+# point of view, and split in a middlegame and an endgame half, which the
+# evaluation blends by the game phase.
+psqMg = [[[0]*64 for piece in range(KING+1)] for color in (WHITE, BLACK)]
+psqEg = [[[0]*64 for piece in range(KING+1)] for color in (WHITE, BLACK)]
+for color, sign in ((WHITE, 1), (BLACK, -1)):
+    for cord in range(64):
+        psqMg[color][PAWN][cord] = psqEg[color][PAWN][cord] = \
+            sign * pawnScoreBoard[color][cord] * 2
+        # In the endgame we want our king in the center
+        psqEg[color][KING][cord] = sign * endingKing[cord]
+
+# Atomic chess has never used the pawn square table
+atomicPsqMg = [[row if piece != PAWN else [0]*64 for piece, row in enumerate(tables)]
+               for tables in psqMg]
+atomicPsqEg = [[row if piece != PAWN else [0]*64 for piece, row in enumerate(tables)]
+               for tables in psqEg]
+VARIANT_PSQ = {
+    ATOMICCHESS: (atomicPsqMg, atomicPsqEg),
+}
+
 ###############################################################################
 # Maps for bitboards
 ###############################################################################
@@ -505,98 +538,4 @@ for cord in range(A2, H2+1):
 for cord in range(A7, H7+1):
     squarePawnMask[BLACK][cord] = squarePawnMask[BLACK][cord-8]
 
-################################################################################
-#  These tables are used to calculate rook, queen and bishop moves             #
-################################################################################
-
-ray00  = [rays[cord][5] | rays[cord][6] | 1<<(63-cord) for cord in range(64)]
-ray45  = [rays[cord][0] | rays[cord][3] | 1<<(63-cord) for cord in range(64)]
-ray90  = [rays[cord][4] | rays[cord][7] | 1<<(63-cord) for cord in range(64)]
-ray135 = [rays[cord][1] | rays[cord][2] | 1<<(63-cord) for cord in range(64)]
-
-attack00 = [{} for i in range(64)]
-attack45 = [{} for i in range(64)]
-attack90 = [{} for i in range(64)]
-attack135 = [{} for i in range(64)]
-
-cmap = [ 128, 64, 32, 16, 8, 4, 2, 1 ]
-rot1 = [ A1, A2, A3, A4, A5, A6, A7, A8 ]
-rot2 = [ A1, B2, C3, D4, E5, F6, G7, H8 ]
-rot3 = [ A8, B7, C6, D5, E4, F3, G2, H1 ]
-
-# To save time, we init a main line for each of the four directions, and next
-# we will translate it for each possible cord
-for cord in range(8):
-    for map in range(1, 256):
-        
-        # Skip entries without cord set, as cord will always be set
-        if not map & cmap[cord]:
-            continue
-        
-        # Find limits inclusive
-        cord1 = cord2 = cord
-        while cord1 > 0:
-            cord1 -= 1
-            if cmap[cord1] & map: break
-        while cord2 < 7:
-            cord2 += 1
-            if cmap[cord2] & map: break
-        
-        # Remember A1 is the left most bit
-        map00 = map << 56
-        
-        attack00[cord][map00] = \
-                fromToRay[cord][cord1] | \
-                fromToRay[cord][cord2]
-        
-        map90 = reduce(or_, (1 << 63-rot1[c] for c in iterBits(map00)))
-        attack90[rot1[cord]][map90] = \
-                fromToRay[rot1[cord]][rot1[cord1]] | \
-                fromToRay[rot1[cord]][rot1[cord2]]
-        
-        map45 = reduce(or_, (1 << 63-rot2[c] for c in iterBits(map00)))
-        attack45[rot2[cord]][map45] = \
-                fromToRay[rot2[cord]][rot2[cord1]] | \
-                fromToRay[rot2[cord]][rot2[cord2]]
-        
-        map135 = reduce(or_, (1 << 63-rot3[c] for c in iterBits(map00)))
-        attack135[rot3[cord]][map135] = \
-                fromToRay[rot3[cord]][rot3[cord1]] | \
-                fromToRay[rot3[cord]][rot3[cord2]]
-
-
 MAXBITBOARD = (1<<64)-1
-
-for r in range(A2,A8+1,8):
-    for cord in iterBits(ray00[r]):
-        attack00[cord] = dict((map >> 8, ray >> 8)
-                              for map,ray in attack00[cord-8].items())
-
-for r in range(B1,H1+1):
-    for cord in iterBits(ray90[r]):
-        attack90[cord] = dict((map >> 1, ray >> 1)
-                              for map,ray in attack90[cord-1].items())
-
-# Bottom right
-for r in range(B1,H1+1):
-    for cord in iterBits(ray45[r]):
-        attack45[cord] = dict((map << 8 & MAXBITBOARD, ray << 8 & MAXBITBOARD)
-                              for map,ray in attack45[cord+8].items())
-
-# Top left
-for r in reversed(range(A8,H8)):
-    for cord in iterBits(ray45[r]):
-        attack45[cord] = dict((map >> 8, ray >> 8)
-                              for map,ray in attack45[cord-8].items())
-
-# Top right
-for r in range(B8,H8+1):
-    for cord in iterBits(ray135[r]):
-        attack135[cord] = dict((map >> 8, ray >> 8)
-                               for map,ray in attack135[cord-8].items())
-
-# Bottom left
-for r in reversed(range(A1,H1)):
-    for cord in iterBits(ray135[r]):
-        attack135[cord] = dict((map << 8 & MAXBITBOARD, ray << 8 & MAXBITBOARD)
-                               for map,ray in attack135[cord+8].items())
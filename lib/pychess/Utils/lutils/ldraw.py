@@ -73,8 +73,13 @@ def testPlayerMatingMaterial (board, color):
 # This could be expanded by the fruit kpk draw function, which can test if a
 # certain king verus king and pawn posistion is winable.
 
-def test (board):
-    """ Test if the position is drawn. Two-fold repetitions are counted. """
-    return board.repetitionCount (drawThreshold=2) > 1 or \
+def test (board, rootPly=None):
+    """ Test if the position is drawn. Two-fold repetitions are counted. If
+        rootPly is given, a two-fold repetition only counts when the earlier
+        position lies after rootPly in the history of the board, that is
+        inside the search. Positions from the game must repeat three times. """
+    rc = board.repetitionCount ()
+    return rc >= 3 or \
+           rc == 2 and (rootPly is None or board.repeatedSince (rootPly)) or \
            testFifty (board) or \
            testMaterial (board)
@@ -23,9 +23,11 @@ def evaluateComplete (board, color):
     s, phase = evalMaterial (board, color)
     if board.variant in (LOSERSCHESS, SUICIDECHESS):
         return s
+    psq = evalPieceSquares (board, phase)
+    s += psq if color == WHITE else -psq
     s += evalBishops (board, color, phase)       - evalBishops (board, 1-color, phase)
     s += evalRooks (board, color, phase)         - evalRooks (board, 1-color, phase)
-    s += evalKing (board, color, phase)          - evalKing (board, 1-color, phase)
+    s += evalKingShelter (board, color, phase)   - evalKingShelter (board, 1-color, phase)
     s += evalKingTropism (board, color, phase)   - evalKingTropism (board, 1-color, phase)
     s += evalDoubleQR7 (board, color, phase)     - evalDoubleQR7 (board, 1-color, phase)
     s += evalDev (board, color, phase)           -  evalDev (board, 1-color, phase)
@@ -45,31 +47,14 @@ def evaluateComplete (board, color):
 ################################################################################
 
 def evalMaterial (board, color):
-    pieceCount = board.pieceCount
-    opcolor = 1-color
-    material = [0, 0]
+    # LBoard keeps the material on the board summed up, by the piece values of
+    # its variant
+    material = board.material
     if board.variant == CRAZYHOUSECHESS:
+        material = material[:]
         for piece in range(PAWN, KING):
-            material[WHITE] += CRAZY_PIECE_VALUES[piece] * pieceCount[WHITE][piece]
-            material[BLACK] += CRAZY_PIECE_VALUES[piece] * pieceCount[BLACK][piece]
             material[WHITE] += CRAZY_PIECE_VALUES[piece] * board.holding[WHITE][piece]
             material[BLACK] += CRAZY_PIECE_VALUES[piece] * board.holding[BLACK][piece]
-    elif board.variant == LOSERSCHESS:
-        for piece in range(PAWN, KING):
-            material[WHITE] += pieceCount[WHITE][piece]
-            material[BLACK] += pieceCount[BLACK][piece]
-    elif board.variant == SUICIDECHESS:
-        for piece in range(PAWN, KING+1):
-            material[WHITE] += pieceCount[WHITE][piece]
-            material[BLACK] += pieceCount[BLACK][piece]
-    elif board.variant == ATOMICCHESS:
-        for piece in range(PAWN, KING+1):
-            material[WHITE] += ATOMIC_PIECE_VALUES[piece] * pieceCount[WHITE][piece]
-            material[BLACK] += ATOMIC_PIECE_VALUES[piece] * pieceCount[BLACK][piece]
-    else:
-        for piece in range(PAWN, KING):
-            material[WHITE] += PIECE_VALUES[piece] * pieceCount[WHITE][piece]
-            material[BLACK] += PIECE_VALUES[piece] * pieceCount[BLACK][piece]
     
     phase = max(1, 8 - (material[WHITE] + material[BLACK]) // 1150)
     
@@ -77,7 +62,8 @@ def evalMaterial (board, color):
     if material[BLACK] == material[WHITE]:
         return 0, phase
     
-    matTotal = sum(material)
+    opcolor = 1-color
+    matTotal = material[WHITE] + material[BLACK]
     
     # Who is leading the game, material-wise?
     if material[color] > material[opcolor]:
@@ -90,7 +76,7 @@ def evalMaterial (board, color):
             return val, phase
         return -val, phase
     
-    pawns = pieceCount[leading][PAWN]
+    pawns = board.pieceCount[leading][PAWN]
     matDiff = material[leading] - material[1-leading]
     val = min(2400, matDiff) + \
           (matDiff * (12000-matTotal) * pawns) // (6400 * (pawns+1))
@@ -100,6 +86,16 @@ def evalMaterial (board, color):
     return -val, phase
 
     
+################################################################################
+# evalPieceSquares                                                             #
+################################################################################
+
+def evalPieceSquares (board, phase):
+    """ Blends the piece square sums LBoard keeps, from the middlegame half in
+        phase 1 to the endgame half in phase 8. The score is from white's point
+        of view. """
+    return (board.psqMg * (8-phase) + board.psqEg * (phase-1)) // 7
+
 ################################################################################
 # evalKingTropism                                                              #
 ################################################################################
@@ -113,15 +109,15 @@ queenTropism = [[0]*64 for i in range(64)]
 for pcord in range(64):
     for kcord in range(pcord+1, 64):
         pawnTropism[pcord][kcord] = pawnTropism[kcord][pcord] = \
-            (14 - taxicab[pcord][kcord])**2 * 10/169 # 0 - 10
+            (14 - taxicab[pcord][kcord])**2 * 10//169 # 0 - 10
         knightTropism[pcord][kcord] = knightTropism[kcord][pcord] = \
             (6-distance[KNIGHT][pcord][kcord])**2 * 2 # 0 - 50
         bishopTropism[pcord][kcord] = bishopTropism[kcord][pcord] = \
-            (14 - distance[BISHOP][pcord][kcord] * sdistance[pcord][kcord])**2 * 30/169 # 0 - 30 
+            (14 - distance[BISHOP][pcord][kcord] * sdistance[pcord][kcord])**2 * 30//169 # 0 - 30 
         rookTropism[pcord][kcord] = rookTropism[kcord][pcord] = \
-            (14 - distance[ROOK][pcord][kcord] * sdistance[pcord][kcord])**2 * 40/169 # 0 - 40
+            (14 - distance[ROOK][pcord][kcord] * sdistance[pcord][kcord])**2 * 40//169 # 0 - 40
         queenTropism[pcord][kcord] = queenTropism[kcord][pcord] = \
-            (14 - distance[QUEEN][pcord][kcord] * sdistance[pcord][kcord])**2 * 50/169 # 0 - 50
+            (14 - distance[QUEEN][pcord][kcord] * sdistance[pcord][kcord])**2 * 50//169 # 0 - 50
 
 tropisms = {
     PAWN: pawnTropism,
@@ -162,30 +158,93 @@ def evalKingTropism (board, color, phase):
 # evalPawnStructure                                                            #
 ################################################################################
 
-# For pawn hash, don't use buckets. Store:
-# key         high 16 bits of pawn hash key
+# The pawn hash stores buckets of two entries. The first one is kept for the
+# pawn structures with most pawns, which cost most to evaluate again, while
+# the second one is always replaced. Entries of former searches give way to
+# new ones in both. An entry consists of:
+# key         the full pawn hash of the board
+# phase       the game phase the entry was evaluated in, or 0 if unused
+# generation  pawnGeneration when the entry was stored
+# pawns       the number of pawns on the board
 # score       score from white's point of view
 # passed      bitboard of passed pawns
 # weaked      bitboard of weak pawns
-pawnEntryType = Struct('=H h Q Q')
-PAWN_HASH_SIZE  = 16384
+pawnEntryType = Struct('=Q B B B h Q Q')
+PAWN_ENTRY_SIZE = pawnEntryType.size
+PAWN_BUCKET_SIZE = 2 * PAWN_ENTRY_SIZE
+# The default size in bytes. The engine gives it this part of its memory.
+PAWN_HASH_SIZE = 2 * 1024 * 1024
+PAWN_HASH_PART = 16
 PAWN_PHASE_KEY  = (0x343d, 0x055d, 0x3d3c, 0x1a1c, 0x28aa, 0x19ee, 0x1538, 0x2a99)
-pawntable = create_string_buffer(PAWN_HASH_SIZE * pawnEntryType.size)
-    
+
+pawnBuckets = PAWN_HASH_SIZE // PAWN_BUCKET_SIZE
+pawntable = create_string_buffer(pawnBuckets * PAWN_BUCKET_SIZE)
+pawnGeneration = 0
+
+# Statistics of the probes. A collision is a miss where the bucket was taken
+# by other pawn structures.
+pawnHits = 0
+pawnMisses = 0
+pawnCollisions = 0
+
+def resizePawnTable (size):
+    """ Replaces the pawn hash by an empty one of about size bytes """
+    global pawnBuckets, pawntable
+    pawnBuckets = max(1, size // PAWN_BUCKET_SIZE)
+    pawntable = create_string_buffer(pawnBuckets * PAWN_BUCKET_SIZE)
+    resetPawnStats()
+
 def clearPawnTable():
-        memset(pawntable, 0, PAWN_HASH_SIZE * pawnEntryType.size)
+    memset(pawntable, 0, pawnBuckets * PAWN_BUCKET_SIZE)
+
+def newPawnSearch():
+    """ Ages the entries stored so far, so they are the first to go """
+    global pawnGeneration
+    pawnGeneration = (pawnGeneration + 1) & 0xff
+
+def resetPawnStats():
+    global pawnHits, pawnMisses, pawnCollisions
+    pawnHits = pawnMisses = pawnCollisions = 0
+
+def getPawnStats():
+    """ Returns the size in bytes, the hits, misses and collisions, and the
+        permille of the entries in use, from a sample of the table """
+    sample = min(pawnBuckets, 500)
+    used = 0
+    for offset in range(0, sample * PAWN_BUCKET_SIZE, PAWN_ENTRY_SIZE):
+        if pawnEntryType.unpack_from(pawntable, offset)[1]:
+            used += 1
+    return pawnBuckets * PAWN_BUCKET_SIZE, pawnHits, pawnMisses, \
+           pawnCollisions, used * 1000 // (sample * 2)
 
 def probePawns (board, phase):
-    index = (board.pawnhash % PAWN_HASH_SIZE) ^ PAWN_PHASE_KEY[phase-1]
-    key, score, passed, weaked = pawnEntryType.unpack_from(pawntable, index * pawnEntryType.size)
-    if key == (board.pawnhash >> 14) & 0xffff:
+    global pawnHits, pawnMisses, pawnCollisions
+    pawnhash = board.pawnhash
+    offset = ((pawnhash ^ PAWN_PHASE_KEY[phase-1]) % pawnBuckets) * PAWN_BUCKET_SIZE
+    key, tphase, generation, pawns, score, passed, weaked = pawnEntryType.unpack_from(pawntable, offset)
+    if key == pawnhash and tphase == phase:
+        pawnHits += 1
+        return score, passed, weaked
+    used = tphase
+    key, tphase, generation, pawns, score, passed, weaked = pawnEntryType.unpack_from(pawntable, offset + PAWN_ENTRY_SIZE)
+    if key == pawnhash and tphase == phase:
+        pawnHits += 1
         return score, passed, weaked
+    pawnMisses += 1
+    if used or tphase:
+        pawnCollisions += 1
     return None
 
 def recordPawns (board, phase, score, passed, weaked):
-    index = (board.pawnhash % PAWN_HASH_SIZE) ^ PAWN_PHASE_KEY[phase-1]
-    key = (board.pawnhash >> 14) & 0xffff
-    pawnEntryType.pack_into(pawntable, index * pawnEntryType.size, key, score, passed, weaked)
+    pawnhash = board.pawnhash
+    offset = ((pawnhash ^ PAWN_PHASE_KEY[phase-1]) % pawnBuckets) * PAWN_BUCKET_SIZE
+    pawns = board.pieceCount[WHITE][PAWN] + board.pieceCount[BLACK][PAWN]
+    key, tphase, generation, tpawns = pawnEntryType.unpack_from(pawntable, offset)[:4]
+    if tphase and generation == pawnGeneration and pawns < tpawns and \
+            (key != pawnhash or tphase != phase):
+        offset += PAWN_ENTRY_SIZE
+    pawnEntryType.pack_into(pawntable, offset, pawnhash, phase, pawnGeneration,
+                            pawns, score, passed, weaked)
 
 def cacheablePawnInfo (board, phase):
     entry = probePawns (board, phase)
@@ -201,11 +260,9 @@ def cacheablePawnInfo (board, phase):
         pawns = board.boards[color][PAWN]
         oppawns = board.boards[opcolor][PAWN]
 
+        # The pawn square table is in evalPieceSquares
         nfile = [0]*8
-        pScoreBoard = pawnScoreBoard[color]
         for cord in iterBits(pawns):
-            score += pScoreBoard[cord] * 2
-            
             # Passed pawns
             if not oppawns & passedPawnMask[color][cord]:
                 if (color == WHITE and not fromToRay[cord][cord|56] & pawns) or\
@@ -226,24 +283,24 @@ def cacheablePawnInfo (board, phase):
             
             if not (passedPawnMask[opcolor][i] & ~fileBits[cord&7] & pawns) and\
                     board.arBoard[i] != PAWN:
-                n1 = bin(pawns & moveArray[opptype][i]).count("1")
-                n2 = bin(oppawns & moveArray[ptype][i]).count("1")
+                n1 = popcount(pawns & moveArray[opptype][i])
+                n2 = popcount(oppawns & moveArray[ptype][i])
                 if n1 < n2:
                     backward = True
 
             if not backward and bitPosArray[cord] & brank7[opcolor]:
                 i = i + (color == WHITE and 8 or -8)
                 if not (passedPawnMask[opcolor][i] & ~fileBits[1] & pawns):
-                    n1 = bin(pawns & moveArray[opptype][i]).count("1")
-                    n2 = bin(oppawns & moveArray[ptype][i]).count("1")
+                    n1 = popcount(pawns & moveArray[opptype][i])
+                    n2 = popcount(oppawns & moveArray[ptype][i])
                     if n1 < n2:
                         backward = True
 
                 if not backward and bitPosArray[cord] & brank7[opcolor]:
                     i = i + (color == WHITE and 8 or -8)
                     if not (passedPawnMask[opcolor][i] & ~fileBits[1] & pawns):
-                        n1 = bin(pawns & moveArray[opptype][i]).count("1")
-                        n2 = bin(oppawns & moveArray[ptype][i]).count("1")
+                        n1 = popcount(pawns & moveArray[opptype][i])
+                        n2 = popcount(oppawns & moveArray[ptype][i])
                         if n1 < n2:
                             backward = True
             
@@ -283,7 +340,7 @@ def cacheablePawnInfo (board, phase):
             score += 10
         
         # Penalize Locked pawns
-        n = bin((pawns >> 8) & oppawns & lbox).count("1")
+        n = popcount((pawns >> 8) & oppawns & lbox)
         score -= n * 10
 
         # Switch point of view when switching colors
@@ -402,7 +459,7 @@ def evalDoubleQR7 (board, color, phase):
     boards = board.boards[color]
     opboards = board.boards[opcolor]
     
-    if bin((boards[QUEEN] | boards[ROOK]) & brank7[color]).count("1") >= 2 and \
+    if popcount((boards[QUEEN] | boards[ROOK]) & brank7[color]) >= 2 and \
         (opboards[KING] & brank8[color] or opboards[PAWN] & brank7[color]):
         return 30
     
@@ -428,13 +485,22 @@ def evalKing (board, color, phase):
     # - - - - - n - -
     # - - - K - - - R
     
+    # If we are in endgame, we want our king in the center, and theirs far away
+    if phase >= 6:
+        return endingKing[board.kings[color]]
+    
+    return evalKingShelter(board, color, phase)
+
+def evalKingShelter (board, color, phase):
+    """ Before the endgame, a castled king wants some pawns in front. The
+        centralization of the king is in evalPieceSquares. """
+    
     king = board.kings[color]
     
-    # If we are in endgame, we want our king in the center, and theirs far away
     if phase >= 6:
-        return endingKing[king]
+        return 0
     
-    # else if castled, prefer having some pawns in front
+    # If castled, prefer having some pawns in front
     elif FILE(king) not in (3,4) and RANK(king) in (0,8):
         if color == WHITE:
             if FILE(king) < 3:
@@ -448,10 +514,10 @@ def evalKing (board, color, phase):
             wall2 = wall1 << 8
         
         pawns = board.boards[color][PAWN]
-        total_in_front = bin(wall1|wall2&pawns).count("1")
+        total_in_front = popcount(wall1|wall2&pawns)
         numbermod = (0,3,6,9,7,5,3)[total_in_front]
         
-        s = bin(wall1&pawns).count("1") * 2 + bin(wall2&pawns).count("1")
+        s = popcount(wall1&pawns) * 2 + popcount(wall2&pawns)
         return (s * numbermod * 5) // 6
     
     return 0
@@ -517,10 +583,10 @@ def evalBishops (board, color, phase):
     
     if board.pieceCount[color][BISHOP] == 1:
         squareMask = WHITE_SQUARES if (bishops & WHITE_SQUARES) else BLACK_SQUARES
-        score = - bin(pawns & squareMask).count("1") \
-                - bin(oppawns & squareMask).count("1")/2
+        score = - popcount(pawns & squareMask) \
+                - popcount(oppawns & squareMask)//2
         if phase > 6:
-            score += bin(board.friends[1-color] & squareMask).count("1")
+            score += popcount(board.friends[1-color] & squareMask)
 
     return score
 
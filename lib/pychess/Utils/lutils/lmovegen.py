@@ -2,6 +2,7 @@ from __future__ import absolute_import
 
 from .bitboard import *
 from .attack import *
+from .sliders import rookMask, rookTable, bishopMask, bishopTable
 from pychess.Utils.const import *
 
 ################################################################################
@@ -87,8 +88,7 @@ def genPieceMoves(board, piece, tcord):
         blocker = board.blocker
         bishops = board.boards[board.color][BISHOP]
         for fcord in iterBits(bishops):
-            attackBoard = attack45 [fcord][ray45 [fcord] & blocker] | \
-                          attack135[fcord][ray135[fcord] & blocker]
+            attackBoard = bishopTable[fcord][bishopMask[fcord] & blocker]
             if tcord in iterBits(attackBoard & notfriends):
                 moves.add(newMove(fcord, tcord))
         return moves
@@ -97,8 +97,7 @@ def genPieceMoves(board, piece, tcord):
         blocker = board.blocker
         rooks = board.boards[board.color][ROOK]
         for fcord in iterBits(rooks):
-            attackBoard = attack00[fcord][ray00[fcord] & blocker] | \
-                          attack90[fcord][ray90[fcord] & blocker]
+            attackBoard = rookTable[fcord][rookMask[fcord] & blocker]
             if tcord in iterBits(attackBoard & notfriends):
                 moves.add(newMove(fcord, tcord))
         return moves
@@ -107,13 +106,11 @@ def genPieceMoves(board, piece, tcord):
         blocker = board.blocker
         queens = board.boards[board.color][QUEEN]
         for fcord in iterBits(queens):
-            attackBoard = attack45 [fcord][ray45 [fcord] & blocker] | \
-                          attack135[fcord][ray135[fcord] & blocker]
+            attackBoard = bishopTable[fcord][bishopMask[fcord] & blocker]
             if tcord in iterBits(attackBoard & notfriends):
                 moves.add(newMove(fcord, tcord))
 
-            attackBoard = attack00[fcord][ray00[fcord] & blocker] | \
-                          attack90[fcord][ray90[fcord] & blocker]
+            attackBoard = rookTable[fcord][rookMask[fcord] & blocker]
             if tcord in iterBits(attackBoard & notfriends):
                 moves.add(newMove(fcord, tcord))
         return moves
@@ -163,15 +160,13 @@ def genAllMoves (board, drops=True):
     
     # Rooks and Queens
     for cord in iterBits(rooks | queens):
-        attackBoard = attack00[cord][ray00[cord] & blocker] | \
-                      attack90[cord][ray90[cord] & blocker]
+        attackBoard = rookTable[cord][rookMask[cord] & blocker]
         for c in iterBits(attackBoard & notfriends):
             yield newMove(cord, c)
     
     # Bishops and Queens
     for cord in iterBits(bishops | queens):
-        attackBoard = attack45 [cord][ray45 [cord] & blocker] | \
-                      attack135[cord][ray135[cord] & blocker]
+        attackBoard = bishopTable[cord][bishopMask[cord] & blocker]
         for c in iterBits(attackBoard & notfriends):
             yield newMove(cord, c)
     
@@ -327,15 +322,13 @@ def genCaptures (board):
     
     # Rooks and Queens
     for cord in iterBits(rooks|queens):
-        attackBoard = attack00[cord][ray00[cord] & blocker] | \
-                      attack90[cord][ray90[cord] & blocker]
+        attackBoard = rookTable[cord][rookMask[cord] & blocker]
         for c in iterBits(attackBoard & enemies):
             yield newMove(cord, c)
     
     # Bishops and Queens
     for cord in iterBits(bishops|queens):
-        attackBoard = attack45 [cord][ray45 [cord] & blocker] | \
-                      attack135[cord][ray135[cord] & blocker]
+        attackBoard = bishopTable[cord][bishopMask[cord] & blocker]
         for c in iterBits(attackBoard & enemies):
             yield newMove(cord, c)
     
@@ -433,7 +426,7 @@ def genCheckEvasions (board):
     checkers = getAttacks (board, kcord, opcolor)
     
     arBoard = board.arBoard
-    if bin(checkers).count("1") == 1:
+    if popcount(checkers) == 1:
 
         # Captures of checking pieces (except by king, which we will test later)
         chkcord = firstBit (checkers)
@@ -514,6 +507,101 @@ def genCheckEvasions (board):
         if not isAttacked (board, cord, opcolor):
             yield newMove (kcord, cord)
 
+################################################################################
+#   Generate legal moves                                                       #
+################################################################################
+
+def getPinned (board, color):
+    """ Returns a dict, mapping the cord of every piece of color pinned against
+        its king, to the line the piece can still move along """
+
+    pinned = {}
+    kings = board.boards[color][KING]
+    if not kings:
+        return pinned
+
+    kcord = board.kings[color]
+    opboards = board.boards[1-color]
+    blocker = board.blocker
+    friends = board.friends[color]
+    rayto = fromToRay[kcord]
+
+    snipers = (opboards[BISHOP] | opboards[QUEEN]) & moveArray[BISHOP][kcord] | \
+              (opboards[ROOK] | opboards[QUEEN]) & moveArray[ROOK][kcord]
+    # inlined iterBits()
+    while snipers:
+        bit = snipers & -snipers
+        ray = rayto[lsb[bit]]
+        between = ray & blocker & ~bit
+        # A pin is a single friendly piece between the king and the sniper
+        if between & friends and not between & (between - 1):
+            pinned[lsb[between]] = ray
+        snipers -= bit
+    return pinned
+
+def isLegal (board, move, pinned):
+    """ Tests if a pseudo legal move, in a position where the side to move is
+        not in check, leaves the king safe. pinned is the result of getPinned
+        for the side to move. Only for variants using the normal check rules. """
+
+    flag = move >> 12
+    if flag == DROP:
+        return True
+
+    fcord = (move >> 6) & 63
+    color = board.color
+
+    if flag == ENPASSANT or flag == KING_CASTLE or flag == QUEEN_CASTLE:
+        # Enpassant may clear two cords of a rank, and in Chess960 the
+        # castling rook may shield the kings destination. Play it to see.
+        board.applyMove(move)
+        legal = not board.opIsChecked()
+        board.popMove()
+        return legal
+
+    if fcord == board.kings[color]:
+        return not isAttacked(board, move & 63, 1-color)
+
+    if fcord in pinned:
+        return bool(pinned[fcord] & bitPosArray[move & 63])
+
+    return True
+
+def genLegalMoves (board):
+    """ Generates only legal moves. Pins and checks are worked out once for the
+        position, rather than playing every move to see if it leaves the king
+        in check """
+
+    color = board.color
+
+    if board.variant == SUICIDECHESS or \
+            (not board.boards[color][KING] and board.variant != ATOMICCHESS):
+        for move in genAllMoves(board):
+            yield move
+
+    elif board.variant == ATOMICCHESS:
+        from pychess.Variants.atomic import kingExplode
+        for move in genAllMoves(board):
+            if kingExplode(board, move, color):
+                continue
+            # Exploding the opponent king takes precedence over check
+            if not kingExplode(board, move, 1-color):
+                board.applyMove(move)
+                illegal = board.opIsChecked()
+                board.popMove()
+                if illegal:
+                    continue
+            yield move
+
+    elif board.isChecked():
+        for move in genCheckEvasions(board):
+            yield move
+
+    else:
+        pinned = getPinned(board, color)
+        for move in genAllMoves(board):
+            if isLegal(board, move, pinned):
+                yield move
 
 def genDrops (board):
     color = board.color
@@ -1,30 +1,134 @@
 from __future__ import absolute_import
+import sys
 from time import time
 from random import random
 from heapq import heappush, heappop
 
-from .lmovegen import genAllMoves, genCheckEvasions, genCaptures
+from .lmovegen import genAllMoves, genCheckEvasions, genCaptures, getPinned, isLegal
+from .bitboard import popcount
 from .egtb_gaviota import egtb_gaviota
 from pychess.Utils.const import *
-from pychess.Utils.Move import Move
 from pychess.Utils.logic import validate
-from .leval import evaluateComplete
-from .lsort import getCaptureValue, getMoveValue
+from .leval import evaluateComplete, newPawnSearch
+from .lsort import getCaptureValue, sortMoves
+from .attack import staticExchangeEvaluate
+from .MovePicker import MovePicker, QUIETS
 from .lmove import toSAN
-from .ldata import MATE_VALUE, VALUE_AT_PLY
+from .ldata import MATE_VALUE, MAXPLY, PAWN_VALUE, PIECE_VALUES, VALUE_AT_PLY
 from .TranspositionTable import TranspositionTable
+from .EvalCache import EvalCache
 from pychess.Variants.atomic import kingExplode
 from . import ldraw
 
 TIMECHECK_FREQ = 500
 
+# Size of the triangular principal variation table. Quiescence and check
+# extensions may take us well beyond the nominal search depth.
+PV_MAXPLY = 128
+
 table = TranspositionTable(32 * 1024 * 1024)
+evalTable = EvalCache(1024 * 1024)
 skipPruneChance = 0
 searching = False
 nodes = 0
+# The part of the nodes searched by the quiescence search
+qnodes = 0
+# The number of static evaluations made, besides the ones found in evalTable
+evals = 0
+# The positions looked up in the endgame table, and the ones it had
+tbprobes = 0
+tbhits = 0
 endtime = 0
+nodelimit = sys.maxsize
 timecheck_counter = TIMECHECK_FREQ
 egtb = None
+# A shared flag, by which the main process stops the searches of LazySMP helpers
+stopflag = None
+
+# Selective search. Each of these can be switched off by an engine option.
+nullMove = True
+lateMoveReductions = True
+futilityPruning = True
+# Count a single repetition as a draw only inside the search tree. Positions
+# which were already repeated in the game need to come a third time.
+twoFoldInSearch = True
+# Look static evaluations up in evalTable before making them
+evalCache = True
+# Leave losing and hopeless captures out of the quiescence search
+quiescencePruning = True
+
+# The module globals a search is configured by, which LazySMP hands on to its
+# helper processes
+SEARCH_OPTIONS = ("skipPruneChance", "nullMove", "lateMoveReductions", "futilityPruning",
+                  "twoFoldInSearch", "evalCache", "quiescencePruning")
+
+# Null move pruning, in variants where having to move is no disadvantage
+NULLMOVE = NULL_MOVE << 12
+NULLMOVE_DEPTH = 2
+
+# Quiet moves after the first LMR_MOVES are searched a ply shallower first
+LMR_MOVES = 3
+LMR_DEPTH = 3
+
+# How far the static evaluation may be below alpha, by remaining depth, before
+# quiet moves are pruned as hopeless
+FUTILITY_MARGIN = (0, 2*PAWN_VALUE, 5*PAWN_VALUE)
+
+# A capture in the quiescence search must be able to bring the score this
+# close to alpha, or it isn't searched. The material evaluation rewards trading
+# down when ahead, so a capture can raise the score by up to about twice the
+# value of the captured piece, which is what we count it as.
+DELTA_MARGIN = 3*PAWN_VALUE
+
+# Variants where we don't prune selectively, as the usual assumptions don't
+# hold. Zugzwang is everywhere, and the evaluation is a poor guide.
+NOPRUNE_VARIANTS = (LOSERSCHESS, SUICIDECHESS, ATOMICCHESS)
+
+# The half width of the first aspiration window around the previous score.
+# Windows are only used from ASPIRATION_DEPTH on, as the scores of the first
+# iterations jump too much.
+ASPIRATION_WINDOW = PAWN_VALUE // 4
+ASPIRATION_DEPTH = 4
+
+# The score of a position the endgame table says is won, without saying how
+# fast. It is kept clear of the mate scores, as it isn't a mate in so many ply.
+TB_WIN_VALUE = MATE_VALUE - 2*PV_MAXPLY
+# The number of positions the endgame table results are cached for
+EGTB_CACHE_SIZE = 1 << 16
+
+# pvTable[ply][ply:pvLength[ply]] holds the best line found from ply onward
+pvTable = [[0]*PV_MAXPLY for i in range(PV_MAXPLY)]
+pvLength = [0]*PV_MAXPLY
+
+def getPv ():
+    """ Returns a copy of the principal variation found by the last search
+        from the root """
+    return pvTable[0][:pvLength[0]]
+
+def aspirationSearch (board, depth, guess=None):
+    """ Searches the root with a narrow window around guess, the score of the
+        previous iteration. Most of the time the score falls inside, and the
+        narrow window prunes far more than a full one. When it doesn't, the
+        window is widened on the side that failed, and the search repeated. """
+
+    if guess is None or depth < ASPIRATION_DEPTH or \
+            abs(guess) >= MATE_VALUE-PV_MAXPLY:
+        return alphaBeta(board, depth)
+
+    delta = ASPIRATION_WINDOW
+    alpha = max(guess-delta, -MATE_VALUE)
+    beta = min(guess+delta, MATE_VALUE)
+    while True:
+        score = alphaBeta(board, depth, alpha, beta)
+        if not searching:
+            return score
+        if score <= alpha and alpha > -MATE_VALUE:
+            alpha = max(score-delta, -MATE_VALUE)
+        elif score >= beta and beta < MATE_VALUE:
+            beta = min(score+delta, MATE_VALUE)
+        else:
+            return score
+        delta *= 2
 
 def alphaBeta (board, depth, alpha=-MATE_VALUE, beta=MATE_VALUE, ply=0):
     """ This is a alphabeta/negamax/quiescent/iterativedeepend search algorithm
@@ -35,15 +139,15 @@ def alphaBeta (board, depth, alpha=-MATE_VALUE, beta=MATE_VALUE, ply=0):
         depth was a capture, it will continue calling itself, only searching for
         captures.
         
-        It returns a tuple of
-        *   a list of the path it found through the search tree (last item being
-            the deepest)
-        *   a score of your standing the the last possition. """
+        It returns the score of your standing the the last possition. The path
+        it found through the search tree is left in pvTable, and can be read
+        from the root with getPv(). """
     
     global searching, nodes, table, endtime, timecheck_counter
     foundPv = False
     hashf = hashfALPHA
-    amove = []
+    amove = None
+    pvLength[ply] = ply
     
     ############################################################################
     # Mate distance pruning
@@ -53,40 +157,37 @@ def alphaBeta (board, depth, alpha=-MATE_VALUE, beta=MATE_VALUE, ply=0):
     MATE_IN_1 = MATE_VALUE-ply-1
 
     if beta <= MATED:
-        return [], MATED
+        return MATED
     if beta >= MATE_IN_1:
         beta = MATE_IN_1
         if alpha >= beta:
-            return [], MATE_IN_1    
+            return MATE_IN_1
 
     if board.variant == ATOMICCHESS:
-        if bin(board.boards[board.color][KING]).count("1") == 0:
-            return [], MATED
+        if popcount(board.boards[board.color][KING]) == 0:
+            return MATED
     elif board.variant == KINGOFTHEHILLCHESS:
         if board.kings[board.color-1] in (E4, E5, D4, D5):
-            return [], MATED
+            return MATED
 
     ############################################################################
-    # Look in the end game table
+    # Look in the end game table for the best move at the root
     ############################################################################
     
-    global egtb
-    if egtb:
-        tbhits = egtb.scoreAllMoves(board)
-        if tbhits:
-            move, state, steps = tbhits[0]
+    if egtb and ply == 0:
+        tbmoves = egtb.scoreAllMoves(board)
+        if tbmoves:
+            move, state, steps = tbmoves[0]
             
+            # steps is the distance to mate after the move
             if state == DRAW:
                 score = 0
-            elif board.color == WHITE:
-                if state == WHITEWON:
-                    score = MATE_VALUE-steps
-                else: score = -MATE_VALUE+steps
-            else:
-                if state == WHITEWON:
-                    score = -MATE_VALUE+steps
-                else: score = MATE_VALUE-steps
-            return [move.move], score
+            elif (state == WHITEWON) == (board.color == WHITE):
+                score = MATE_VALUE-steps-1
+            else: score = -MATE_VALUE+steps+1
+            pvTable[ply][ply] = move
+            pvLength[ply] = ply+1
+            return score
     
     ###########################################################################
     # We don't save repetition in the table, so we need to test draw before   #
@@ -95,20 +196,35 @@ def alphaBeta (board, depth, alpha=-MATE_VALUE, beta=MATE_VALUE, ply=0):
     
     # We don't adjudicate draws. Clients may have different rules for that.
     if ply > 0:
-        if ldraw.test(board):
-            return [], 0
+        if ldraw.test(board, len(board.hist_move) - ply if twoFoldInSearch else None):
+            return 0
+    
+    ############################################################################
+    # Look in the end game table for the result inside the tree
+    ############################################################################
+    
+    if egtb and ply > 0:
+        state = egtb.probeResult(board)
+        if state is not None:
+            if state == DRAW:
+                return 0
+            if (state == WHITEWON) == (board.color == WHITE):
+                return TB_WIN_VALUE-ply
+            return -TB_WIN_VALUE+ply
     
     ############################################################################
     # Look up transposition table                                              #
     ############################################################################
     # TODO: add holder to hash
+    hashmove = None
+    if ply == 0:
+        newPawnSearch()
     if board.variant != CRAZYHOUSECHESS:
         if ply == 0:
             table.newSearch()
 
         table.setHashMove (depth, -1)
         probe = table.probe (board, depth, alpha, beta)
-        hashmove = None
         if probe:
             move, score, hashf = probe
             score = VALUE_AT_PLY(score, ply)
@@ -116,14 +232,18 @@ def alphaBeta (board, depth, alpha=-MATE_VALUE, beta=MATE_VALUE, ply=0):
             table.setHashMove (depth, move)
             
             if hashf == hashfEXACT:
-                return [move], score
+                pvTable[ply][ply] = move
+                pvLength[ply] = ply+1
+                return score
             elif hashf == hashfBETA:
                 beta = min(score, beta)
             elif hashf == hashfALPHA:
                 alpha = score
                 
             if hashf != hashfBAD and alpha >= beta:
-                return [move], score
+                pvTable[ply][ply] = move
+                pvLength[ply] = ply+1
+                return score
     
     ############################################################################
     # Cheking the time                                                         #
@@ -131,7 +251,8 @@ def alphaBeta (board, depth, alpha=-MATE_VALUE, beta=MATE_VALUE, ply=0):
 
     timecheck_counter -= 1
     if timecheck_counter == 0:
-        if time() > endtime:
+        if time() > endtime or nodes > nodelimit or \
+                stopflag is not None and stopflag.value:
             searching = False
         timecheck_counter = TIMECHECK_FREQ
     
@@ -140,7 +261,7 @@ def alphaBeta (board, depth, alpha=-MATE_VALUE, beta=MATE_VALUE, ply=0):
     ############################################################################
     
     if not searching:
-        return [], -evaluateComplete(board, 1-board.color)
+        return -evaluateComplete(board, 1-board.color)
     
     ############################################################################
     # Go for quiescent search                                                  #
@@ -153,10 +274,44 @@ def alphaBeta (board, depth, alpha=-MATE_VALUE, beta=MATE_VALUE, ply=0):
             # Being in check is that serious, that we want to take a deeper look
             depth += 1
         elif board.variant in (LOSERSCHESS, SUICIDECHESS, ATOMICCHESS):
-            return [], evaluateComplete(board, board.color)
+            return evaluate(board)
         else:
-            mvs, val = quiescent(board, alpha, beta, ply)
-            return mvs, val
+            return quiescent(board, alpha, beta, ply)
+    
+    ############################################################################
+    # Null move pruning                                                        #
+    ############################################################################
+    
+    # If we can pass the move, and a reduced search still fails high, a real
+    # move would fail high too. Not so in zugzwang, which we expect in pawn
+    # endings, so we need a piece to try it. Never two null moves in a row.
+    
+    color = board.color
+    pvNode = beta - alpha > 1
+    selective = ply > 0 and not isCheck and not pvNode and \
+                board.variant not in NOPRUNE_VARIANTS
+    
+    if nullMove and selective and depth >= NULLMOVE_DEPTH and \
+            abs(beta) < MATE_VALUE-MAXPLY and \
+            board.hist_move[-1] >> 12 != NULL_MOVE and \
+            board.friends[color] & ~(board.boards[color][PAWN] | board.boards[color][KING]):
+        R = 3 if depth > 6 else 2
+        nodes += 1
+        board.applyMove(NULLMOVE)
+        val = -alphaBeta (board, depth-1-R, -beta, -beta+1, ply+1)
+        board.popMove()
+        if val >= beta and searching:
+            return beta
+    
+    ############################################################################
+    # Futility pruning                                                         #
+    ############################################################################
+    
+    # Near the horizon, a quiet move can't make up for being far below alpha
+    
+    futile = futilityPruning and selective and depth < len(FUTILITY_MARGIN) and \
+             abs(alpha) < MATE_VALUE-MAXPLY and \
+             evaluate(board) + FUTILITY_MARGIN[depth] <= alpha
     
     ############################################################################
     # Find and sort moves                                                      #
@@ -170,19 +325,29 @@ def alphaBeta (board, depth, alpha=-MATE_VALUE, beta=MATE_VALUE, ply=0):
             mlist = eva_cap if eva_cap else evasions
         if not mlist and not isCheck:
             mlist = [m for m in genAllMoves(board)]
-        moves = [(-getMoveValue(board,table,depth,m),m) for m in mlist]
+        moves = sortMoves(board, table, depth, mlist)
+        legalOnly = isCheck
+        staged = False
     elif board.variant == ATOMICCHESS:
         if isCheck:
             mlist = [m for m in genCheckEvasions(board) if not kingExplode(board, m, board.color)]
         else:
             mlist = [m for m in genAllMoves(board) if not kingExplode(board, m, board.color)]
-        moves = [(-getMoveValue(board,table,depth,m),m) for m in mlist]
+        moves = sortMoves(board, table, depth, mlist)
+        legalOnly = isCheck
+        staged = False
+    elif isCheck:
+        moves = sortMoves(board, table, depth, genCheckEvasions(board))
+        legalOnly = True
+        staged = False
     else:
-        if isCheck:
-            moves = [(-getMoveValue(board,table,depth,m),m) for m in genCheckEvasions(board)]
-        else:
-            moves = [(-getMoveValue(board,table,depth,m),m) for m in genAllMoves(board)]
-    moves.sort()
+        # Legal moves are generated stage by stage, as they are needed
+        moves = MovePicker(board, table, depth, hashmove)
+        legalOnly = True
+        staged = True
+    
+    reducible = lateMoveReductions and staged and depth >= LMR_DEPTH
+    moveCount = 0
     
     # This is needed on checkmate
     catchFailLow = None
@@ -192,31 +357,47 @@ def alphaBeta (board, depth, alpha=-MATE_VALUE, beta=MATE_VALUE, ply=0):
     ############################################################################
     
     
-    for moveValue, move in moves:
+    for move in moves:
         
         nodes += 1
         
         board.applyMove(move)
-        if not isCheck:
-            if board.opIsChecked():
-                board.popMove()
-                continue
+        if not legalOnly and board.opIsChecked():
+            board.popMove()
+            continue
         
         catchFailLow = move
+        moveCount += 1
+        
+        quiet = staged and moves.stage == QUIETS
+        if futile and quiet and not board.isChecked():
+            board.popMove()
+            continue
         
-        if foundPv:
-            mvs, val = alphaBeta (board, depth-1, -alpha-1, -alpha, ply+1)
-            val = -val
-            if val > alpha and val < beta:
-                mvs, val = alphaBeta (board, depth-1, -beta, -alpha, ply+1)
-                val = -val
+        if reducible and quiet and moveCount > LMR_MOVES and not board.isChecked():
+            # Late move reduction. Only if the move turns out better than
+            # expected, it gets the full depth.
+            val = -alphaBeta (board, depth-2, -alpha-1, -alpha, ply+1)
+            fullDepth = val > alpha
         else:
-            mvs, val = alphaBeta (board, depth-1, -beta, -alpha, ply+1)
-            val = -val
+            fullDepth = True
+        
+        if fullDepth:
+            if foundPv:
+                val = -alphaBeta (board, depth-1, -alpha-1, -alpha, ply+1)
+                if val > alpha and val < beta:
+                    val = -alphaBeta (board, depth-1, -beta, -alpha, ply+1)
+            else:
+                val = -alphaBeta (board, depth-1, -beta, -alpha, ply+1)
         
         board.popMove()
         
         if val > alpha:
+            # Our line is move, followed by the line of the child node
+            pvLength[ply] = length = pvLength[ply+1]
+            row = pvTable[ply]
+            row[ply] = move
+            row[ply+1:length] = pvTable[ply+1][ply+1:length]
             if val >= beta:
                 if searching and move>>12 != DROP:
                     table.record (board, move, VALUE_AT_PLY(beta, -ply), hashfBETA, depth)
@@ -226,10 +407,10 @@ def alphaBeta (board, depth, alpha=-MATE_VALUE, beta=MATE_VALUE, ply=0):
                             not move>>12 in PROMOTIONS:
                         table.addKiller (depth, move)
                         table.addButterfly(move, depth)
-                return [move]+mvs, beta
+                return beta
             
             alpha = val
-            amove = [move]+mvs
+            amove = move
             hashf = hashfEXACT
             foundPv = True
     
@@ -237,47 +418,68 @@ def alphaBeta (board, depth, alpha=-MATE_VALUE, beta=MATE_VALUE, ply=0):
     # Return                                                                   #
     ############################################################################
     
-    if amove:
+    if amove is not None:
         if searching:
-            table.record (board, amove[0], VALUE_AT_PLY(alpha, -ply), hashf, depth)
-            if board.arBoard[amove[0]&63] == EMPTY:
-                table.addKiller (depth, amove[0])
-        return amove, alpha
+            table.record (board, amove, VALUE_AT_PLY(alpha, -ply), hashf, depth)
+            if board.arBoard[amove&63] == EMPTY:
+                table.addKiller (depth, amove)
+        return alpha
     
     if catchFailLow:
         if searching:
             table.record (board, catchFailLow, VALUE_AT_PLY(alpha, -ply), hashf, depth)
-        return [catchFailLow], alpha
+        pvTable[ply][ply] = catchFailLow
+        pvLength[ply] = ply+1
+        return alpha
 
     # If no moves were found, this must be a mate or stalemate
     if isCheck:
-        return [], MATED
+        return MATED
     
-    return [], 0
+    return 0
+
+def evaluate (board):
+    """ The static evaluation of board for the side to move """
+    global evals
+    # The hash doesn't include the holdings of crazyhouse
+    if evalCache and board.variant != CRAZYHOUSECHESS:
+        score = evalTable.probe(board)
+        if score is not None:
+            return score
+        evals += 1
+        score = evaluateComplete(board, board.color)
+        evalTable.record(board, score)
+        return score
+    evals += 1
+    return evaluateComplete(board, board.color)
 
 def quiescent (board, alpha, beta, ply):
     
+    pvLength[ply] = ply
+    
     if skipPruneChance and random() < skipPruneChance:
-        return [], (alpha+beta)/2
+        return (alpha+beta)/2
     
-    global nodes
+    global nodes, qnodes
     
-    if ldraw.test(board):
-        return [], 0
+    if ldraw.test(board, len(board.hist_move) - ply if twoFoldInSearch else None):
+        return 0
     
     isCheck = board.isChecked()
     
     # no stand-pat when in check
     if not isCheck: 
-        value = evaluateComplete(board, board.color)
+        value = evaluate(board)
         if value >= beta:
-            return [], beta
+            return beta
         if value > alpha:
             alpha = value
     
-    amove = []
+    if ply+1 >= PV_MAXPLY:
+        return alpha
     
     heap = []
+    legalOnly = True
     
     if isCheck:
         someMove = False
@@ -286,68 +488,129 @@ def quiescent (board, alpha, beta, ply):
             # Heap.append is fine, as we don't really do sorting on the few moves
             heap.append((0, move))
         if not someMove:
-            return [], -MATE_VALUE+ply
-    else:
+            return -MATE_VALUE+ply
+    elif board.variant in (SUICIDECHESS, ATOMICCHESS):
+        legalOnly = False
         for move in genCaptures (board):
             heappush(heap, (-getCaptureValue (board, move), move))
+    elif quiescencePruning and board.variant not in NOPRUNE_VARIANTS:
+        # Captures losing material by the static exchange evaluation are left
+        # out, and so are captures which would leave us far below alpha even
+        # if they won the piece for free (delta pruning). Promotions are
+        # always searched.
+        pinned = getPinned(board, board.color)
+        arBoard = board.arBoard
+        for move in genCaptures (board):
+            if not isLegal(board, move, pinned):
+                continue
+            flag = move >> 12
+            if flag in PROMOTIONS:
+                heappush(heap, (-getCaptureValue (board, move), move))
+                continue
+            cpV = PAWN_VALUE if flag == ENPASSANT else PIECE_VALUES[arBoard[move & 63]]
+            if value + 2*cpV + DELTA_MARGIN <= alpha:
+                continue
+            # As getCaptureValue, without finding the exchange value twice
+            mpV = PIECE_VALUES[arBoard[(move >> 6) & 63]]
+            if mpV < cpV:
+                heappush(heap, (mpV - cpV, move))
+            else:
+                see = staticExchangeEvaluate (board, move)
+                if see >= 0:
+                    heappush(heap, (-see, move))
+    else:
+        pinned = getPinned(board, board.color)
+        for move in genCaptures (board):
+            if isLegal(board, move, pinned):
+                heappush(heap, (-getCaptureValue (board, move), move))
     
     while heap:
         
         nodes += 1
+        qnodes += 1
         
         v, move = heappop(heap)
         
         board.applyMove(move)
-        if not isCheck:
-            if board.opIsChecked():
-                board.popMove()
-                continue
+        if not legalOnly and board.opIsChecked():
+            board.popMove()
+            continue
         
-        mvs, val = quiescent(board, -beta, -alpha, ply+1)
-        val = -val
+        val = -quiescent(board, -beta, -alpha, ply+1)
         
         board.popMove()
         
-        if val >= beta:
-            return [move]+mvs, beta
-        
         if val > alpha:
+            # Our line is move, followed by the line of the child node
+            pvLength[ply] = length = pvLength[ply+1]
+            row = pvTable[ply]
+            row[ply] = move
+            row[ply+1:length] = pvTable[ply+1][ply+1:length]
+            if val >= beta:
+                return beta
             alpha = val
-            amove = [move]+mvs
-    
-    if amove:
-        return amove, alpha
     
-    else:
-        return [], alpha
+    return alpha
 
 
 class EndgameTable():
-    def __init__ (self):
-        self.provider = egtb_gaviota()
-    
-    def _pieceCounts (self, board):
-        return sorted([ bin(board.friends[i]).count("1") for i in range(2) ])
+    """ Probes the endgame table for the search. Only positions with few
+        enough pieces for the table are probed. The root gets the distance to
+        mate of every move, while the nodes inside the tree only ask whether
+        they are won, drawn or lost. Both are cached by hash. """
+    
+    def __init__ (self, provider=None):
+        self.provider = provider or egtb_gaviota()
+        self.maxPieces = max([n for n in range(2, 8)
+                              if self.provider.supports([n//2, n-n//2])] or [0])
+        self.results = {}
+        self.rootMoves = {}
+    
+    def _supports (self, board):
+        if board.variant != NORMALCHESS or popcount(board.blocker) > self.maxPieces:
+            return False
+        return self.provider.supports(
+            sorted([ popcount(board.friends[i]) for i in range(2) ]))
     
     def scoreAllMoves (self, lBoard):
         """ Return each move's result and depth to mate.
             
             lBoard: A low-level board structure
             Return value: a list, with best moves first, of:
-            move: A high-level move structure
+            move: A low-level move
             game_result: Either WHITEWON, DRAW, BLACKWON
-            depth: Depth to mate
+            depth: Depth to mate after the move
         """
         
-        pc = self._pieceCounts(lBoard)
-        if self.provider.supports(pc):
-            results = provider.scoreAllMoves(lBoard)
-            if results:
-                ret = []
-                for lMove, result, depth in results:
-                    ret.append( (Move(lMove), result, depth) )
-                return ret
-        return []
+        if lBoard.hash not in self.rootMoves:
+            if not self._supports(lBoard):
+                return []
+            if len(self.rootMoves) >= EGTB_CACHE_SIZE:
+                self.rootMoves.clear()
+            self.rootMoves[lBoard.hash] = self.provider.scoreAllMoves(lBoard)
+        return self.rootMoves[lBoard.hash]
+    
+    def probeResult (self, lBoard):
+        """ Return WHITEWON, DRAW or BLACKWON, or None if the position isn't in
+            the table """
+        
+        global tbprobes, tbhits
+        if lBoard.variant != NORMALCHESS or popcount(lBoard.blocker) > self.maxPieces:
+            return None
+        if lBoard.hash in self.results:
+            result = self.results[lBoard.hash]
+        else:
+            result = None
+            if self._supports(lBoard):
+                result, depth = self.provider.scoreGame(lBoard, True, False)
+            if len(self.results) >= EGTB_CACHE_SIZE:
+                self.results.clear()
+            self.results[lBoard.hash] = result
+        
+        tbprobes += 1
+        if result is not None:
+            tbhits += 1
+        return result
 
 def enableEGTB():
     global egtb
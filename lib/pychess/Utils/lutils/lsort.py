@@ -79,7 +79,6 @@ def getMoveValue (board, table, depth, move):
     
     return score
 
-def sortMoves (board, table, ply, hashmove, moves):
-    f = lambda move: getMoveValue (board, table, ply, hashmove, move)
-    moves.sort(key=f, reverse=True)
-    return moves
+def sortMoves (board, table, ply, moves):
+    f = lambda move: getMoveValue (board, table, ply, move)
+    return sorted(moves, key=f, reverse=True)
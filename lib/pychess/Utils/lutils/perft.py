@@ -0,0 +1,217 @@
+""" Perft walks the tree of legal moves to a fixed depth and counts the leaf
+    nodes. The counts are compared with known values, which makes it the
+    standard correctness test of a move generator, and the time it takes is a
+    benchmark of the board core: lmovegen and LBoard.applyMove/popMove.
+
+    Run it from the command line with
+        python -m pychess.Utils.lutils.perft --help """
+
+from __future__ import absolute_import
+from __future__ import print_function
+
+import sys
+from time import time
+
+from pychess.Utils.const import *
+from .LBoard import LBoard
+from .lmovegen import genAllMoves, genCaptures, genLegalMoves
+from .lmove import toAN
+
+################################################################################
+#   Reference positions and their known leaf counts by depth                   #
+################################################################################
+
+# Variant names are the same as used by the CECP "variant" command
+perftVariants = {
+    "normal": NORMALCHESS,
+    "fischerandom": FISCHERRANDOMCHESS,
+    "crazyhouse": CRAZYHOUSECHESS,
+    "atomic": ATOMICCHESS,
+    "suicide": SUICIDECHESS,
+    "losers": LOSERSCHESS,
+}
+
+perftPositions = [
+    # From the chessprogramming wiki
+    ("normal", "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1",
+        (20, 400, 8902, 197281)),
+    ("normal", "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1",
+        (48, 2039, 97862)),
+    ("normal", "8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1",
+        (14, 191, 2812, 43238)),
+    ("normal", "r3k2r/Pppp1ppp/1b3nbN/nP6/BBP1P3/q4N2/Pp1P2PP/R2Q1RK1 w kq - 0 1",
+        (6, 264, 9467)),
+    ("normal", "rnbq1k1r/pp1Pbppp/2p5/8/2B5/8/PPP1NnPP/RNBQK2R w KQ - 1 8",
+        (44, 1486, 62379)),
+
+    # From testing/gamefiles/frc_perftsuite.epd
+    ("fischerandom", "bqnb1rkr/pp3ppp/3ppn2/2p5/5P2/P2P4/NPP1P1PP/BQ1BNRKR w HFhf - 2 9",
+        (21, 528, 12189)),
+    ("fischerandom", "R3rkrR/8/8/8/8/8/8/r3RKRr w EGeg - 0 1",
+        (25, 586, 15541)),
+    ("fischerandom", "2rkr3/5PP1/8/5Q2/5q2/8/5pp1/2RKR3 w CEce - 0 1",
+        (51, 1904, 71005)),
+    ("fischerandom", "nrnkbqrb/pppppppp/8/8/8/8/PPPPPPPP/NRNKBQRB w BGbg - 0 1",
+        (19, 361, 7792)),
+
+    # The counts of the variants below agree with python-chess, which plays
+    # antichess for suicide. Losers was checked against the normal chess
+    # moves of python-chess, with captures made compulsory.
+    ("crazyhouse", "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR/ w KQkq - 0 1",
+        (20, 400, 8902)),
+    ("crazyhouse", "r1bqkb1r/ppp2ppp/2n5/3np3/8/2N2N2/PPPP1PPP/R1BQKB1R/Pp w KQkq - 0 5",
+        (60, 4230, 194377)),
+    ("crazyhouse", "2k5/8/8/8/8/8/8/4K3/QRBNPqrbnp w - - 0 1",
+        (301, 75353)),
+    ("crazyhouse", "4k3/1P6/8/8/8/8/6p1/4K3/Nn w - - 0 1",
+        (68, 4230, 72683)),
+
+    ("atomic", "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1",
+        (20, 400, 8902, 197326)),
+    ("atomic", "rnbqkb1r/pp1p1ppp/2p5/4N3/3Pn3/8/PPP1PPPP/RNBQKB1R w KQkq - 0 4",
+        (33, 1110, 34114)),
+    ("atomic", "8/8/8/8/8/8/2k5/rR4KR w - - 0 1",
+        (16, 157, 3776)),
+    ("atomic", "r4b1r/2kb1N2/p2Bpnp1/8/2Pp3p/1P1PPP2/P5PP/R3K2R b KQ - 0 1",
+        (4, 148, 4462)),
+    ("atomic", "rnb1kbnr/pppp1ppp/8/4p3/4P1q1/5N2/PPPP1PPP/RNBQKB1R w KQkq - 0 3",
+        (26, 992, 26976)),
+
+    ("suicide", "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w - - 0 1",
+        (20, 400, 8067, 153299)),
+    ("suicide", "rnbqkbnr/pppp1ppp/8/4p3/3P4/8/PPP1PPPP/RNBQKBNR w - - 0 2",
+        (1, 29, 42, 215, 2145)),
+    ("suicide", "8/1P6/8/8/8/8/6p1/8 w - - 0 1",
+        (5, 25, 250)),
+
+    ("losers", "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1",
+        (20, 400, 8067, 152955)),
+    ("losers", "rnbqkbnr/pppp1ppp/8/4p3/3P4/8/PPP1PPPP/RNBQKBNR w KQkq - 0 2",
+        (1, 29, 46, 201, 1950)),
+    ("losers", "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1",
+        (8, 62, 487)),
+    ("losers", "4k3/8/8/8/1b6/8/3P4/4K3 w - - 0 1",
+        (4, 4, 0)),
+]
+
+def perftMoves (board):
+    """ Returns the moves counted by perft. That is the legal moves, with
+        captures being compulsory in losers and suicide chess. Positions where
+        the game has ended, as logic.getStatus sees it, have no moves. """
+
+    color = board.color
+    if board.variant == ATOMICCHESS and not board.boards[color][KING]:
+        return []
+    if board.variant == LOSERSCHESS and \
+            board.friends[color] == board.boards[color][KING]:
+        return []
+
+    if board.variant == SUICIDECHESS:
+        moves = list(genCaptures(board))
+        if not moves:
+            moves = list(genAllMoves(board))
+        return moves
+
+    moves = list(genLegalMoves(board))
+    if board.variant == LOSERSCHESS:
+        arBoard = board.arBoard
+        captures = [m for m in moves if arBoard[m & 63] != EMPTY or m >> 12 == ENPASSANT]
+        if captures:
+            return captures
+    return moves
+
+def perft (board, depth):
+    """ Returns the number of leaf nodes depth plies below the board """
+
+    if depth <= 0:
+        return 1
+    moves = perftMoves(board)
+    # Bulk counting: the moves on the last ply are counted, not played
+    if depth == 1:
+        return len(moves)
+
+    nodes = 0
+    for move in moves:
+        board.applyMove(move)
+        nodes += perft(board, depth-1)
+        board.popMove()
+    return nodes
+
+def divide (board, depth):
+    """ Returns a list of (move, nodes) pairs, one for each move of the board,
+        where nodes is the perft count of depth-1 after the move """
+
+    result = []
+    for move in perftMoves(board):
+        board.applyMove(move)
+        result.append((move, perft(board, depth-1)))
+        board.popMove()
+    return result
+
+def perftSuite (maxdepth=3, variant=None, out=sys.stdout):
+    """ Runs perft on the reference positions, up to maxdepth or the deepest
+        known count. Prints nodes and nodes/sec for every depth and returns
+        the number of wrong counts. """
+
+    errors = 0
+    suite_nodes = 0
+    suite_time = time()
+    for name, fen, counts in perftPositions:
+        if variant is not None and name != variant:
+            continue
+        print(name, fen, file=out)
+        board = LBoard(perftVariants[name])
+        board.applyFen(fen)
+        for depth, expected in enumerate(counts[:maxdepth], 1):
+            start = time()
+            nodes = perft(board, depth)
+            spent = time() - start
+            suite_nodes += nodes
+            if nodes != expected:
+                errors += 1
+            print("  depth %d: %d nodes in %.2fs, %d n/s %s" % \
+                  (depth, nodes, spent, nodes / max(spent, 1e-6),
+                   "ok" if nodes == expected else "ERROR, expected %d" % expected),
+                  file=out)
+    suite_time = time() - suite_time
+    print("Total: %d nodes in %.2fs, %d n/s, %d errors" % \
+          (suite_nodes, suite_time, suite_nodes / max(suite_time, 1e-6), errors),
+          file=out)
+    return errors
+
+def main (argv=None):
+    import argparse
+    parser = argparse.ArgumentParser(
+        description="Counts the leaf nodes of the legal move tree. Without a "
+                    "FEN the reference positions are checked.")
+    parser.add_argument('--variant', choices=sorted(perftVariants),
+        help='the variant of the FEN, or of the reference positions to run')
+    parser.add_argument('--depth', type=int, default=3,
+        help='the depth to search (default is 3)')
+    parser.add_argument('--divide', action='store_true',
+        help='print the count of every move at the root')
+    parser.add_argument('fen', nargs='?',
+        help='a position to count instead of the reference positions')
+    args = parser.parse_args(argv)
+
+    if args.fen is None:
+        return 1 if perftSuite(args.depth, args.variant) else 0
+
+    board = LBoard(perftVariants[args.variant or "normal"])
+    board.applyFen(args.fen)
+    for depth in range(1, args.depth+1):
+        start = time()
+        if args.divide and depth == args.depth:
+            moves = divide(board, depth)
+            for move, count in sorted((toAN(board, m), c) for m, c in moves):
+                print(move, count)
+            nodes = sum(count for move, count in moves)
+        else:
+            nodes = perft(board, depth)
+        spent = time() - start
+        print("depth %d: %d nodes in %.2fs, %d n/s" % \
+              (depth, nodes, spent, nodes / max(spent, 1e-6)))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
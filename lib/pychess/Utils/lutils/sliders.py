@@ -0,0 +1,87 @@
+from __future__ import absolute_import
+
+from .bitboard import bitPosArray, firstBit, lastBit, iterBits
+from .ldata import rays
+
+################################################################################
+#   Attack tables for the sliding pieces. The attacks of a slider depend only  #
+#   on the pieces standing on its rays, leaving out the last cord of every     #
+#   ray, which is attacked whether occupied or not. Masking the blocker board  #
+#   with these relevant cords gives a key, which indexes a table holding the   #
+#   attacks for every possible occupancy:                                      #
+#       rookTable[cord][rookMask[cord] & blocker]                              #
+#   This is what magic bitboards do with a multiply and a shift, to turn the   #
+#   key into a small array index. In Python the multiply of 64 bit numbers     #
+#   costs more than hashing the key, so we leave that part to the dicts.       #
+#   The tables hold 102400 rook and 5248 bishop entries.                       #
+################################################################################
+
+# The indexes of rays in ldata.rays
+BISHOP_RAYS = (0, 1, 2, 3)
+ROOK_RAYS = (4, 5, 6, 7)
+
+def _subsets (mask):
+    """ Yields every subset of the bits in mask, starting with 0 """
+    subset = 0
+    while True:
+        yield subset
+        subset = (subset - mask) & mask
+        if not subset:
+            break
+
+def _rayAttacks (cord, direction):
+    """ Returns a list of (occupancy, attacks) for every occupancy of the
+        relevant cords of the ray """
+    ray = rays[cord][direction]
+    if not ray:
+        return [(0, 0)]
+    cords = list(iterBits(ray))
+    # The ray moves away from cord, so the nearest cord is the lowest or the
+    # highest one
+    ascending = cords[0] > cord
+    farthest = max(cords) if ascending else min(cords)
+    mask = ray & ~bitPosArray[farthest]
+
+    result = []
+    for occupancy in _subsets(mask):
+        if occupancy:
+            nearest = firstBit(occupancy) if ascending else lastBit(occupancy)
+            # Everything up to and including the first blocker
+            attacks = ray & ~rays[nearest][direction]
+        else:
+            attacks = ray
+        result.append((occupancy, attacks))
+    return result
+
+def _buildTables (directions):
+    masks = []
+    tables = []
+    for cord in range(64):
+        # Combine the occupancies of the single rays, which don't overlap
+        table = {0: 0}
+        for direction in directions:
+            part = _rayAttacks(cord, direction)
+            table = dict((occupancy | o, attacks | a)
+                         for occupancy, attacks in table.items()
+                         for o, a in part)
+        mask = 0
+        for occupancy in table:
+            mask |= occupancy
+        masks.append(mask)
+        tables.append(table)
+    return masks, tables
+
+rookMask, rookTable = _buildTables(ROOK_RAYS)
+bishopMask, bishopTable = _buildTables(BISHOP_RAYS)
+
+def rookAttacks (cord, blocker):
+    """ The cords a rook on cord attacks, with the pieces of blocker in the
+        way. Time critical code inlines this. """
+    return rookTable[cord][rookMask[cord] & blocker]
+
+def bishopAttacks (cord, blocker):
+    return bishopTable[cord][bishopMask[cord] & blocker]
+
+def queenAttacks (cord, blocker):
+    return rookTable[cord][rookMask[cord] & blocker] | \
+           bishopTable[cord][bishopMask[cord] & blocker]
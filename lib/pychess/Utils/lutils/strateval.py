@@ -103,7 +103,7 @@ def offencive_moves_rook (model, ply, phase):
     ffile = fileBits[FILE(FCORD(move))]
     tfile = fileBits[FILE(tcord)]
 
-    if ffile & pawns and not tfile & pawns and bin(pawns).count("1") >= 3:
+    if ffile & pawns and not tfile & pawns and popcount(pawns) >= 3:
         if not tfile & oppawns:
             yield _("moves a rook to an open file")
         else: yield _("moves an rook to a half-open file")
@@ -306,9 +306,9 @@ def offencive_moves_pin (model, ply, phase):
 
     ray = 0
     if piece in (BISHOP, QUEEN):
-        ray |= (ray45[tcord] | ray135[tcord]) & ~(ray45[fcord] | ray135[fcord])
+        ray |= moveArray[BISHOP][tcord] & ~moveArray[BISHOP][fcord]
     if piece in (ROOK, QUEEN):
-        ray |= (ray00[tcord] | ray90[tcord]) & ~(ray00[fcord] | ray90[fcord])
+        ray |= moveArray[ROOK][tcord] & ~moveArray[ROOK][fcord]
 
     if ray:
         for c in iterBits(ray & board.friends[board.color]):
@@ -321,7 +321,7 @@ def offencive_moves_pin (model, ply, phase):
                 continue
             # There should be exactly one opponent piece in between
             op = clearBit(ray & board.friends[board.color], c)
-            if bin(op).count("1") != 1:
+            if popcount(op) != 1:
                 continue
             # The king can't be pinned
             pinned = lastBit(op)
@@ -420,10 +420,10 @@ def state_pawn (model, ply, phase):
     for file in range(8):
         bits = fileBits[file]
 
-        count = bin(pawns & bits).count("1")
-        oldcount = bin(oldpawns & bits).count("1")
-        opcount = bin(oppawns & bits).count("1")
-        oldopcount = bin(oldoppawns & bits).count("1")
+        count = popcount(pawns & bits)
+        oldcount = popcount(oldpawns & bits)
+        opcount = popcount(oppawns & bits)
+        oldopcount = popcount(oldoppawns & bits)
 
         # Single pawn -> double pawns
         if count > oldcount >= 1:
@@ -624,10 +624,10 @@ def tip_pawnStorm (model, ply, phase):
 
     wking = board.boards[WHITE][KING]
     bking = board.boards[BLACK][KING]
-    wleft = bin(board.boards[WHITE][PAWN] & left).count("1")
-    wright = bin(board.boards[WHITE][PAWN] & right).count("1")
-    bleft = bin(board.boards[BLACK][PAWN] & left).count("1")
-    bright = bin(board.boards[BLACK][PAWN] & right).count("1")
+    wleft = popcount(board.boards[WHITE][PAWN] & left)
+    wright = popcount(board.boards[WHITE][PAWN] & right)
+    bleft = popcount(board.boards[BLACK][PAWN] & left)
+    bright = popcount(board.boards[BLACK][PAWN] & right)
 
     if wking & left and bking & right:
         if wright > bright:
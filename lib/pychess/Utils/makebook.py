@@ -0,0 +1,230 @@
+""" Builds Polyglot opening books from pgn files.
+
+    The moves played in each position are counted in a dictionary. When it
+    grows to maxEntries, it is sorted and spilled to a temporary file, and
+    in the end the spilled runs are merged into the book. This way the memory
+    used doesn't grow with the number of games read. """
+
+from __future__ import print_function
+
+import sys
+from heapq import merge
+from itertools import groupby
+from operator import itemgetter
+from struct import Struct
+from tempfile import TemporaryFile
+
+from pychess.Utils.const import *
+from pychess.Utils.book import entrystruct
+from pychess.Utils.lutils.LBoard import LBoard
+from pychess.Utils.lutils.lmove import toPolyglot, parseSAN, ParsingError
+from pychess.Savers.pgnbase import PgnBase, pgn_iter, pattern, \
+    VARIATION_START, VARIATION_END, RESULT, FULL_MOVE, MOVE
+from pychess.System.protoopen import protoopen
+
+# A counted move in a spilled run is:
+# key         the position's hash
+# move        the Polyglot move
+# games       the number of times it has been played
+# points      2 for each win and 1 for each draw of the side playing it
+runstruct = Struct(">QHII")
+RUN_CHUNK = 4096
+
+DEFAULT_MAX_PLY = 40
+DEFAULT_MIN_GAMES = 3
+DEFAULT_MAX_ENTRIES = 1 << 20
+
+LBoard_FEN_START = LBoard(NORMALCHESS)
+LBoard_FEN_START.applyFen(FEN_START)
+
+class BookBuilder:
+    def __init__ (self, maxPly=DEFAULT_MAX_PLY, minGames=DEFAULT_MIN_GAMES,
+                  minElo=0, maxEntries=DEFAULT_MAX_ENTRIES):
+        self.maxPly = maxPly
+        self.minGames = minGames
+        self.minElo = minElo
+        self.maxEntries = maxEntries
+
+        # Maps key << 16 | move to games << 32 | points. Packing both into
+        # ints keeps the dictionary small, and sorting it by key sorts it the
+        # way the book is sorted.
+        self.counts = {}
+        self.runs = []
+
+        self.gamesRead = 0
+        self.gamesUsed = 0
+
+    def close (self):
+        for run in self.runs:
+            run.close()
+        self.runs = []
+        self.counts = {}
+
+    def _count (self, k, points):
+        self.counts[k] = self.counts.get(k, 0) + (1 << 32 | points)
+        if len(self.counts) >= self.maxEntries:
+            self._spill()
+
+    def _spill (self):
+        run = TemporaryFile()
+        for k, value in sorted(self.counts.items()):
+            run.write(runstruct.pack(k >> 16, k & 0xffff, value >> 32, value & 0xffffffff))
+        self.runs.append(run)
+        self.counts = {}
+
+    def _readRun (self, run):
+        run.seek(0)
+        while True:
+            data = run.read(runstruct.size * RUN_CHUNK)
+            if not data:
+                break
+            for offset in range(0, len(data), runstruct.size):
+                key, move, games, points = runstruct.unpack_from(data, offset)
+                yield key << 16 | move, games << 32 | points
+
+    def _getPoints (self, result):
+        """ The points the white and the black player score """
+        if result == WHITEWON:
+            return (2, 0)
+        if result == BLACKWON:
+            return (0, 2)
+        return (1, 1)
+
+    def _hasElo (self, cf):
+        for tag in ("WhiteElo", "BlackElo"):
+            elo = cf._getTag(0, tag)
+            if not elo or not elo.isdigit() or int(elo) < self.minElo:
+                return False
+        return True
+
+    def _readMainLine (self, movetext, board):
+        """ Plays the main line of movetext on board, and returns the
+            (key << 16 | move, color) of each move before maxPly, or None if a
+            move can't be parsed. This is a lot faster than parse_string, as
+            it doesn't keep the variations, or a board for each ply. """
+        played = []
+        depth = 0
+        for m in pattern.finditer(movetext):
+            group = m.lastindex
+            if group == VARIATION_START:
+                depth += 1
+            elif group == VARIATION_END:
+                depth -= 1
+            elif depth > 0:
+                continue
+            elif group == RESULT:
+                break
+            elif group == FULL_MOVE:
+                if board.plyCount >= self.maxPly:
+                    break
+                try:
+                    move = parseSAN(board, m.group(MOVE))
+                except ParsingError:
+                    return None
+                played.append((board.hash << 16 | toPolyglot(board, move), board.color))
+                board.applyMove(move)
+        return played
+
+    def addPgn (self, file):
+        """ Counts the games of a pgn file, which is read a game at a time.
+            Unfinished games, variant games and games with errors are
+            skipped, as are games with players below minElo. """
+        for game in pgn_iter(file):
+            self.gamesRead += 1
+            cf = PgnBase([game])
+            result = cf.get_result(0)
+            if result == RUNNING or cf.get_variant(0):
+                continue
+            if self.minElo and not self._hasElo(cf):
+                continue
+
+            fenstr = cf._getTag(0, "FEN")
+            if fenstr:
+                board = LBoard(NORMALCHESS)
+                try:
+                    board.applyFen(fenstr)
+                except SyntaxError:
+                    continue
+            else:
+                board = LBoard_FEN_START.clone()
+
+            played = self._readMainLine(cf.get_movetext(0), board)
+            if played is None:
+                continue
+
+            points = self._getPoints(result)
+            for k, color in played:
+                self._count(k, points[color])
+            self.gamesUsed += 1
+
+    def write (self, path):
+        """ Writes the book to path, and returns the number of entries in it.
+            Moves played in less than minGames games are left out. """
+        runs = [self._readRun(run) for run in self.runs]
+        runs.append(iter(sorted(self.counts.items())))
+
+        entries = 0
+        with open(path, "wb") as bookFile:
+            for key, moves in groupby(merge(*runs), lambda item: item[0] >> 16):
+                position = []
+                for k, values in groupby(moves, itemgetter(0)):
+                    value = sum(v for _k, v in values)
+                    games, points = value >> 32, value & 0xffffffff
+                    if games >= self.minGames:
+                        position.append((points, games, k & 0xffff))
+                if not position:
+                    continue
+
+                # The weight of a move is the points scored with it. The
+                # entries only have 16 bits, so positions played more than
+                # that are scaled down.
+                position.sort(reverse=True)
+                top = max(max(points, games) for points, games, move in position)
+                for points, games, move in position:
+                    if top > 0xffff:
+                        points = points * 0xffff // top
+                        games = games * 0xffff // top
+                    bookFile.write(entrystruct.pack(key, move, points, games, points))
+                entries += len(position)
+        return entries
+
+def main (argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description="Builds a Polyglot opening book from pgn files.")
+    parser.add_argument('pgnfiles', nargs='+', metavar='pgnfile',
+        help='a pgn file to read games from')
+    parser.add_argument('-o', '--output', default="book.bin",
+        help='the book file to write (default is book.bin)')
+    parser.add_argument('--max-ply', type=int, default=DEFAULT_MAX_PLY,
+        help='ignore moves after this ply (default is %d)' % DEFAULT_MAX_PLY)
+    parser.add_argument('--min-games', type=int, default=DEFAULT_MIN_GAMES,
+        help='leave out moves played in fewer games (default is %d)' % DEFAULT_MIN_GAMES)
+    parser.add_argument('--min-elo', type=int, default=0,
+        help='only read games where both players are rated at least this')
+    parser.add_argument('--max-entries', type=int, default=DEFAULT_MAX_ENTRIES,
+        help='moves to count in memory before spilling them to a temporary '
+             'file (default is %d)' % DEFAULT_MAX_ENTRIES)
+    args = parser.parse_args(argv)
+
+    builder = BookBuilder(args.max_ply, args.min_games, args.min_elo,
+                          args.max_entries)
+    try:
+        for path in args.pgnfiles:
+            try:
+                pgnfile = protoopen(path)
+            except IOError as e:
+                print("%s: %s" % (path, e), file=sys.stderr)
+                return 1
+            try:
+                builder.addPgn(pgnfile)
+            finally:
+                pgnfile.close()
+            print("%s: %d games read, %d used" % (path, builder.gamesRead, builder.gamesUsed))
+        entries = builder.write(args.output)
+    finally:
+        builder.close()
+
+    print("Wrote %d entries to %s" % (entries, args.output))
+    return 0
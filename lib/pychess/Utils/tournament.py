@@ -0,0 +1,119 @@
+""" Schedules and scores engine tournaments.
+
+    A schedule is a list of pairings. Every two players meet in a pair of
+    games with the colors swapped, and both games start from the same
+    opening, so neither player is favoured by the openings drawn. """
+
+from __future__ import division
+
+import math
+from collections import namedtuple
+from itertools import combinations
+
+from pychess.Utils.const import *
+
+Pairing = namedtuple('Pairing', 'number round white black opening')
+# 'number'    the game's place in the schedule, counting from 0
+# 'round'     the round of the game, counting from 1
+# 'white'     the index of the white player
+# 'black'     the index of the black player
+# 'opening'   the index of the opening to start from
+
+def _schedule (matches, rounds, openings):
+    pairings = []
+    for rnd in range(1, rounds+1):
+        for a, b in matches:
+            opening = len(pairings) // 2 % max(openings, 1)
+            for white, black in ((a, b), (b, a)):
+                pairings.append(Pairing(len(pairings), rnd, white, black, opening))
+    return pairings
+
+def roundRobin (players, rounds=1, openings=1):
+    """ Every one of the players meets every other in each round """
+    return _schedule(list(combinations(range(players), 2)), rounds, openings)
+
+def gauntlet (players, rounds=1, openings=1):
+    """ The first of the players meets every other in each round """
+    return _schedule([(0, i) for i in range(1, players)], rounds, openings)
+
+def eloDifference (wins, draws, losses):
+    """ Returns the rating difference to the opponents implied by the score,
+        and the margin of its 95% confidence interval. The difference is
+        infinite when all games were won or lost. """
+    games = wins + draws + losses
+    if games == 0:
+        return 0., 0.
+    score = (wins + draws / 2) / games
+    deviation = math.sqrt((wins * (1 - score)**2 + draws * (0.5 - score)**2 +
+                           losses * score**2) / games / games)
+
+    def elo (score):
+        if score <= 0:
+            return -float('inf')
+        if score >= 1:
+            return float('inf')
+        return -400 * math.log10(1 / score - 1)
+
+    margin = (elo(score + 1.96*deviation) - elo(score - 1.96*deviation)) / 2
+    return elo(score), margin
+
+def likelihoodOfSuperiority (wins, losses):
+    """ The probability that a player is stronger than its opponents. Draws
+        say nothing about this, and are left out. """
+    if wins + losses == 0:
+        return 0.5
+    return 0.5 * (1 + math.erf((wins - losses) / math.sqrt(2 * (wins + losses))))
+
+class Scoreboard:
+    """ Keeps the results of the games between the players of a tournament """
+
+    def __init__ (self, players):
+        # results[a][b] is the [wins, draws, losses] of a against b
+        self.results = [[[0, 0, 0] for b in range(players)] for a in range(players)]
+
+    def addResult (self, white, black, status):
+        if status == WHITEWON:
+            self.results[white][black][0] += 1
+            self.results[black][white][2] += 1
+        elif status == BLACKWON:
+            self.results[white][black][2] += 1
+            self.results[black][white][0] += 1
+        elif status == DRAW:
+            self.results[white][black][1] += 1
+            self.results[black][white][1] += 1
+
+    def getScore (self, player, opponents=None):
+        """ The wins, draws and losses of player against opponents, by
+            default all the other players """
+        if opponents is None:
+            opponents = range(len(self.results))
+        wins = draws = losses = 0
+        for opponent in opponents:
+            w, d, l = self.results[player][opponent]
+            wins += w
+            draws += d
+            losses += l
+        return wins, draws, losses
+
+    def getStandings (self):
+        """ A (player, wins, draws, losses) tuple for each player, the best
+            scoring player first """
+        standings = [(player,) + self.getScore(player)
+                     for player in range(len(self.results))]
+        standings.sort(key=lambda s: (2*s[1] + s[2], s[1]), reverse=True)
+        return standings
+
+def formatScore (wins, draws, losses):
+    """ A line like '+5 =3 -2  65.0%  Elo +108 +/- 172  LOS 89.9%' """
+    games = wins + draws + losses
+    elo, margin = eloDifference(wins, draws, losses)
+    text = "+%d =%d -%d" % (wins, draws, losses)
+    if games:
+        text += "  %.1f%%" % (100 * (wins + draws / 2) / games)
+    if math.isinf(elo):
+        text += "  Elo %sinf" % ("+" if elo > 0 else "-")
+    else:
+        text += "  Elo %+d" % round(elo)
+        if not math.isinf(margin):
+            text += " +/- %d" % round(margin)
+    return text + "  LOS %.1f%%" % (100 * likelihoodOfSuperiority(wins, losses))
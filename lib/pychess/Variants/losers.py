@@ -2,6 +2,7 @@
 
 from pychess.Utils.const import *
 from pychess.Utils.Board import Board
+from pychess.Utils.lutils.bitboard import popcount
 
 class LosersBoard(Board):
     variant = LOSERSCHESS
@@ -18,4 +19,4 @@ class LosersChess:
 
 
 def testKingOnly(board):
-    return bin(board.friends[board.color]).count("1") == 1
+    return popcount(board.friends[board.color]) == 1
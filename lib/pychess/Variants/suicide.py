@@ -3,6 +3,7 @@ from __future__ import print_function
 
 from pychess.Utils.const import *
 from pychess.Utils.Board import Board
+from pychess.Utils.lutils.bitboard import popcount
 
 SUICIDESTART = "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w - - 0 1"
 
@@ -25,7 +26,7 @@ class SuicideChess:
     variant_group = VARIANTS_OTHER_NONSTANDARD
 
 def pieceCount(board, color):
-    return bin(board.friends[color]).count("1")
+    return popcount(board.friends[color])
 
 if __name__ == '__main__':
     from pychess.Utils.Move import Move
@@ -138,6 +138,7 @@ class GameWidget (GObject.GObject):
         gamemodel.connect("analyzer_added", self.analyzer_added)
         gamemodel.connect("analyzer_removed", self.analyzer_removed)
         gamemodel.connect("analyzer_resumed", self.analyzer_resumed)
+        gamemodel.connect("game_terminated", self.game_terminated)
         gamemodel.connect("analyzer_paused", self.analyzer_paused)
         self.players_changed(gamemodel)
         if self.gamemodel.display_text:
@@ -405,6 +406,15 @@ class GameWidget (GObject.GObject):
         self.menuitems[analyzer_type + "_mode"].sensitive = True
         return False
     
+    def game_terminated (self, gamemodel):
+        # The analyzers may be given to another game by the engine pool
+        for analyzer in list(gamemodel.spectators.values()):
+            if analyzer in self.cids:
+                if analyzer.handler_is_connected(self.cids[analyzer]):
+                    analyzer.disconnect(self.cids[analyzer])
+                del self.cids[analyzer]
+        return False
+    
     def analyzer_removed (self, gamemodel, analyzer, analyzer_type):
         self._set_arrow(analyzer_type, None)
         #self.menuitems[analyzer_type + "_mode"].active = False
@@ -158,5 +158,5 @@ setup (
     package_dir      = {'': 'lib'},
     packages         = PACKAGES,
     data_files       = DATA_FILES,
-    scripts          = ['pychess']
+    scripts          = ['pychess', 'pychess-makebook']
 )
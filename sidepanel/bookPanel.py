@@ -143,11 +143,15 @@ class EngineAdvisor(Advisor):
         self.linesExpected   = 1
         self.boardview = boardview
         
-        self.connection = engine.connect("analyze", self.on_analyze)
-        engine.connect("readyForOptions", self.on_ready_for_options)
+        self.cids = [engine.connect("analyze", self.on_analyze),
+                     engine.connect("readyForOptions", self.on_ready_for_options)]
     
     def _del (self):
-        self.engine.disconnect(self.connection)
+        # Pooled engines outlive the game
+        for cid in self.cids:
+            if self.engine.handler_is_connected(cid):
+                self.engine.disconnect(cid)
+        self.cids = []
     
     def _create_new_expected_lines(self):
         parent = self.empty_parent()
@@ -440,6 +444,7 @@ class Sidepanel (object):
         gmwidg.gamemodel.connect("analyzer_removed", self.on_analyzer_removed)
         gmwidg.gamemodel.connect("analyzer_paused", self.on_analyzer_paused)
         gmwidg.gamemodel.connect("analyzer_resumed", self.on_analyzer_resumed)
+        gmwidg.gamemodel.connect("game_terminated", self.on_game_terminated)
         
         def on_opening_check(none):
             if conf.get("opening_check", 0):
@@ -491,10 +496,16 @@ class Sidepanel (object):
         for advisor in self.advisors:
             if advisor.mode == analyzer_type:
                 advisor.active = False
+                advisor._del()
                 parent = advisor.empty_parent()
                 self.store.remove(parent)
                 self.advisors.remove(advisor)
 
+    def on_game_terminated(self, gamemodel):
+        for advisor in self.advisors:
+            if isinstance(advisor, EngineAdvisor):
+                advisor._del()
+
     def on_analyzer_paused(self, gamemodel, analyzer, analyzer_type):
         for advisor in self.advisors:
             if advisor.mode == analyzer_type:
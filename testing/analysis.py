@@ -6,6 +6,7 @@ from pychess.Utils.Move import listToMoves
 from pychess.Utils.Cord import Cord
 from pychess.Utils.Board import Board
 from pychess.Players.CECPEngine import CECPEngine
+from pychess.Players.engineParsers import coalesceAnalysisLines
 
 from pychess.compat import Queue
 
@@ -97,5 +98,19 @@ class CECPTests(EmittingTestCase):
                        "10. -1883 59 107386433     Kf7 a8=Q Ke6 Qa6+ Ke5 Qd6+ Kf5",
                        ['Kf7','a8=Q','Ke6','Qa6+','Ke5','Qd6+','Kf5'], -1883, "10.")
 
+class UCITests(unittest.TestCase):
+    
+    def testCoalesce(self):
+        """ Test superseded analysis lines are left out """
+        lines = ["info depth 10 multipv 1 score cp 20 pv e2e4\n",
+                 "info depth 10 multipv 2 score cp 10 pv d2d4\n",
+                 "info nodes 1000 nps 500\n",
+                 "info depth 11 multipv 1 score cp 25 pv e2e4 e7e5\n",
+                 "bestmove e2e4\n",
+                 "info depth 1 score cp 0 pv g1f3\n",
+                 "info depth 2 score cp 5 pv g1f3 g8f6\n"]
+        self.assertEqual(coalesceAnalysisLines(lines),
+                         [lines[1], lines[2], lines[3], lines[4], lines[6]])
+
 if __name__ == '__main__':
     unittest.main()
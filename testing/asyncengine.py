@@ -0,0 +1,115 @@
+import os
+import sys
+import unittest
+import subprocess
+
+from pychess.compat import PY2
+from pychess.Utils.Board import Board
+from pychess.Utils.Move import parseAny, listToMoves
+from pychess.Utils.const import *
+
+if not PY2:
+    import asyncio
+    from pychess.Players.AsyncEngine import AsyncUCIEngine, AsyncCECPEngine, \
+        Limit, Clock
+
+UCI = """
+import sys
+for line in iter(sys.stdin.readline, ""):
+    parts = line.split()
+    if parts[0] == "uci":
+        print("id name Fake UCI")
+        print("option name MultiPV type spin default 1 min 1 max 4")
+        print("uciok")
+    elif parts[0] == "isready":
+        print("readyok")
+    elif parts[0] == "go" and "depth" in parts:
+        for depth in range(1, int(parts[parts.index("depth")+1])+1):
+            print("info depth %d multipv 1 score cp %d pv e2e4 e7e5" % (depth, 10*depth))
+        print("bestmove e2e4")
+    elif parts[0] == "go":
+        print("bestmove d2d4")
+    elif parts[0] == "quit":
+        break
+    sys.stdout.flush()
+"""
+
+CECP = """
+import sys
+for line in iter(sys.stdin.readline, ""):
+    parts = line.split()
+    if parts[0] == "protover":
+        print('feature myname="Fake CECP" setboard=1 analyze=1 done=1')
+    elif parts[0] == "analyze":
+        print("  1     15      0        10 e4 e5")
+        print("  2     20      0        20 e4 e5 Nf3")
+    elif parts[0] == "go":
+        print("move g1f3")
+    elif parts[0] == "quit":
+        break
+    sys.stdout.flush()
+"""
+
+# Makes gi unimportable, as if it wasn't installed
+WITHOUT_GI = """
+import sys
+sys.modules["gi"] = None
+import pychess.Players.AsyncEngine
+assert not [name for name in sys.modules if name.startswith("gi.")]
+"""
+
+@unittest.skipIf(PY2, "the asyncio engines need Python 3")
+class AsyncEngineTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        self.board = Board(setup=True)
+
+    def tearDown(self):
+        self.loop.close()
+
+    def _run(self, future):
+        return self.loop.run_until_complete(asyncio.wait_for(future, 10))
+
+    def testWithoutGi(self):
+        """Testing that the asyncio engines can be imported without gi"""
+        import pychess
+        lib = os.path.dirname(os.path.dirname(os.path.abspath(pychess.__file__)))
+        env = dict(os.environ, PYTHONPATH=lib)
+        process = subprocess.Popen([sys.executable, "-c", WITHOUT_GI], env=env,
+                                   stderr=subprocess.PIPE)
+        error = process.communicate()[1]
+        self.assertEqual(process.returncode, 0, error.decode())
+
+    def testUCI(self):
+        """Testing a UCI engine driven by asyncio"""
+        engine = AsyncUCIEngine(sys.executable, ["-c", UCI], loop=self.loop)
+        self._run(engine.start())
+        self.assertEqual(repr(engine), "Fake UCI")
+        self.assertEqual(engine.options["MultiPV"]["max"], 4)
+
+        analysis = self._run(engine.analyse(self.board, Limit(depth=3)))
+        moves = listToMoves(self.board, ["e2e4", "e7e5"], AN)
+        self.assertEqual(analysis, [(moves, 30, "3")])
+
+        move = self._run(engine.play(self.board, Clock(60, 60, 1)))
+        self.assertEqual(move, parseAny(self.board, "d2d4"))
+        self.assertEqual(self._run(engine.quit()), 0)
+
+    def testCECP(self):
+        """Testing a CECP engine driven by asyncio"""
+        engine = AsyncCECPEngine(sys.executable, ["-c", CECP], loop=self.loop)
+        self._run(engine.start())
+        self.assertEqual(repr(engine), "Fake CECP")
+
+        analysis = self._run(engine.analyse(self.board, Limit(depth=2)))
+        moves = listToMoves(self.board, ["e4", "e5", "Nf3"], SAN)
+        self.assertEqual(analysis, [(moves, 20, "2")])
+
+        move = self._run(engine.play(self.board, Clock(60, 60)))
+        self.assertEqual(move, parseAny(self.board, "g1f3"))
+        self.assertEqual(self._run(engine.quit()), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
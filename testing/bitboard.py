@@ -51,5 +51,11 @@ class BitboardTestCase(unittest.TestCase):
             itered = sorted(iterBits(board))
             self.assertEqual(positions, itered)
 
+    def test4(self):
+        """Testing popcount"""
+        
+        for positions,board in self.positionSets:
+            self.assertEqual(len(positions), popcount(board))
+
 if __name__ == '__main__':
     unittest.main()
@@ -2,6 +2,9 @@ import unittest
 
 from pychess.Savers import pgn
 from pychess.Utils.lutils import ldraw
+from pychess.Utils.lutils.LBoard import LBoard
+from pychess.Utils.lutils.lmovegen import newMove
+from pychess.Utils.const import *
 
 
 class DrawTestCase(unittest.TestCase):
@@ -47,7 +50,49 @@ class DrawTestCase(unittest.TestCase):
             self.assertEqual(ldraw.testMaterial(lboard), False)
 
             lboard = model.boards[-1].board
-            self.assertEqual(ldraw.testMaterial(lboard), True)
+            self.assertEqual(ldraw.testMaterial(lboard), True)
+
+    def test4(self):
+        """Testing repetitions are counted as moves are made and taken back"""
+        board = LBoard(NORMALCHESS)
+        board.applyFen(FEN_START)
+        shuffle = [newMove(G1, F3), newMove(G8, F6), newMove(F3, G1), newMove(F6, G8)]
+
+        for move in shuffle:
+            board.applyMove(move)
+        self.assertEqual(board.repetitionCount(), 2)
+        for move in shuffle:
+            board.applyMove(move)
+        self.assertEqual(board.repetitionCount(), 3)
+
+        # Nothing repeats after a pawn move
+        board.applyMove(newMove(E2, E4))
+        self.assertEqual(board.repetitionCount(), 1)
+        board.applyMove(newMove(E7, E5))
+        for move in shuffle:
+            board.applyMove(move)
+        self.assertEqual(board.repetitionCount(), 2)
+
+        for i in range(6):
+            board.popMove()
+        self.assertEqual(board.repetitionCount(), 3)
+        for i in range(4):
+            board.popMove()
+        self.assertEqual(board.repetitionCount(), 2)
+
+    def test5(self):
+        """Testing two-fold repetitions count as draws only inside the search"""
+        board = LBoard(NORMALCHESS)
+        board.applyFen(FEN_START)
+        for move in (newMove(G1, F3), newMove(G8, F6), newMove(F3, G1), newMove(F6, G8)):
+            board.applyMove(move)
+
+        self.assertTrue(ldraw.test(board))
+        # The search started at the start position
+        self.assertTrue(ldraw.test(board, 0))
+        # The search started after the first move
+        self.assertFalse(ldraw.test(board, 1))
+
     
 if __name__ == '__main__':
     unittest.main()
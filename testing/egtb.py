@@ -0,0 +1,181 @@
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+from threading import Thread
+
+try:
+    from http.server import HTTPServer, BaseHTTPRequestHandler
+except ImportError:
+    from BaseHTTPServer import HTTPServer, BaseHTTPRequestHandler
+
+from pychess.Utils.const import *
+from pychess.Utils.lutils.LBoard import LBoard
+from pychess.Utils.lutils.lmovegen import newMove
+from pychess.Utils.lutils.egtb_k4it import egtb_k4it
+from pychess.Utils.lutils.EgtbCache import EgtbCache
+from pychess.Utils.lutils.ldata import MATE_VALUE
+from pychess.Utils.lutils import lsearch
+
+# An answer in the format of k4it.de for 8/8/8/8/8/8/k7/4K2R, with the
+# moves of white first
+answer = b"""4-5: Win in 9
+7-63: Win in 13
+NEXTCOLOR
+8-16: Draw
+8-0: Draw
+"""
+
+class StandIn (BaseHTTPRequestHandler):
+    requests = []
+
+    def do_GET(self):
+        StandIn.requests.append(self.path)
+        self.send_response(200)
+        self.end_headers()
+        self.wfile.write(answer)
+
+    def log_message(self, *args):
+        pass
+
+class EgtbTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tempdir, "egtb.sqlite")
+        self.server = HTTPServer(("127.0.0.1", 0), StandIn)
+        self.thread = Thread(target=self.server.serve_forever)
+        self.thread.daemon = True
+        self.thread.start()
+        self.url = "http://127.0.0.1:%d/?fen=" % self.server.server_address[1]
+        StandIn.requests = []
+        self.board = LBoard(NORMALCHESS)
+        self.board.applyFen("8/8/8/8/8/8/k7/4K2R w K - 0 1")
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        shutil.rmtree(self.tempdir)
+
+    def testProbe(self):
+        """Testing online probes are done in the background and cached"""
+        egtb = egtb_k4it(self.path, self.url)
+        scored = []
+        self.assertEqual(egtb.scoreAllMoves(self.board, callback=scored.append), [])
+        egtb.join()
+        moves = [(newMove(E1, F1), WHITEWON, 9), (newMove(H1, H8), WHITEWON, 13)]
+        self.assertEqual(scored, [moves])
+        self.assertEqual(egtb.scoreAllMoves(self.board), moves)
+        self.assertEqual(len(StandIn.requests), 1)
+        egtb.cache.close()
+
+        # Both colors are stored, and kept on disk
+        egtb = egtb_k4it(self.path, self.url)
+        self.board.setColor(BLACK)
+        self.assertEqual(egtb.scoreAllMoves(self.board),
+                         [(newMove(A2, A3), DRAW, 0), (newMove(A2, A1), DRAW, 0)])
+        self.assertEqual(len(StandIn.requests), 1)
+        egtb.cache.close()
+
+    def testBrokenCallback(self):
+        """Testing a callback raising doesn't stop the background probes"""
+        egtb = egtb_k4it(self.path, self.url)
+        def broken(moves):
+            raise ValueError("broken")
+        egtb.scoreAllMoves(self.board, callback=broken)
+        joining = Thread(target=egtb.join)
+        joining.daemon = True
+        joining.start()
+        joining.join(10)
+        self.assertFalse(joining.is_alive())
+
+        # The worker is still there for the next position
+        scored = []
+        board = LBoard(NORMALCHESS)
+        board.applyFen("8/8/8/8/8/8/k7/4K1R1 w - - 0 1")
+        egtb.scoreAllMoves(board, callback=scored.append)
+        egtb.join()
+        self.assertEqual(len(scored), 1)
+        egtb.cache.close()
+
+    def testProbeSoft(self):
+        """Testing soft probes don't go online"""
+        egtb = egtb_k4it(self.path, self.url)
+        self.assertEqual(egtb.scoreAllMoves(self.board, probeSoft=True), [])
+        egtb.join()
+        self.assertEqual(StandIn.requests, [])
+        egtb.cache.close()
+
+    def testEviction(self):
+        """Testing the least recently used positions are evicted"""
+        cache = EgtbCache(self.path, maxEntries=2)
+        cache.put("a", WHITE, [(1, DRAW, 0)])
+        cache.put("b", WHITE, [])
+        cache.get("a", WHITE)
+        cache.put("c", WHITE, [(2, WHITEWON, 3)])
+        self.assertEqual(cache.get("a", WHITE), [(1, DRAW, 0)])
+        self.assertEqual(cache.get("b", WHITE), None)
+        self.assertEqual(cache.get("c", WHITE), [(2, WHITEWON, 3)])
+        cache.close()
+
+class RookEndings:
+    """ A table of the endings with a rook against a lone king """
+
+    def __init__(self):
+        self.probes = 0
+
+    def supports(self, size):
+        return sum(size) <= 3
+
+    def scoreGame(self, board, omitDepth, probeSoft):
+        self.probes += 1
+        if board.boards[WHITE][ROOK]:
+            return WHITEWON, None if omitDepth else 15
+        return DRAW, None
+
+    def scoreAllMoves(self, board):
+        return [(newMove(A1, A8), WHITEWON, 0)]
+
+class SearchTestCase(unittest.TestCase):
+
+    def setUp(self):
+        lsearch.searching = True
+        lsearch.endtime = sys.maxsize
+        lsearch.table.clear()
+        lsearch.tbprobes = lsearch.tbhits = 0
+        self.provider = RookEndings()
+        self.saved = lsearch.egtb
+        lsearch.egtb = lsearch.EndgameTable(self.provider)
+
+    def tearDown(self):
+        lsearch.searching = False
+        lsearch.egtb = self.saved
+
+    def testRoot(self):
+        """Testing the search plays the endgame table's move at the root"""
+        board = LBoard(NORMALCHESS)
+        board.applyFen("4k3/8/8/8/8/8/8/R3K3 w - - 0 1")
+        self.assertEqual(lsearch.alphaBeta(board, 3), MATE_VALUE-1)
+        self.assertEqual(lsearch.getPv(), [newMove(A1, A8)])
+
+    def testTree(self):
+        """Testing the endgame table is probed for results inside the tree"""
+        board = LBoard(NORMALCHESS)
+        board.applyFen("4k3/8/8/8/8/8/r7/R3K3 w - - 0 1")
+        for depth in range(1, 4):
+            self.assertEqual(lsearch.alphaBeta(board, depth), lsearch.TB_WIN_VALUE-1)
+            self.assertEqual(lsearch.getPv()[0], newMove(A1, A2))
+        self.assertTrue(lsearch.tbhits > 0)
+        # Positions are only probed once, though searched in each iteration
+        self.assertTrue(self.provider.probes < lsearch.tbprobes)
+
+    def testVariant(self):
+        """Testing variant games aren't probed"""
+        board = LBoard(SUICIDECHESS)
+        board.applyFen("4k3/8/8/8/8/8/r7/R3K3 w - - 0 1")
+        lsearch.alphaBeta(board, 2)
+        self.assertEqual((self.provider.probes, lsearch.tbprobes), (0, 0))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,120 @@
+import os
+import time
+import unittest
+from threading import Thread, Event, current_thread
+
+from pychess.Utils.const import *
+from pychess.Players.EnginePool import EnginePool, getResidentMemory
+
+
+class Process:
+    def __init__(self):
+        self.pid = os.getpid()
+        self.subprocExitCode = (None, None)
+
+class StandIn:
+    """ Stands in for an engine """
+
+    def __init__(self):
+        self.pool = None
+        self.poolKey = None
+        self.gameThread = None
+        self.connected = True
+        self.engine = Process()
+        self.finished = []
+        self.colors = []
+
+    def finish(self, status):
+        self.finished.append(status)
+
+    def newGame(self, color):
+        self.colors.append(color)
+
+    def kill(self, reason):
+        self.connected = False
+
+
+class EnginePoolTestCase(unittest.TestCase):
+
+    def testReuse(self):
+        """Testing engines are only handed out for the same key"""
+        pool = EnginePool(ttl=60, memoryBudget=None)
+        engine = StandIn()
+        pool.register(engine, "a")
+        self.assertEqual(pool.acquire("a", WHITE), None)
+        self.assertTrue(pool.release(engine, DRAW))
+        self.assertEqual(engine.finished, [DRAW])
+        self.assertEqual(pool.acquire("b", WHITE), None)
+        self.assertTrue(pool.acquire("a", BLACK) is engine)
+        self.assertEqual(engine.colors, [BLACK])
+        self.assertEqual(pool.acquire("a", WHITE), None)
+        self.assertEqual((pool.hits, pool.misses), (1, 3))
+
+    def testDead(self):
+        """Testing dead engines aren't kept"""
+        pool = EnginePool(ttl=60, memoryBudget=None)
+        engine = StandIn()
+        pool.register(engine, "a")
+        engine.engine.subprocExitCode = (0, "")
+        self.assertFalse(pool.release(engine, DRAW))
+        self.assertFalse(EnginePool(ttl=0).release(StandIn(), DRAW))
+
+    def testTtl(self):
+        """Testing engines idle for longer than the ttl are killed"""
+        pool = EnginePool(ttl=60, memoryBudget=None)
+        old, new = StandIn(), StandIn()
+        pool.register(old, "a")
+        pool.register(new, "a")
+        pool.release(old, DRAW)
+        pool.release(new, DRAW)
+        pool.idle[0] = pool.idle[0][:2] + (time.time() - 61,)
+        pool._evictLater()
+        self.assertFalse(old.connected)
+        self.assertTrue(new.connected)
+        self.assertEqual([entry[1] for entry in pool.idle], [new])
+
+    def testMemoryBudget(self):
+        """Testing the least recently used engines are killed to stay in the memory budget"""
+        memory = getResidentMemory(os.getpid())
+        if not memory:
+            self.skipTest("the memory used by processes isn't known")
+        pool = EnginePool(ttl=60, memoryBudget=memory * 3 // 2)
+        old, new = StandIn(), StandIn()
+        pool.register(old, "a")
+        pool.register(new, "b")
+        pool.release(old, DRAW)
+        self.assertTrue(old.connected)
+        self.assertTrue(pool.release(new, DRAW))
+        self.assertFalse(old.connected)
+        self.assertTrue(pool.acquire("b", WHITE) is new)
+
+    def testGameThread(self):
+        """Testing engines still used by the thread of their last game aren't handed out"""
+        gameOver = Event()
+        try:
+            pool = EnginePool(ttl=60, memoryBudget=None)
+            engine = StandIn()
+            pool.register(engine, "a")
+            engine.gameThread = Thread(target=gameOver.wait)
+            engine.gameThread.start()
+            pool.release(engine, DRAW)
+            self.assertEqual(pool.acquire("a", WHITE), None)
+            self.assertTrue(engine.connected)
+        finally:
+            gameOver.set()
+        engine.gameThread.join()
+        self.assertTrue(pool.acquire("a", WHITE) is engine)
+
+    def testCurrentThread(self):
+        """Testing engines are handed out again in the thread of their last game"""
+        pool = EnginePool(ttl=60, memoryBudget=None)
+        engine = StandIn()
+        pool.register(engine, "a")
+        engine.gameThread = current_thread()
+        pool.release(engine, DRAW)
+        self.assertTrue(pool.acquire("a", BLACK) is engine)
+        self.assertEqual(engine.colors, [BLACK])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -3,6 +3,7 @@ import unittest
 from pychess.Utils.const import *
 from pychess.Utils.lutils.LBoard import LBoard
 from pychess.Utils.lutils.leval import evaluateComplete
+from pychess.Utils.lutils.lmovegen import genAllMoves
 from pychess.Utils.lutils import leval 
 
 
@@ -29,6 +30,7 @@ class EvalTestCase(unittest.TestCase):
         funcs = (f for f in funcs if callable(f) \
                                     and f != leval.evaluateComplete\
                                     and f != leval.evalMaterial\
+                                    and f != leval.evalPieceSquares\
                                     and f != leval.evalPawnStructure\
                                     and f != leval.evalTrappedBishops)
         
@@ -37,6 +39,8 @@ class EvalTestCase(unittest.TestCase):
 
         self.assertEqual(phasew, phaseb)
         
+        self.assertEqual(leval.evalPieceSquares (self.board, phasew), 0)
+        
         pawnScore, passed, weaked = leval.cacheablePawnInfo (self.board, phasew)
         sw = leval.evalPawnStructure (self.board, WHITE, phasew, passed, weaked)
 
@@ -56,5 +60,72 @@ class EvalTestCase(unittest.TestCase):
             #print func, sw, sb
             self.assertEqual(sw, sb)
     
+    def test4(self):
+        """Testing the incremental evaluation terms match a fresh board"""
+        board = LBoard(NORMALCHESS)
+        board.applyFen("r3k2r/Pppp1ppp/1b3nbN/nP6/BBP1P3/q4N2/Pp1P2PP/R2Q1RK1 w kq - 0 1")
+        def terms(board):
+            return board.material[:], board.psqMg, board.psqEg
+        def walk(depth):
+            fresh = LBoard(NORMALCHESS)
+            fresh.applyFen(board.asFen())
+            self.assertEqual(terms(board), terms(fresh))
+            if depth == 0:
+                return
+            for move in genAllMoves(board):
+                board.applyMove(move)
+                if not board.opIsChecked():
+                    walk(depth-1)
+                board.popMove()
+        before = terms(board)
+        walk(2)
+        self.assertEqual(terms(board), before)
+
+    def test5(self):
+        """Testing the pawn hash keeps both tiers and verifies the whole key"""
+        boards = []
+        for fen in ("rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1",
+                    "4k3/pp6/8/8/8/8/PP6/4K3 w - - 0 1",
+                    "4k3/p7/8/8/8/8/P7/4K3 w - - 0 1"):
+            board = LBoard(NORMALCHESS)
+            board.applyFen(fen)
+            boards.append(board)
+        full, few, fewer = boards
+
+        # A single bucket, so every structure lands in it
+        leval.resizePawnTable(leval.PAWN_BUCKET_SIZE)
+        try:
+            leval.recordPawns(full, 1, 10, 0, 0)
+            self.assertEqual(leval.probePawns(full, 1), (10, 0, 0))
+            self.assertEqual(leval.probePawns(full, 2), None)
+            # Structures with fewer pawns take turns in the second entry
+            leval.recordPawns(few, 1, 20, 0, 0)
+            leval.recordPawns(fewer, 1, 30, 0, 0)
+            self.assertEqual(leval.probePawns(full, 1), (10, 0, 0))
+            self.assertEqual(leval.probePawns(few, 1), None)
+            self.assertEqual(leval.probePawns(fewer, 1), (30, 0, 0))
+            # Until a new search ages the first entry
+            leval.newPawnSearch()
+            leval.recordPawns(few, 1, 20, 0, 0)
+            self.assertEqual(leval.probePawns(full, 1), None)
+            self.assertEqual(leval.probePawns(few, 1), (20, 0, 0))
+
+            size, hits, misses, collisions, permille = leval.getPawnStats()
+            self.assertEqual((hits, misses, collisions), (4, 3, 3))
+            self.assertEqual(permille, 1000)
+        finally:
+            leval.resizePawnTable(leval.PAWN_HASH_SIZE)
+
+    def test6(self):
+        """Testing atomic chess leaves the pawn square table out"""
+        fen = "4k3/8/8/3P4/8/8/8/4K3 w - - 0 1"
+        normal = LBoard(NORMALCHESS)
+        normal.applyFen(fen)
+        atomic = LBoard(ATOMICCHESS)
+        atomic.applyFen(fen)
+        self.assertNotEqual(normal.psqMg, 0)
+        self.assertEqual(atomic.psqMg, 0)
+        self.assertEqual(atomic.psqEg, 0)
+
 if __name__ == '__main__':
     unittest.main()
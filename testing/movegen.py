@@ -1,7 +1,7 @@
 from __future__ import print_function
 import unittest
 
-from pychess.Utils.lutils.lmovegen import genAllMoves, genCheckEvasions
+from pychess.Utils.lutils.lmovegen import genAllMoves, genCheckEvasions, genLegalMoves
 from pychess.Utils.lutils.LBoard import LBoard
 from pychess.Utils.lutils.bitboard import toString, iterBits
 from pychess.Utils.lutils.ldata import *
@@ -52,6 +52,7 @@ class FindMovesTestCase(unittest.TestCase):
             # comparison possible
             nmoves.sort()
             cmoves.sort()
+            self.assertEqual(sorted(genLegalMoves(board)), cmoves)
             
             if nmoves == cmoves:
                 for move in cmoves:
@@ -70,11 +71,13 @@ class FindMovesTestCase(unittest.TestCase):
                 self.assertEqual(nmoves, cmoves)
                 
         else:
+            nmoves = []
             for move in genAllMoves(board):
                 board.applyMove(move)
                 if board.opIsChecked():
                     board.popMove()
                     continue
+                nmoves.append(move)
                 
                 # Validator test
                 board.popMove()
@@ -93,6 +96,10 @@ class FindMovesTestCase(unittest.TestCase):
                 
                 self.perft(board, depth-1, prevmoves)
                 board.popMove()
+            
+            # The pin based legal move generator has to agree with playing
+            # every move and looking for checks
+            self.assertEqual(sorted(genLegalMoves(board)), sorted(nmoves))
     
     def setUp(self):
         self.positions = []
@@ -0,0 +1,65 @@
+from __future__ import print_function
+import unittest
+
+from pychess.Utils.lutils.lmovegen import genAllMoves, genLegalMoves, newMove
+from pychess.Utils.lutils.LBoard import LBoard
+from pychess.Utils.lutils.MovePicker import MovePicker
+from pychess.Utils.lutils.TranspositionTable import TranspositionTable
+from pychess.Utils.const import *
+
+
+class MovePickerTestCase(unittest.TestCase):
+    """ The staged move picker has to hand out every legal move exactly once,
+        whatever hash move and killers it is given """
+
+    MAXDEPTH = 2
+
+    def setUp(self):
+        self.positions = []
+        for line in open('gamefiles/perftsuite.epd'):
+            if line.startswith("#"):
+                continue
+            self.positions.append(line.split(";")[0])
+        self.table = TranspositionTable(1024)
+
+    def pick(self, board, depth, foreign):
+        if depth == 0:
+            return
+        if board.isChecked():
+            return
+
+        moves = sorted(genLegalMoves(board))
+
+        # Try with hash moves and killers from this and from another position
+        for candidates in (moves[:3], foreign[:3], foreign[-3:]):
+            candidates = list(candidates) + [-1, -1, -1]
+            self.table.killer1[depth] = candidates[1]
+            self.table.killer2[depth] = candidates[2]
+            hashmove = candidates[0] if candidates[0] != -1 else None
+            picked = list(MovePicker(board, self.table, depth, hashmove))
+            self.assertEqual(sorted(picked), moves)
+
+        for move in moves:
+            board.applyMove(move)
+            self.pick(board, depth-1, moves)
+            board.popMove()
+
+    def testMovePicker(self):
+        """Testing the staged move picker against genLegalMoves"""
+        foreign = []
+        for fen in self.positions:
+            board = LBoard(NORMALCHESS)
+            board.applyFen(fen)
+            self.pick(board, self.MAXDEPTH, foreign)
+            foreign = sorted(genAllMoves(board))
+
+    def testGoodCapturesFirst(self):
+        """Testing the move picker puts winning captures before quiet moves"""
+        board = LBoard(NORMALCHESS)
+        board.applyFen("4k3/8/8/3q4/8/8/3R4/4K3 w - - 0 1")
+        picked = list(MovePicker(board, self.table, 1))
+        self.assertEqual(picked[0], newMove(D2, D5))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,34 @@
+from __future__ import print_function
+import unittest
+
+from pychess.compat import StringIO
+from pychess.Utils.lutils.LBoard import LBoard
+from pychess.Utils.lutils.perft import perft, divide, perftSuite, perftVariants, perftPositions
+
+
+class PerftTestCase(unittest.TestCase):
+    """ Checks the move generators of all variants against the reference counts
+        of the perft module """
+
+    MAXDEPTH = 3
+
+    def testReferencePositions(self):
+        """Testing perft counts of the reference positions"""
+        out = StringIO()
+        errors = perftSuite(self.MAXDEPTH, out=out)
+        self.assertEqual(errors, 0, out.getvalue())
+
+    def testDivide(self):
+        """Testing perft divide adds up to the perft count"""
+        for name, fen, counts in perftPositions:
+            board = LBoard(perftVariants[name])
+            board.applyFen(fen)
+            hash = board.hash
+            moves = divide(board, 2)
+            self.assertEqual(sum(nodes for move, nodes in moves), counts[1])
+            self.assertEqual(len(moves), counts[0])
+            self.assertEqual(board.hash, hash)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,7 +1,15 @@
+import os
+import shutil
+import tempfile
 import unittest
 
+from pychess.Utils.const import *
 from pychess.Utils.Board import Board
 from pychess.Utils.lutils.leval import LBoard
+from pychess.Utils.lutils.lmove import newMove
+from pychess.Utils.book import PolyglotBook, entrystruct
+from pychess.Utils.makebook import BookBuilder
+from pychess.compat import StringIO
 
 # Examples taken from http://alpha.uhasselt.be/Research/Algebra/Toga/book_format.html
 testcases = [
@@ -26,5 +34,157 @@ class PolyglotTestCase(unittest.TestCase):
             board.applyFen(testcase[0])
             self.assertEqual(board.hash, testcase[1])
 
+class PolyglotBookTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+        self.board = LBoard(NORMALCHESS)
+        self.board.applyFen(FEN_START)
+        # Polyglot moves are encoded like ours, without the flag
+        self.e4 = newMove(E2, E4)
+        self.d4 = newMove(D2, D4)
+        self.nf3 = newMove(G1, F3)
+
+    def tearDown(self):
+        shutil.rmtree(self.tempdir)
+
+    def writeBook(self, name, entries, mtime=None):
+        path = os.path.join(self.tempdir, name)
+        with open(path, "wb") as f:
+            for entry in sorted(entries):
+                f.write(entrystruct.pack(*entry))
+        if mtime is not None:
+            os.utime(path, (mtime, mtime))
+        return path
+
+    def testProbe(self):
+        """Testing the book finds all the moves of a position"""
+        key = self.board.hash
+        path = self.writeBook("book.bin", [(key-1, self.nf3, 1, 0, 0),
+                                           (key, self.e4, 3, 0, 0),
+                                           (key, self.d4, 2, 0, 0),
+                                           (key+1, self.nf3, 1, 0, 0)])
+        book = PolyglotBook([path])
+        openings = book.getOpenings(self.board)
+        self.assertEqual(sorted(openings),
+                         sorted([(self.e4, 3, 0, 0), (self.d4, 2, 0, 0)]))
+        self.assertEqual(book.getOpenings(self.board), openings)
+        self.assertEqual((book.hits, book.misses), (1, 1))
+        book.close()
+
+    def testStacked(self):
+        """Testing stacked books are probed in priority order"""
+        key = self.board.hash
+        first = self.writeBook("first.bin", [(key+1, self.nf3, 1, 0, 0)])
+        second = self.writeBook("second.bin", [(key, self.d4, 1, 0, 0)])
+        third = self.writeBook("third.bin", [(key, self.e4, 1, 0, 0)])
+        missing = os.path.join(self.tempdir, "missing.bin")
+        book = PolyglotBook([missing, first, second, third])
+        self.assertEqual(book.getOpenings(self.board), [(self.d4, 1, 0, 0)])
+        book.close()
+
+    def testReload(self):
+        """Testing the book is reopened when its file changes"""
+        key = self.board.hash
+        path = self.writeBook("book.bin", [(key, self.e4, 1, 0, 0)], 1000000)
+        book = PolyglotBook(lambda: [path])
+        self.assertEqual(book.getOpenings(self.board), [(self.e4, 1, 0, 0)])
+        self.writeBook("book.bin", [(key, self.d4, 1, 0, 0)], 2000000)
+        self.assertEqual(book.getOpenings(self.board), [(self.d4, 1, 0, 0)])
+        other = self.writeBook("other.bin", [])
+        path = other
+        self.assertEqual(book.getOpenings(self.board), [])
+        book.close()
+
+games = """
+[White "a"]
+[Black "b"]
+[WhiteElo "2400"]
+[BlackElo "2300"]
+[Result "1-0"]
+
+1. e4 e5 2. Nf3 Nc6 3. Bc4 Nf6 4. O-O 1-0
+
+[White "c"]
+[Black "d"]
+[Result "1/2-1/2"]
+
+1. e4 {comment} e5 (1... c5 2. Nf3) 2. Nf3 Nf6 1/2-1/2
+
+[White "e"]
+[Black "f"]
+[Result "0-1"]
+
+1. d4 d5 0-1
+
+[White "g"]
+[Black "h"]
+[Result "*"]
+
+1. e4 *
+"""
+
+class BookBuilderTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tempdir)
+
+    def build(self, **kwargs):
+        path = os.path.join(self.tempdir, "book.bin")
+        builder = BookBuilder(**kwargs)
+        builder.addPgn(StringIO(games))
+        builder.write(path)
+        builder.close()
+        with open(path, "rb") as f:
+            return f.read()
+
+    def getOpenings(self, data, moves):
+        path = os.path.join(self.tempdir, "probe.bin")
+        with open(path, "wb") as f:
+            f.write(data)
+        board = LBoard(NORMALCHESS)
+        board.applyFen(FEN_START)
+        for move in moves:
+            board.applyMove(move)
+        book = PolyglotBook([path])
+        openings = book.getOpenings(board)
+        book.close()
+        return sorted(openings)
+
+    def testBuild(self):
+        """Testing the book counts the games and points of each move"""
+        data = self.build(minGames=1)
+        e4, d4 = newMove(E2, E4), newMove(D2, D4)
+        # Unfinished games are left out, and variations aren't counted
+        self.assertEqual(self.getOpenings(data, []),
+                         sorted([(e4, 3, 2, 3), (d4, 0, 1, 0)]))
+        e5 = newMove(E7, E5)
+        self.assertEqual(self.getOpenings(data, [e4]), [(e5, 1, 2, 1)])
+        # Castling is stored as the king taking the rook, and read back
+        castle = newMove(E1, G1, KING_CASTLE)
+        moves = [e4, e5, newMove(G1, F3), newMove(B8, C6),
+                 newMove(F1, C4), newMove(G8, F6)]
+        self.assertEqual(self.getOpenings(data, moves), [(castle, 2, 1, 2)])
+
+    def testFilters(self):
+        """Testing the book can be limited by games, ply and rating"""
+        e4, e5 = newMove(E2, E4), newMove(E7, E5)
+        data = self.build(minGames=2)
+        self.assertEqual(self.getOpenings(data, []), [(e4, 3, 2, 3)])
+        # e4, e5 and Nf3 were played twice
+        self.assertEqual(len(data), 3 * entrystruct.size)
+        data = self.build(minGames=1, maxPly=1)
+        self.assertEqual(self.getOpenings(data, [e4]), [])
+        data = self.build(minGames=1, minElo=2300)
+        self.assertEqual(self.getOpenings(data, []), [(e4, 2, 1, 2)])
+
+    def testSpill(self):
+        """Testing the book doesn't change when counts are spilled to disk"""
+        self.assertEqual(self.build(minGames=1, maxEntries=3),
+                         self.build(minGames=1))
+
 if __name__ == '__main__':
     unittest.main()
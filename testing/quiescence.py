@@ -0,0 +1,54 @@
+import sys
+import unittest
+
+from pychess.Utils.const import *
+from pychess.Utils.lutils.LBoard import LBoard
+from pychess.Utils.lutils.ldata import PAWN_VALUE, MATE_VALUE
+from pychess.Utils.lutils import lsearch
+
+
+class QuiescenceTestCase(unittest.TestCase):
+
+    def setUp(self):
+        lsearch.searching = True
+        lsearch.endtime = sys.maxsize
+        lsearch.evalTable.clear()
+        self.saved = lsearch.quiescencePruning
+
+    def tearDown(self):
+        lsearch.searching = False
+        lsearch.quiescencePruning = self.saved
+
+    def search(self, fen, alpha, beta):
+        board = LBoard(NORMALCHESS)
+        board.applyFen(fen)
+        qnodes = lsearch.qnodes
+        score = lsearch.quiescent(board, alpha, beta, 1)
+        return score, lsearch.qnodes - qnodes
+
+    def testLosingCapture(self):
+        """Testing captures losing material are not searched"""
+        # Qxd5 is answered by exd5
+        fen = "4k3/8/4p3/3p4/8/8/8/3QK3 w - - 0 1"
+        lsearch.quiescencePruning = False
+        score, qnodes = self.search(fen, -MATE_VALUE, MATE_VALUE)
+        self.assertTrue(qnodes > 0)
+        lsearch.quiescencePruning = True
+        self.assertEqual(self.search(fen, -MATE_VALUE, MATE_VALUE), (score, 0))
+
+    def testDelta(self):
+        """Testing captures which can't get near alpha are not searched"""
+        # Winning the pawn on d5 doesn't make up for the missing queen
+        fen = "4k2q/pp6/8/3p4/8/8/PP6/3RK3 w - - 0 1"
+        board = LBoard(NORMALCHESS)
+        board.applyFen(fen)
+        alpha = lsearch.evaluate(board) + 2*PAWN_VALUE + lsearch.DELTA_MARGIN
+        lsearch.quiescencePruning = False
+        score, qnodes = self.search(fen, alpha, alpha+1)
+        self.assertTrue(qnodes > 0)
+        lsearch.quiescencePruning = True
+        self.assertEqual(self.search(fen, alpha, alpha+1), (score, 0))
+
+
+if __name__ == '__main__':
+    unittest.main()
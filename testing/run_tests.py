@@ -2,6 +2,7 @@ import unittest
 
 modules_to_test = (
     "bitboard",
+    "sliders",
     "database",
     "draw",
     "eval",
@@ -10,6 +11,8 @@ modules_to_test = (
     "frc_movegen",
     "move",
     "movegen",
+    "movepicker",
+    "perft",
     "pgn",
     "atomic",
     "crazyhouse",
@@ -17,6 +20,13 @@ modules_to_test = (
     "suicide",
     "zobrist",
     "polyglot",
+    "egtb",
+    "transpositiontable",
+    "timemanager",
+    "quiescence",
+    "tournament",
+    "enginepool",
+    "asyncengine",
     'ficsmanagers',
     'analysis',
     ) 
@@ -0,0 +1,56 @@
+import unittest
+
+import random
+
+from pychess.Utils.lutils.bitboard import bitPosArray
+from pychess.Utils.lutils.sliders import rookAttacks, bishopAttacks, queenAttacks
+
+ROOK_STEPS = ((1, 0), (-1, 0), (0, 1), (0, -1))
+BISHOP_STEPS = ((1, 1), (1, -1), (-1, 1), (-1, -1))
+
+def slide (cord, blocker, steps):
+    """ Walks the rays of cord one cord at a time """
+    attacks = 0
+    for dr, df in steps:
+        rank, file = (cord >> 3) + dr, (cord & 7) + df
+        while 0 <= rank < 8 and 0 <= file < 8:
+            bit = bitPosArray[rank*8 + file]
+            attacks |= bit
+            if blocker & bit:
+                break
+            rank, file = rank + dr, file + df
+    return attacks
+
+class SlidersTestCase(unittest.TestCase):
+
+    def setUp (self):
+        rand = random.Random(0)
+        self.blockers = [0, 2**64-1]
+        for i in range(500):
+            # Sparse and dense boards
+            self.blockers.append(rand.getrandbits(64) & rand.getrandbits(64))
+            self.blockers.append(rand.getrandbits(64) | rand.getrandbits(64))
+
+    def testRook(self):
+        """Testing rook attacks against walking the rays"""
+        for blocker in self.blockers:
+            for cord in range(64):
+                self.assertEqual(rookAttacks(cord, blocker),
+                                 slide(cord, blocker, ROOK_STEPS))
+
+    def testBishop(self):
+        """Testing bishop attacks against walking the rays"""
+        for blocker in self.blockers:
+            for cord in range(64):
+                self.assertEqual(bishopAttacks(cord, blocker),
+                                 slide(cord, blocker, BISHOP_STEPS))
+
+    def testQueen(self):
+        """Testing queen attacks are the rook and bishop attacks"""
+        for blocker in self.blockers[:50]:
+            for cord in range(64):
+                self.assertEqual(queenAttacks(cord, blocker),
+                                 slide(cord, blocker, ROOK_STEPS + BISHOP_STEPS))
+
+if __name__ == '__main__':
+    unittest.main()
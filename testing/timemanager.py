@@ -0,0 +1,79 @@
+from __future__ import print_function
+import unittest
+
+from pychess.Utils.const import *
+from pychess.Utils.lutils.LBoard import LBoard
+from pychess.Utils.lutils.lmovegen import newMove
+from pychess.Utils.lutils.lsearch import aspirationSearch, alphaBeta
+from pychess.Utils.lutils import lsearch
+from pychess.Utils.lutils.TimeManager import TimeManager
+
+
+class TimeManagerTestCase(unittest.TestCase):
+
+    def testLimits(self):
+        """Testing the planned time stays within the clock"""
+        for clock, increment in ((300, 0), (60, 2), (1, 0), (0.05, 0), (10, 5)):
+            manager = TimeManager(clock, increment, plyCount=20)
+            self.assertTrue(0 < manager.optimum <= manager.maximum)
+            self.assertTrue(manager.maximum <= max(clock, 0.01))
+
+    def testMovesToGo(self):
+        """Testing the time is spread over the moves to the time control"""
+        # The last move before the control still keeps time in hand
+        manager = TimeManager(100, 0, movestogo=40, plyCount=78)
+        self.assertTrue(10 < manager.optimum < 50)
+        manager = TimeManager(100, 0, movestogo=40, plyCount=0)
+        self.assertAlmostEqual(manager.optimum, 100 / 40.)
+
+    def testFixedTime(self):
+        """Testing a fixed time per move is used as it is"""
+        manager = TimeManager(300, 0, searchtime=5)
+        self.assertEqual(manager.optimum, 5)
+        self.assertEqual(manager.maximum, 5)
+
+    def testStability(self):
+        """Testing a changing best move gets more time than a stable one"""
+        stable = TimeManager(300)
+        unstable = TimeManager(300)
+        a, b = newMove(E2, E4), newMove(D2, D4)
+        for depth in range(1, 6):
+            stable.iterationDone(a, 20, 1000*4**depth, 0)
+            unstable.iterationDone((a, b)[depth % 2], 20, 1000*4**depth, 0)
+        self.assertTrue(stable.getFactor() < 1)
+        self.assertTrue(unstable.getFactor() > 1)
+
+    def testScoreSwing(self):
+        """Testing a dropping score gets more time"""
+        manager = TimeManager(300)
+        move = newMove(E2, E4)
+        manager.iterationDone(move, 50, 1000, 0)
+        manager.iterationDone(move, -100, 4000, 0)
+        self.assertTrue(manager.getFactor() > 1)
+
+    def testBranchingFactor(self):
+        """Testing an iteration which can't complete is not started"""
+        manager = TimeManager(300, searchtime=10)
+        move = newMove(E2, E4)
+        manager.iterationDone(move, 0, 1000, 1)
+        manager.iterationDone(move, 0, 5000, 5)
+        self.assertEqual(manager.nextIteration(), False)
+
+
+class AspirationTestCase(unittest.TestCase):
+
+    def testSameScore(self):
+        """Testing aspiration windows find the score of a full window search"""
+        board = LBoard(NORMALCHESS)
+        board.applyFen("r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1")
+        lsearch.searching = True
+        lsearch.endtime = 1e300
+        for guess in (-500, 0, 500):
+            lsearch.table.clear()
+            self.assertEqual(aspirationSearch(board, 4, guess),
+                             alphaBeta(board, 4))
+        lsearch.searching = False
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,66 @@
+import unittest
+
+from pychess.Utils.const import *
+from pychess.Utils.tournament import roundRobin, gauntlet, eloDifference, \
+    likelihoodOfSuperiority, Scoreboard
+
+
+class ScheduleTestCase(unittest.TestCase):
+
+    def testRoundRobin(self):
+        """Testing every player meets every other with both colors"""
+        schedule = roundRobin(3, rounds=2)
+        self.assertEqual(len(schedule), 12)
+        self.assertEqual([p.number for p in schedule], list(range(12)))
+        self.assertEqual([p.round for p in schedule], [1]*6 + [2]*6)
+        games = [(p.white, p.black) for p in schedule[:6]]
+        self.assertEqual(sorted(games), [(0, 1), (0, 2), (1, 0), (1, 2), (2, 0), (2, 1)])
+
+    def testGauntlet(self):
+        """Testing the first player meets every other with both colors"""
+        schedule = gauntlet(3)
+        games = [(p.white, p.black) for p in schedule]
+        self.assertEqual(games, [(0, 1), (1, 0), (0, 2), (2, 0)])
+
+    def testOpenings(self):
+        """Testing both games of a pairing start from the same opening"""
+        schedule = gauntlet(4, rounds=2, openings=4)
+        self.assertEqual([p.opening for p in schedule],
+                         [0, 0, 1, 1, 2, 2, 3, 3, 0, 0, 1, 1])
+
+
+class ScoreTestCase(unittest.TestCase):
+
+    def testElo(self):
+        """Testing the rating difference implied by a score"""
+        self.assertEqual(eloDifference(0, 0, 0), (0, 0))
+        self.assertEqual(eloDifference(5, 10, 5)[0], 0)
+        elo, margin = eloDifference(75, 0, 25)
+        self.assertAlmostEqual(elo, 190.85, 2)
+        self.assertTrue(0 < margin < elo)
+        self.assertEqual(eloDifference(3, 0, 0)[0], float('inf'))
+        self.assertEqual(eloDifference(0, 0, 3)[0], -float('inf'))
+
+    def testLikelihoodOfSuperiority(self):
+        """Testing the likelihood of superiority ignores draws"""
+        self.assertEqual(likelihoodOfSuperiority(0, 0), 0.5)
+        self.assertEqual(likelihoodOfSuperiority(10, 10), 0.5)
+        self.assertAlmostEqual(likelihoodOfSuperiority(60, 40), 0.9772, 4)
+        self.assertAlmostEqual(likelihoodOfSuperiority(40, 60), 0.0228, 4)
+
+    def testScoreboard(self):
+        """Testing the standings of a tournament"""
+        scoreboard = Scoreboard(3)
+        scoreboard.addResult(0, 1, WHITEWON)
+        scoreboard.addResult(1, 0, DRAW)
+        scoreboard.addResult(2, 0, BLACKWON)
+        scoreboard.addResult(1, 2, BLACKWON)
+        scoreboard.addResult(2, 1, KILLED)
+        self.assertEqual(scoreboard.getScore(0), (2, 1, 0))
+        self.assertEqual(scoreboard.getScore(0, [1]), (1, 1, 0))
+        self.assertEqual(scoreboard.getStandings(),
+                         [(0, 2, 1, 0), (2, 1, 0, 1), (1, 0, 1, 2)])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,120 @@
+from __future__ import print_function
+import os
+import tempfile
+import unittest
+
+from pychess.Utils.const import *
+from pychess.Utils.lutils.LBoard import LBoard
+from pychess.Utils.lutils.lmovegen import newMove
+from pychess.Utils.lutils import TranspositionTable as transpositiontable
+from pychess.Utils.lutils.TranspositionTable import TranspositionTable, bucketType, wordType
+from pychess.Utils.lutils.EvalCache import EvalCache
+from pychess.Utils.lutils.leval import evaluateComplete
+
+
+class TranspositionTableTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.board = LBoard(NORMALCHESS)
+        self.board.applyFen(FEN_START)
+        self.move = newMove(E2, E4)
+
+    def testRecordProbe(self):
+        """Testing an entry recorded in the transposition table can be probed"""
+        table = TranspositionTable(1024*1024)
+        self.assertEqual(table.probe(self.board, 3, -100, 100), None)
+        table.record(self.board, self.move, -25, hashfEXACT, 3)
+        self.assertEqual(table.probe(self.board, 3, -100, 100), (self.move, -25, hashfEXACT))
+        self.assertEqual(table.probe(self.board, 4, -100, 100), (self.move, -25, hashfBAD))
+        self.assertTrue(table.hashfull() >= 0)
+
+    def testTornEntry(self):
+        """Testing a partially overwritten entry is not mistaken for a hit"""
+        table = TranspositionTable(1024*1024)
+        table.record(self.board, self.move, 50, hashfEXACT, 3)
+        offset = (self.board.hash % table.buckets) * bucketType.size
+        words = list(bucketType.unpack_from(table.data, offset))
+        # Another writer got as far as the result word of the first entry
+        words[12] ^= 1
+        bucketType.pack_into(table.data, offset, *words)
+        self.assertEqual(table.probe(self.board, 3, -100, 100), None)
+
+    def testSharedBucket(self):
+        """Testing recording an entry leaves the others in its bucket alone"""
+        table = TranspositionTable(1024*1024)
+        offset = (self.board.hash % table.buckets) * bucketType.size
+
+        class Interleaved:
+            """ Another process stores an entry in the last slot, right after
+                the bucket has been unpacked """
+            size = bucketType.size
+            def unpack_from(self, data, offset_):
+                words = bucketType.unpack_from(data, offset_)
+                wordType.pack_into(data, offset + 3*wordType.size, 0x1234)
+                return words
+
+        transpositiontable.bucketType = Interleaved()
+        try:
+            table.record(self.board, self.move, 50, hashfEXACT, 3)
+        finally:
+            transpositiontable.bucketType = bucketType
+        self.assertEqual(wordType.unpack_from(table.data, offset + 3*wordType.size)[0], 0x1234)
+        self.assertEqual(table.probe(self.board, 3, -100, 100), (self.move, 50, hashfEXACT))
+
+    def testFile(self):
+        """Testing a file backed transposition table survives being reopened"""
+        fd, filename = tempfile.mkstemp()
+        os.close(fd)
+        try:
+            table = TranspositionTable(1024*1024, filename=filename)
+            table.record(self.board, self.move, 10, hashfEXACT, 5)
+            table.close()
+            table = TranspositionTable(1024*1024, filename=filename)
+            self.assertEqual(table.probe(self.board, 5, -100, 100), (self.move, 10, hashfEXACT))
+            table.close()
+            # Another size can't be used, as entries would be in other buckets
+            table = TranspositionTable(2*1024*1024, filename=filename)
+            self.assertEqual(table.probe(self.board, 5, -100, 100), None)
+            table.close()
+        finally:
+            os.remove(filename)
+
+
+class EvalCacheTestCase(unittest.TestCase):
+
+    def testRecordProbe(self):
+        """Testing the eval cache tells positions and sides to move apart"""
+        cache = EvalCache(1024)
+        board = LBoard(NORMALCHESS)
+        board.applyFen("r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1")
+        self.assertEqual(cache.probe(board), None)
+        score = evaluateComplete(board, board.color)
+        cache.record(board, score)
+        self.assertEqual(cache.probe(board), score)
+
+        board.setColor(BLACK)
+        self.assertEqual(cache.probe(board), None)
+        board.setColor(WHITE)
+        self.assertEqual((cache.hits, cache.misses), (1, 2))
+
+        cache.clear()
+        self.assertEqual(cache.probe(board), None)
+
+    def testScores(self):
+        """Testing evaluations are ints, and the eval cache keeps scores in range"""
+        board = LBoard(NORMALCHESS)
+        board.applyFen("r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1")
+        # Under Python 3 the king tropism used to make it a float
+        self.assertTrue(isinstance(evaluateComplete(board, WHITE), int))
+
+        cache = EvalCache(1024)
+        cache.record(board, 12.75)
+        self.assertEqual(cache.probe(board), 12)
+        cache.record(board, 100000)
+        self.assertEqual(cache.probe(board), 0x7fff)
+        cache.record(board, -100000)
+        self.assertEqual(cache.probe(board), -0x8000)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -5,11 +5,22 @@
     PyChess arena tournament script.
     This script executes a tournament between the engines installed on your
     system. The script is executed from a terminal with the usual environment.
+
+    The games are played without a gui, several at a time, and each engine
+    process is kept for the next game it plays. Finished games are appended
+    to a pgn file, and the standings are printed as the games finish.
+
+    Examples:
+        arena.py -c 8 --minutes 1 --openings suite.epd gnuchess crafty fruit
+        arena.py -c 8 --gauntlet --rounds 50 pychess gnuchess crafty
 '''
 from __future__ import print_function
 
 import os
 import sys
+import argparse
+from multiprocessing import cpu_count
+from threading import Thread, Event, Lock
 
 ###############################################################################
 # Set up important things
@@ -33,20 +44,54 @@ Log.DEBUG = False
 
 ###############################################################################
 # Do the rest of the imports
-from pychess.Players.engineNest import discoverer
-from pychess.Savers.pgn import save
+from pychess.compat import Queue, Empty
+from pychess.Players.engineNest import discoverer, pool
+from pychess.Players.EnginePool import DEFAULT_TTL
+from pychess.Savers import epd, pgn
 from pychess.Utils.GameModel import GameModel
+from pychess.Utils.Offer import Offer
 from pychess.Utils.TimeModel import TimeModel
+from pychess.Utils.tournament import roundRobin, gauntlet, Scoreboard, formatScore
 from pychess.Variants import variants
 
+# Engines are kept between games, which is off by default as long as not all
+# the panels of the GUI let go of the engines of finished games
+pool.ttl = DEFAULT_TTL
+
+###############################################################################
+# Parse the command line
+parser = argparse.ArgumentParser(
+    description="Plays a tournament between the installed engines.")
+parser.add_argument('engines', nargs='*', metavar='engine',
+    help='the engines to play, by default all of them')
+parser.add_argument('-c', '--concurrency', type=int, default=cpu_count(),
+    help='the number of games to play at a time (default is the number of '
+         'cores)')
+parser.add_argument('-r', '--rounds', type=int, default=1,
+    help='the times every pairing is played with both colors (default is 1)')
+parser.add_argument('-g', '--gauntlet', action='store_true',
+    help='let the first engine meet all the others, rather than playing a '
+         'round robin')
+parser.add_argument('-m', '--minutes', type=float, default=1,
+    help='the clock minutes of each player (default is 1)')
+parser.add_argument('-i', '--increment', type=int, default=0,
+    help='the seconds added to the clock after each move (default is 0)')
+parser.add_argument('-s', '--strength', type=int, default=20,
+    help='the strength of the engines, from 1 to 20 (default is 20)')
+parser.add_argument('--openings', metavar='FILE',
+    help='an epd or pgn file of the positions to start the games from')
+parser.add_argument('-o', '--output', default="arena.pgn",
+    help='the pgn file the games are appended to (default is arena.pgn)')
+args = parser.parse_args()
+
 ###############################################################################
 # Look up engines
 def prepare():
     print("Discovering engines", end=' ')
-    discoverer.connect('discovering_started', cb_started)   
-    discoverer.connect('engine_discovered', cb_gotone)  
-    discoverer.connect('all_engines_discovered', start)   
-    discoverer.discover()   
+    discoverer.connect('discovering_started', cb_started)
+    discoverer.connect('engine_discovered', cb_gotone)
+    discoverer.connect('all_engines_discovered', start)
+    discoverer.discover()
 
 def cb_started(discoverer, binnames):
     print("Wait a moment while we discover %d engines" % len(binnames))
@@ -54,131 +99,160 @@ def cb_started(discoverer, binnames):
 def cb_gotone (discoverer, binname, engine):
     sys.stdout.write(".")
 
-###############################################################################
-# Ask the user for details
-engines = []
-results = []
-minutes = 0
-current = [0,0]
-
 def start(discoverer):
-    global engines, results, minutes
-    engines = discoverer.getEngines()
-    n = len(engines)
-    for i in range(n):
-        results.append([None]*n)
-    
-    print()
-    print("Your installed engines are:")
-    for i, engine in enumerate(engines):
-        name = discoverer.getName(engine)
-        print("[%s] %s" % (name[:3], name))
-    print("The total amount of fights will be %d" % (n*(n-1)))
     print()
-    minutes = int(raw_input("Please enter the clock minutes for each game [n]: "))
-    print("The games will last up to %d minutes." % (2*n*(n-1)*minutes))
-    print("You will be informed of the progress as the games finish.")
-    print()
-    
-    runGame()
-
-###############################################################################
-# Run games
-def runGame():
-    a, b = findMatch()
-    if a == None:
-        print("All games have now been played. Here are the final scores:")
-        printResults()
+    installed = discoverer.getEngines()
+    if args.engines:
+        byName = dict((discoverer.getName(e).lower(), e) for e in installed)
+        missing = [name for name in args.engines if name.lower() not in byName]
+        if missing:
+            print("These engines aren't installed: %s" % ", ".join(missing))
+            mainloop.quit()
+            return
+        engines = [byName[name.lower()] for name in args.engines]
+    else:
+        engines = list(installed)
+    if len(engines) < 2:
+        print("At least two engines are needed for a tournament")
         mainloop.quit()
         return
-    current[0] = a
-    current[1] = b
-    
-    game = GameModel(TimeModel(minutes*60,0))
-    game.connect('game_started', cb_gamestarted)
-    game.connect('game_ended', cb_gameended)
-    p0 = discoverer.initPlayerEngine(engines[a], WHITE, 8, variants[NORMALCHESS], secs=minutes*60, incr=0, forcePonderOff=True)
-    p1 = discoverer.initPlayerEngine(engines[b], BLACK, 8, variants[NORMALCHESS], secs=minutes*60, incr=0, forcePonderOff=True)
-    game.setPlayers([p0,p1])
-    game.start()
-
-def cb_gamestarted(game):
-    print("Starting the game between %s and %s" % tuple(game.players))
-
-def cb_gameended(game, reason):
-    print("The game between %s and %s ended %s" % (tuple(game.players)+(reprResult[game.status],)))
-    if game.status not in (DRAW, WHITEWON, BLACKWON):
-        print("Something must have gone wrong. But we'll just try to continue!")
-    else:
-        i, j = current
-        results[i][j] = game.status
-        print("The current scores are:")
-    printScoreboard()
-    print()
-    
-    f = open("arena.pgn", "a+")
-    save(f, game)
-    
-    runGame()
+
+    openings = None
+    if args.openings:
+        loader = pgn if args.openings.lower().endswith(".pgn") else epd
+        with open(args.openings) as f:
+            openings = loader.load(f)
+        print("Read %d openings from %s" % (len(openings.games), args.openings))
+
+    tournament = Tournament(engines, openings)
+    thread = Thread(target=tournament.run, name="arena")
+    thread.daemon = True
+    thread.start()
 
 ###############################################################################
-# A few helpers
-def printScoreboard():
-    names = [discoverer.getName(e)[:3] for e in engines]
-    print("W\B", " ".join(names))
-    for i, nameA in enumerate(names):
-        print(nameA, end=' ')
-        for j, nameB in enumerate(names):
-            if i == j: print(" # ", end=' ')
-            elif results[i][j] == DRAW: print("½-½", end=' ')
-            elif results[i][j] == WHITEWON: print("1-0", end=' ')
-            elif results[i][j] == BLACKWON: print("0-1", end=' ')
-            else: print(" . ", end=' ')
+# Run games
+class Tournament:
+    def __init__ (self, engines, openings):
+        self.engines = engines
+        self.names = [discoverer.getName(e) for e in engines]
+        self.openings = openings
+        count = len(openings.games) if openings else 1
+        if args.gauntlet:
+            schedule = gauntlet(len(engines), args.rounds, count)
+        else:
+            schedule = roundRobin(len(engines), args.rounds, count)
+        self.pairings = Queue()
+        for pairing in schedule:
+            self.pairings.put(pairing)
+        self.total = len(schedule)
+
+        self.scoreboard = Scoreboard(len(engines))
+        self.played = 0
+        self.lock = Lock()
+
+    def run (self):
+        print("Playing %d games, %d at a time" % (self.total, args.concurrency))
+        workers = []
+        for i in range(max(args.concurrency, 1)):
+            worker = Thread(target=self.work, name="arena worker %d" % i)
+            worker.daemon = True
+            worker.start()
+            workers.append(worker)
+        for worker in workers:
+            worker.join()
+
+        pool.close()
         print()
+        print("All games have now been played. Here are the final scores:")
+        self.printStandings()
+        GLib.idle_add(mainloop.quit)
+
+    def work (self):
+        while True:
+            try:
+                pairing = self.pairings.get_nowait()
+            except Empty:
+                return
+            self.playGame(pairing)
+
+    def getPlayer (self, index, color):
+        """ An engine process from the pool, or a new one if there is none """
+        secs = int(args.minutes * 60)
+        return discoverer.initPlayerEngine(self.engines[index], color,
+                args.strength, variants[NORMALCHESS], secs=secs,
+                incr=args.increment, forcePonderOff=True)
+
+    def setOpening (self, game, number):
+        """ Moves the game to the end of the opening """
+        tags = dict(game.tags)
+        self.openings.loadToModel(number, -1, game)
+        game.tags = tags
+        game.status = WAITING_TO_START
+        game.reason = UNKNOWN_REASON
+        for player in game.players:
+            player.setOptionInitialBoard(game)
+        if game.timed:
+            game.timemodel.setMovingColor(game.boards[-1].color)
+            if game.ply >= 2:
+                game.timemodel.start()
+
+    def playGame (self, pairing):
+        game = GameModel(TimeModel(int(args.minutes*60), args.increment))
+        game.tags["Event"] = "PyChess Arena"
+        game.tags["Round"] = pairing.round
+
+        players = [self.getPlayer(pairing.white, WHITE),
+                   self.getPlayer(pairing.black, BLACK)]
+        game.setPlayers(players)
+        if self.openings:
+            self.setOpening(game, pairing.opening)
+
+        ended = Event()
+        game.connect('game_ended', lambda game, reason: ended.set())
+        # Nobody is here to call the flag of an engine out of time
+        def zero_reached (timemodel, color):
+            if game.status in UNFINISHED_STATES:
+                game.offerRecieved(players[1-color], Offer(FLAG_CALL))
+        game.timemodel.connect('zero_reached', zero_reached)
+
+        game.start()
+        # A game fails to end when an engine dies before it starts
+        while not ended.wait(1):
+            if not game.is_alive():
+                if players[WHITE].connected:
+                    game.kill(BLACK_ENGINE_DIED)
+                else:
+                    game.kill(WHITE_ENGINE_DIED)
+                break
+
+        # Gives the engines back to the pool
+        game.terminate()
+        game.join()
+
+        with self.lock:
+            self.played += 1
+            self.scoreboard.addResult(pairing.white, pairing.black, game.status)
+            pgn.save(open(args.output, "a"), game)
+            print()
+            print("Game %d of %d: %s - %s %s" % (self.played, self.total,
+                self.names[pairing.white], self.names[pairing.black],
+                reprResult[game.status]))
+            if game.status not in (DRAW, WHITEWON, BLACKWON):
+                print("Something must have gone wrong. But we'll just try to continue!")
+            self.printStandings()
 
-def printResults():
-    scores = []
-    for i in range(len(engines)):
-        points = sum(2 for j in range(len(engines)) if results[i][j] == WHITEWON) \
-               + sum(1 for j in range(len(engines)) if results[i][j] == DRAW) \
-               + sum(2 for j in range(len(engines)) if results[j][i] == BLACKWON) \
-               + sum(1 for j in range(len(engines)) if results[j][i] == DRAW)
-        scores.append((points, i))
-    scores.sort(reverse=True)
-    for points, i in scores:
-        print(discoverer.getName(engines[i]), ":", points/2, "½"*(points%2))
-
-#def findMatch():
-#    for i, engineA in enumerate(engines):
-#        for j, engineB in enumerate(engines):
-#            if i != j and results[i][j] == None:
-#                return i, j
-#    return None, None
-
-import random
-def findMatch():
-    pos = [(i,j) for i in range(len(engines))
-                 for j in range(len(engines))
-                 if i != j and results[i][j] == None]
-    #pos = [(i,j) for i,j in pos if
-    #       "pychess" in discoverer.getName(engines[i]).lower() or
-    #       "pychess" in discoverer.getName(engines[j]).lower()]
-    if not pos:
-        return None, None
-    return random.choice(pos)
+    def printStandings (self):
+        if args.gauntlet:
+            print("%s against" % self.names[0])
+            for i in range(1, len(self.names)):
+                score = self.scoreboard.getScore(0, [i])
+                print("    %-20s %s" % (self.names[i], formatScore(*score)))
+        else:
+            for player, wins, draws, losses in self.scoreboard.getStandings():
+                print("%-20s %s" % (self.names[player],
+                                    formatScore(wins, draws, losses)))
 
 ###############################################################################
 # Push onto the mainloop and start it
-#glib.idle_add(prepare)
 prepare()
-def do(discoverer):
-    game = GameModel(TimeModel(60,0))
-    #game.connect('game_started', cb_gamestarted2)
-    game.connect('game_ended', lambda *a: mainloop.quit())
-    p0 = discoverer.initPlayerEngine(discoverer.getEngines()['rybka'], WHITE, 7, variants[NORMALCHESS], 60)
-    p1 = discoverer.initPlayerEngine(discoverer.getEngines()['gnuchess'], BLACK, 7, variants[NORMALCHESS], 60)
-    game.setPlayers([p0,p1])
-    game.start()
-#discoverer.connect('all_engines_discovered', do)
-#discoverer.start()
 mainloop.run()